@@ -36,7 +36,8 @@ from Bio import SeqFeature
 from Bio import SeqIO
 
 from .utils import get_name_from_path
-from .hmm import read_hmm
+from .hmm import read_hmm, hmmsearch_output_options
+from . import timing
 
 _log = colorlog.getLogger(__name__)
 
@@ -64,7 +65,8 @@ def func_annot(integrons, replicon, prot_db, hmm_files, cfg, out_dir='.', evalue
              But several files per hmm file are produced.
 
              * subseqprot.tmp: fasta file containing a subset of protfile (the proteins belonging to the integron)
-             * <hmm>_fa.res: an output of the hmm search.
+             * <hmm>_fa.res: an output of the hmm search
+               (in domain tabular format if cfg.hmm_domtblout is True).
              * <hmm>_fa_table.res: an output of the hmm search in tabulated format.
 
     """
@@ -95,14 +97,15 @@ def func_annot(integrons, replicon, prot_db, hmm_files, cfg, out_dir='.', evalue
                 hmm_cmd = [cfg.hmmsearch,
                            "-Z", str(prot_nb),
                            "--cpu", str(cfg.cpu),
-                           "--tblout", hmm_tableout,
-                           "-o", hmm_out,
-                           hmm,
+                           "--tblout", hmm_tableout] + \
+                          hmmsearch_output_options(hmm_out, cfg) + \
+                          [hmm,
                            prot_tmp]
 
                 try:
                     _log.debug("run hmmsearch: {}".format(' '.join(hmm_cmd)))
-                    returncode = call(hmm_cmd)
+                    with timing.stage('hmmsearch', outputs=[hmm_out, hmm_tableout]):
+                        returncode = call(hmm_cmd)
                 except Exception as err:
                     raise RuntimeError("{0} failed : {1}".format(' '.join(hmm_cmd), err))
                 if returncode != 0:
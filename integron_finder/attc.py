@@ -30,11 +30,153 @@ import colorlog
 import numpy as np
 import pandas as pd
 
-from .infernal import local_max, expand
+from .infernal import local_max_windows, expand_windows, merge_window_stores
 
 _log = colorlog.getLogger(__name__)
 
 
+class AttcArrays:
+    """
+    The arrays of attC sites of a replicon (see :func:`cluster_attc`).
+
+    The attC sites of all arrays are kept in one table, each array is a range of :attr:`rows`,
+    which are the positions of its attC sites in the table (the rows of an array are in the order of the array).
+    The DataFrame of an array is built only when it is asked for: ``attc_arrays[i]``.
+    """
+
+    columns = ["Accession_number", "cm_attC", "cm_debut", "cm_fin", "pos_beg", "pos_end", "sens", "evalue"]
+
+    def __init__(self, attc_df, rows, bounds):
+        """
+        :param attc_df: the attC sites
+        :type attc_df: :class:`pandas.DataFrame`
+        :param rows: the positions of the attC sites of all arrays in *attc_df*, array after array
+        :type rows: :class:`numpy.ndarray` of int
+        :param bounds: the array *i* is ``rows[bounds[i]:bounds[i + 1]]``
+        :type bounds: :class:`numpy.ndarray` of int
+        """
+        self._attc_df = attc_df
+        self.rows = rows
+        self.bounds = bounds
+
+    def __len__(self):
+        return len(self.bounds) - 1
+
+    def __getitem__(self, array_idx):
+        """
+        :param int array_idx: the index of the array
+        :return: the attC sites of the array
+        :rtype: :class:`pandas.DataFrame`
+        """
+        if not -len(self) <= array_idx < len(self):
+            raise IndexError("array index out of range")
+        array_idx %= len(self)
+        array = self._attc_df.iloc[self.array_rows(array_idx)][self.columns].reset_index(drop=True)
+        # convert positions to int, and evalue to float
+        intcols = ["cm_debut", "cm_fin", "pos_beg", "pos_end"]
+        array[intcols] = array[intcols].astype(int)
+        array["evalue"] = array["evalue"].astype(float)
+        return array
+
+    def __iter__(self):
+        for array_idx in range(len(self)):
+            yield self[array_idx]
+
+    def array_rows(self, array_idx):
+        """
+        :param int array_idx: the index of the array
+        :return: the positions of the attC sites of the array in the attC sites table
+        :rtype: :class:`numpy.ndarray` of int
+        """
+        return self.rows[self.bounds[array_idx]:self.bounds[array_idx + 1]]
+
+    @property
+    def left(self):
+        """The beginning of each array (the beginning of its first attC site)"""
+        return self._attc_df.pos_beg.values[self.rows[self.bounds[:-1]]]
+
+    @property
+    def right(self):
+        """The end of each array (the end of its last attC site)"""
+        return self._attc_df.pos_end.values[self.rows[self.bounds[1:] - 1]]
+
+    def attc_sites(self, array_idx):
+        """
+        :param int array_idx: the index of the array
+        :return: the attC sites of the array without building its DataFrame
+        :rtype: iterator of tuples (int pos_beg, int pos_end, int strand (1 or -1), float evalue)
+        """
+        rows = self.array_rows(array_idx)
+        return zip(self._attc_df.pos_beg.values[rows].astype(int).tolist(),
+                   self._attc_df.pos_end.values[rows].astype(int).tolist(),
+                   np.where(self._attc_df.sens.values[rows] == "+", 1, -1).tolist(),
+                   self._attc_df.evalue.values[rows].astype(float).tolist())
+
+
+def _split_strand(rows, pos_beg, dist_threshold, replicon_size):
+    """
+    Split the attC sites of one strand in arrays, where 2 consecutive attC sites are more distant than dist_threshold.
+    If the last array is close to the first one along a circular replicon, they are merged as the first array.
+
+    :param rows: the positions of the attC sites of the strand in the attC sites table
+    :type rows: :class:`numpy.ndarray` of int
+    :param pos_beg: the beginning of all attC sites of the table
+    :type pos_beg: :class:`numpy.ndarray` of int
+    :param int dist_threshold: the maximal distance between 2 elements to aggregate them
+    :param int replicon_size: the replicon number of base pair
+    :return: the rows of the arrays, and the bounds of each array in these rows
+    :rtype: tuple of 2 :class:`numpy.ndarray` of int
+    """
+    if not rows.size:
+        return rows, np.zeros(1, dtype=int)
+    breaks = np.nonzero(np.diff(pos_beg[rows]) > dist_threshold)[0] + 1
+    bounds = np.concatenate(([0], breaks, [rows.size]))
+    if len(bounds) > 2 and (pos_beg[rows[0]] - pos_beg[rows[-1]]) % replicon_size < dist_threshold:
+        last_beg = bounds[-2]
+        last_len = rows.size - last_beg
+        rows = np.concatenate((rows[last_beg:], rows[:last_beg]))
+        bounds = np.concatenate(([0], bounds[1:-2] + last_len, [rows.size]))
+    return rows, bounds
+
+
+def cluster_attc(attc_df, keep_palindromes, dist_threshold, replicon_size):
+    """
+    Cluster the attC sites of the given replicon (sorted along start site) in arrays.
+    One array is composed of attC sites on the same strand and separated by a distance less than dist_threshold.
+    The arrays on the strand + come first, then the arrays on the strand -.
+    The clustering works on the positions, strands and evalues arrays of *attc_df*,
+    the DataFrame of each array is built only if it is needed.
+
+    :param attc_df: the attC sites
+    :type attc_df: :class:`pandas.DataFrame`
+    :param bool keep_palindromes: True if the palindromes must be kept in attc result, False otherwise
+    :param int dist_threshold: the maximal distance between 2 elements to aggregate them
+    :param int replicon_size: the replicon number of base pair
+    :return: the arrays of attC sites found on replicon
+    :rtype: :class:`AttcArrays` object
+    """
+    if len(attc_df) == 0:
+        # the table of a replicon without attC site may have no object column to compare the strands
+        return AttcArrays(attc_df, np.zeros(0, dtype=int), np.zeros(1, dtype=int))
+    pos_beg = attc_df.pos_beg.values
+    sens = attc_df.sens.values.astype(object)
+    if keep_palindromes:
+        rows = np.arange(len(attc_df))
+    else:
+        # keep the attC site with the lowest evalue among the sites starting at the same position
+        rows = np.lexsort((attc_df.evalue.values, pos_beg))
+        rows = rows[np.concatenate(([True], pos_beg[rows][1:] != pos_beg[rows][:-1]))] if rows.size else rows
+
+    rows_plus = rows[sens[rows] == "+"]
+    rows_minus = rows[sens[rows] == "-"]
+    rows_plus, bounds_plus = _split_strand(rows_plus, pos_beg, dist_threshold, replicon_size)
+    rows_minus, bounds_minus = _split_strand(rows_minus, pos_beg, dist_threshold, replicon_size)
+
+    return AttcArrays(attc_df,
+                      np.concatenate((rows_plus, rows_minus)),
+                      np.concatenate((bounds_plus, bounds_minus[1:] + rows_plus.size)))
+
+
 def search_attc(attc_df, keep_palindromes, dist_threshold, replicon_size):
     """
     Parse the attc data set (sorted along start site) for the given replicon and return list of arrays.
@@ -48,80 +190,20 @@ def search_attc(attc_df, keep_palindromes, dist_threshold, replicon_size):
     :return: a list attC sites found on replicon
     :rtype: list of :class:`pandas.DataFrame` objects
     """
-    ok = False
-
-    position_bkp_minus = []
-    position_bkp_plus = []
-
-    attc_plus = attc_df[attc_df.sens == "+"].copy()
-    attc_minus = attc_df[attc_df.sens == "-"].copy()
-
-    if not keep_palindromes:
-        attc_df = attc_df.sort_values(["pos_beg", "evalue"]).drop_duplicates(subset=["pos_beg"]).copy()
-        attc_plus = attc_df[attc_df.sens == "+"].copy()
-        attc_minus = attc_df[attc_df.sens == "-"].copy()
-
-    # can be reordered
-    if (attc_plus.pos_beg.diff() > dist_threshold).any() or (attc_minus.pos_beg.diff() > dist_threshold).any():
-        if not attc_plus.empty:
-            bkp_plus = attc_plus[attc_plus.pos_beg.diff() > dist_threshold].index
-            position_bkp_plus = [attc_plus.index.get_loc(i) for i in bkp_plus]
-        if not attc_minus.empty:
-            bkp_minus = attc_minus[(attc_minus.pos_beg.diff() > dist_threshold)].index
-            position_bkp_minus = [attc_minus.index.get_loc(i) for i in bkp_minus]
-        ok = True
-    if not attc_plus.empty and not attc_minus.empty:
-        ok = True
-
-    if not ok:
-        if attc_df.empty:
-            attc_array = []
-        else:
-            attc_array = [attc_df]
-    else:
-        if attc_plus.empty:
-            array_plus = []
-        else:
-            array_plus = np.split(attc_plus.values, position_bkp_plus)
-            # array_plus is a list of np.array
-            first_pos_beg = array_plus[0][0][4]
-            last_pos_beg = array_plus[-1][-1][4]
-            if len(array_plus) > 1 and (first_pos_beg - last_pos_beg) % replicon_size < dist_threshold:
-                array_plus[0] = np.concatenate((array_plus[-1], array_plus[0]))
-                del array_plus[-1]
-
-        if attc_minus.empty:
-            array_minus = []
-        else:
-            array_minus = np.split(attc_minus.values, position_bkp_minus)
-            # array_minus is a list of np.array
-            first_pos_beg = array_minus[0][0][4]
-            last_pos_beg = array_minus[-1][-1][4]
-            if len(array_minus) > 1 and (first_pos_beg - last_pos_beg) % replicon_size < dist_threshold:
-                array_minus[0] = np.concatenate((array_minus[-1], array_minus[0]))
-                del array_minus[-1]
-
-        tmp = array_plus + array_minus
-
-        attc_array = [pd.DataFrame(i, columns=["Accession_number", "cm_attC", "cm_debut",
-                                               "cm_fin", "pos_beg", "pos_end", "sens", "evalue"]) for i in tmp]
-        # convert positions to int, and evalue to float
-        intcols = ["cm_debut", "cm_fin", "pos_beg", "pos_end"]
-        for a in attc_array:
-            a[intcols] = a[intcols].astype(int)
-            a["evalue"] = a["evalue"].astype(float)
-    return attc_array
+    return list(cluster_attc(attc_df, keep_palindromes, dist_threshold, replicon_size))
 
 
 def find_attc_max(integrons, replicon, distance_threshold,
                   model_attc_path,
                   max_attc_size, min_attc_size,
                   evalue_attc=1.,
-                  circular=True, out_dir='.', cpu=1):
+                  circular=True, out_dir='.', cpu=1, cmsearch_stdin=False, merge_windows=False, cache=None):
     """
     Look for attC site with cmsearch --max option which remove all heuristic filters.
     As this option make the algorithm way slower, we only run it in the region around a
     hit. We call it local_max or eagle_eyes.
+    The windows around all the integrons are searched together, round after round,
+    with one cmsearch run per round and strand (see :func:`infernal.local_max_windows`).
 
     **Default hit**
     ::
@@ -151,8 +233,14 @@ def find_attc_max(integrons, replicon, distance_threshold,
     :param int min_attc_size: minimum value for the attC size.
     :param bool circular: True if replicon is circular, False otherwise.
     :param str out_dir: The directory where to write results
-                        used indirectly by some called functions as :func:`infernal.local_max` or `infernal.expand`.
+                        used indirectly by :func:`infernal.local_max_windows`.
     :param int cpu: call local_max with the right number of cpu
+    :param bool cmsearch_stdin: send the sequences to cmsearch through its standard input
+                                (see :func:`infernal.local_max_windows`)
+    :param bool merge_windows: merge the overlapping windows searched at the same round
+                               (see :func:`infernal.local_max_windows`)
+    :param cache: the cache of the cmsearch outputs, None to always run cmsearch.
+    :type cache: :class:`integron_finder.cache.ResultsCache` object
     :return:
     :rtype: :class:`pd.DataFrame` object
 
@@ -166,131 +254,177 @@ def find_attc_max(integrons, replicon, distance_threshold,
                  }
     max_final = pd.DataFrame(columns=columns)
 
-    for i in integrons:
-        max_elt = pd.DataFrame(columns=columns)
-        max_elt = max_elt.astype(dtype=data_type)
-        full_element = i.describe()  # dataframe
-
-        if all(full_element.type == "complete"):
-            # Where is the integrase compared to the attc sites (no matter the strand) :
-            integrase_is_left = ((full_element[full_element.type_elt == "attC"].pos_beg.values[0] -
-                                  full_element[full_element.annotation == "intI"].pos_end.values[0]) % size_replicon <
-                                 (full_element[full_element.annotation == "intI"].pos_beg.values[0] -
-                                  full_element[full_element.type_elt == "attC"].pos_end.values[-1]) % size_replicon)
-
-            if integrase_is_left:
-                window_beg = full_element[full_element.annotation == "intI"].pos_end.values[0]
-                distance_threshold_left = 0
-                window_end = full_element[full_element.type_elt == "attC"].pos_end.values[-1]
-                distance_threshold_right = distance_threshold
-
-            else:  # is right
-                window_beg = full_element[full_element.type_elt == "attC"].pos_beg.values[0]
-                distance_threshold_left = distance_threshold
-                window_end = full_element[full_element.annotation == "intI"].pos_end.values[-1]
-                distance_threshold_right = 0
-
-            if circular:
-                window_beg = (window_beg - distance_threshold_left) % size_replicon
-                window_end = (window_end + distance_threshold_right) % size_replicon
+    # the search of each integron is a generator which yields the windows to search,
+    # at each round the windows of all integrons are searched together
+    full_elements = [i.describe() for i in integrons]
+    searches = [_integron_max_search(full_element, size_replicon, distance_threshold,
+                                     circular, max_attc_size, columns, data_type)
+                for full_element in full_elements]
+    max_elts = [None] * len(searches)
+    # the windows searched, in the order of the search
+    searched = {}
+    pending = {}
+
+    def start(idx):
+        try:
+            pending[idx] = next(searches[idx])
+        except StopIteration as stop:
+            max_elts[idx] = stop.value
+
+    # a CALIN is not searched if it overlaps a region already max-searched for a previous integron
+    # so its search starts only when the searches of all previous integrons are finished
+    waiting_calins = []
+    for idx, full_element in enumerate(full_elements):
+        if all(full_element.type == "CALIN"):
+            waiting_calins.append(idx)
+        else:
+            start(idx)
+    while pending or waiting_calins:
+        while waiting_calins and all(max_elt is not None for max_elt in max_elts[:waiting_calins[0]]):
+            idx = waiting_calins.pop(0)
+            full_element = full_elements[idx]
+            previous_pos_beg = np.concatenate([np.array([], dtype=int)] +
+                                              [max_elt.pos_beg.values for max_elt in max_elts[:idx]])
+            if full_element[full_element.pos_beg.isin(previous_pos_beg)].empty:
+                start(idx)
             else:
-                window_beg = max(0, window_beg - distance_threshold_left)
-                window_end = min(size_replicon, window_end + distance_threshold_right)
-
-            strand = "top" if full_element[full_element.type_elt == "attC"].strand.values[0] == 1 else "bottom"
-            df_max = local_max(replicon, window_beg, window_end, model_attc_path,
-                               strand_search=strand, out_dir=out_dir,
-                               cpu_nb=cpu,
-                               evalue_attc=evalue_attc,
-                               max_attc_size=max_attc_size,
-                               min_attc_size=min_attc_size,)
-            max_elt = pd.concat([max_elt, df_max])
-
-            # If we find new attC after the last found with default algo and if the integrase is on the left
-            # (We don't expand over the integrase) :
-            # pos_beg - pos_end so it's the same, the distance will always be > distance_threshold
-
-            go_left = (full_element[full_element.type_elt == "attC"].pos_beg.values[0] - df_max.pos_end.values[0]
-                       ) % size_replicon < distance_threshold and not integrase_is_left
-            go_right = (df_max.pos_beg.values[-1] - full_element[full_element.type_elt == "attC"].pos_end.values[-1]
-                        ) % size_replicon < distance_threshold and integrase_is_left
-            max_elt = expand(replicon,
-                             window_beg, window_end, max_elt, df_max,
-                             circular, distance_threshold,
-                             model_attc_path,
-                             max_attc_size=max_attc_size,
-                             min_attc_size=min_attc_size,
-                             evalue_attc=evalue_attc,
-                             search_left=go_left, search_right=go_right,
-                             out_dir=out_dir, cpu=cpu)
-
-        elif all(full_element.type == "CALIN"):
-            if full_element[full_element.pos_beg.isin(max_final.pos_beg)].empty:
-                # if cluster don't overlap already max-searched region
-                window_beg = full_element[full_element.type_elt == "attC"].pos_beg.values[0]
-                window_end = full_element[full_element.type_elt == "attC"].pos_end.values[-1]
-                if circular:
-                    window_beg = (window_beg - distance_threshold) % size_replicon
-                    window_end = (window_end + distance_threshold) % size_replicon
-                else:
-                    window_beg = max(0, window_beg - distance_threshold)
-                    window_end = min(size_replicon, window_end + distance_threshold)
-                strand = "top" if full_element[full_element.type_elt == "attC"].strand.values[0] == 1 else "bottom"
-                df_max = local_max(replicon, window_beg, window_end,
-                                   model_attc_path,
-                                   strand_search=strand,
-                                   out_dir=out_dir, cpu_nb=cpu,
-                                   evalue_attc=evalue_attc,
-                                   max_attc_size=max_attc_size,
-                                   min_attc_size=min_attc_size,)
-                max_elt = pd.concat([max_elt, df_max])
-
-                if not df_max.empty:  # Max can sometimes find bigger attC than permitted
-                    go_left = (full_element[full_element.type_elt == "attC"].pos_beg.values[0] - df_max.pos_end.values[0]
-                               ) % size_replicon < distance_threshold
-                    go_right = (df_max.pos_beg.values[-1] - full_element[full_element.type_elt == "attC"].pos_end.values[-1]
-                                ) % size_replicon < distance_threshold
-                    max_elt = expand(replicon,
-                                     window_beg, window_end, max_elt, df_max,
-                                     circular, distance_threshold,
-                                     model_attc_path,
-                                     max_attc_size=max_attc_size,
-                                     min_attc_size=min_attc_size,
-                                     evalue_attc=evalue_attc,
-                                     search_left=go_left, search_right=go_right,
-                                     out_dir=out_dir, cpu=cpu)
-
-        elif all(full_element.type == "In0"):
-            if all(full_element.model != "Phage_integrase"):
-                window_beg = full_element[full_element.annotation == "intI"].pos_beg.values[0]
-                window_end = full_element[full_element.annotation == "intI"].pos_end.values[-1]
-                if circular:
-                    window_beg = (window_beg - distance_threshold) % size_replicon
-                    window_end = (window_end + distance_threshold) % size_replicon
-                else:
-                    window_beg = max(0, window_beg - distance_threshold)
-                    window_end = min(size_replicon, window_end + distance_threshold)
-                df_max = local_max(replicon,
-                                   window_beg, window_end,
-                                   model_attc_path,
-                                   out_dir=out_dir, cpu_nb=cpu,
-                                   evalue_attc=evalue_attc,
-                                   max_attc_size=max_attc_size,
-                                   min_attc_size=min_attc_size)
-                max_elt = pd.concat([max_elt, df_max])
-                if not max_elt.empty:
-                    max_elt = expand(replicon,
-                                     window_beg, window_end, max_elt, df_max,
-                                     circular, distance_threshold,
-                                     model_attc_path,
-                                     max_attc_size=max_attc_size,
-                                     min_attc_size=min_attc_size,
-                                     evalue_attc=evalue_attc,
-                                     search_left=True, search_right=True,
-                                     out_dir=out_dir, cpu=cpu)
-
+                max_elts[idx] = pd.DataFrame(columns=columns).astype(dtype=data_type)
+        if not pending:
+            continue
+        idxs = list(pending)
+        searched.update((window, None) for window in pending.values())
+        dfs_max = local_max_windows(replicon, [pending[idx] for idx in idxs],
+                                    model_attc_path,
+                                    evalue_attc=evalue_attc,
+                                    max_attc_size=max_attc_size,
+                                    min_attc_size=min_attc_size,
+                                    out_dir=out_dir,
+                                    cpu_nb=cpu,
+                                    stdin=cmsearch_stdin,
+                                    merge=merge_windows,
+                                    cache=cache)
+        pending = {}
+        for idx, df_max in zip(idxs, dfs_max):
+            try:
+                pending[idx] = searches[idx].send(df_max)
+            except StopIteration as stop:
+                max_elts[idx] = stop.value
+
+    merge_window_stores(replicon.id, list(searched), out_dir)
+
+    for max_elt in max_elts:
         max_final = pd.concat([max_final, max_elt])
         max_final.drop_duplicates(subset=max_final.columns[:-1], inplace=True)
         max_final.index = list(range(len(max_final)))
     max_final = max_final.astype(dtype=data_type)
     return max_final
+
+
+def _integron_max_search(full_element, size_replicon, distance_threshold,
+                         circular, max_attc_size, columns, data_type):
+    """
+    The local_max search around one integron (see :func:`find_attc_max`).
+    The generator yields the windows to search (window_beg, window_end, strand_search)
+    and must be sent the attC sites found in each window.
+
+    :param full_element: the description of the integron
+    :type full_element: :class:`pandas.DataFrame` object
+    :param int size_replicon: the size of the replicon where the integron was found.
+    :param int distance_threshold: the maximal distance between 2 elements to aggregate them.
+    :param bool circular: True if replicon is circular, False otherwise.
+    :param int max_attc_size: maximum value for the attC size.
+    :param columns: the columns of the attC sites DataFrame
+    :param dict data_type: the type of each column of the attC sites DataFrame
+    :return: a generator which returns the attC sites found around the integron
+    """
+    max_elt = pd.DataFrame(columns=columns)
+    max_elt = max_elt.astype(dtype=data_type)
+
+    if all(full_element.type == "complete"):
+        # Where is the integrase compared to the attc sites (no matter the strand) :
+        integrase_is_left = ((full_element[full_element.type_elt == "attC"].pos_beg.values[0] -
+                              full_element[full_element.annotation == "intI"].pos_end.values[0]) % size_replicon <
+                             (full_element[full_element.annotation == "intI"].pos_beg.values[0] -
+                              full_element[full_element.type_elt == "attC"].pos_end.values[-1]) % size_replicon)
+
+        if integrase_is_left:
+            window_beg = full_element[full_element.annotation == "intI"].pos_end.values[0]
+            distance_threshold_left = 0
+            window_end = full_element[full_element.type_elt == "attC"].pos_end.values[-1]
+            distance_threshold_right = distance_threshold
+
+        else:  # is right
+            window_beg = full_element[full_element.type_elt == "attC"].pos_beg.values[0]
+            distance_threshold_left = distance_threshold
+            window_end = full_element[full_element.annotation == "intI"].pos_end.values[-1]
+            distance_threshold_right = 0
+
+        if circular:
+            window_beg = (window_beg - distance_threshold_left) % size_replicon
+            window_end = (window_end + distance_threshold_right) % size_replicon
+        else:
+            window_beg = max(0, window_beg - distance_threshold_left)
+            window_end = min(size_replicon, window_end + distance_threshold_right)
+
+        strand = "top" if full_element[full_element.type_elt == "attC"].strand.values[0] == 1 else "bottom"
+        df_max = yield window_beg, window_end, strand
+        max_elt = pd.concat([max_elt, df_max])
+
+        # If we find new attC after the last found with default algo and if the integrase is on the left
+        # (We don't expand over the integrase) :
+        # pos_beg - pos_end so it's the same, the distance will always be > distance_threshold
+
+        go_left = (full_element[full_element.type_elt == "attC"].pos_beg.values[0] - df_max.pos_end.values[0]
+                   ) % size_replicon < distance_threshold and not integrase_is_left
+        go_right = (df_max.pos_beg.values[-1] - full_element[full_element.type_elt == "attC"].pos_end.values[-1]
+                    ) % size_replicon < distance_threshold and integrase_is_left
+        max_elt = yield from expand_windows(size_replicon,
+                                            window_beg, window_end, max_elt, df_max,
+                                            circular, distance_threshold,
+                                            max_attc_size=max_attc_size,
+                                            search_left=go_left, search_right=go_right)
+
+    elif all(full_element.type == "CALIN"):
+        # find_attc_max does not start the search if the cluster overlaps an already max-searched region
+        window_beg = full_element[full_element.type_elt == "attC"].pos_beg.values[0]
+        window_end = full_element[full_element.type_elt == "attC"].pos_end.values[-1]
+        if circular:
+            window_beg = (window_beg - distance_threshold) % size_replicon
+            window_end = (window_end + distance_threshold) % size_replicon
+        else:
+            window_beg = max(0, window_beg - distance_threshold)
+            window_end = min(size_replicon, window_end + distance_threshold)
+        strand = "top" if full_element[full_element.type_elt == "attC"].strand.values[0] == 1 else "bottom"
+        df_max = yield window_beg, window_end, strand
+        max_elt = pd.concat([max_elt, df_max])
+
+        if not df_max.empty:  # Max can sometimes find bigger attC than permitted
+            go_left = (full_element[full_element.type_elt == "attC"].pos_beg.values[0] - df_max.pos_end.values[0]
+                       ) % size_replicon < distance_threshold
+            go_right = (df_max.pos_beg.values[-1] - full_element[full_element.type_elt == "attC"].pos_end.values[-1]
+                        ) % size_replicon < distance_threshold
+            max_elt = yield from expand_windows(size_replicon,
+                                                window_beg, window_end, max_elt, df_max,
+                                                circular, distance_threshold,
+                                                max_attc_size=max_attc_size,
+                                                search_left=go_left, search_right=go_right)
+
+    elif all(full_element.type == "In0"):
+        if all(full_element.model != "Phage_integrase"):
+            window_beg = full_element[full_element.annotation == "intI"].pos_beg.values[0]
+            window_end = full_element[full_element.annotation == "intI"].pos_end.values[-1]
+            if circular:
+                window_beg = (window_beg - distance_threshold) % size_replicon
+                window_end = (window_end + distance_threshold) % size_replicon
+            else:
+                window_beg = max(0, window_beg - distance_threshold)
+                window_end = min(size_replicon, window_end + distance_threshold)
+            df_max = yield window_beg, window_end, "both"
+            max_elt = pd.concat([max_elt, df_max])
+            if not max_elt.empty:
+                max_elt = yield from expand_windows(size_replicon,
+                                                    window_beg, window_end, max_elt, df_max,
+                                                    circular, distance_threshold,
+                                                    max_attc_size=max_attc_size,
+                                                    search_left=True, search_right=True)
+    return max_elt
@@ -0,0 +1,265 @@
+# -*- coding: utf-8 -*-
+
+####################################################################################
+# Integron_Finder - Integron Finder aims at detecting integrons in DNA sequences   #
+# by finding particular features of the integron:                                  #
+#   - the attC sites                                                               #
+#   - the integrase                                                                #
+#   - and when possible attI site and promoters.                                   #
+#                                                                                  #
+# Authors: Jean Cury, Bertrand Neron, Eduardo PC Rocha                             #
+# Copyright (c) 2015 - 2018  Institut Pasteur, Paris and CNRS.                     #
+# See the COPYRIGHT file for details                                               #
+#                                                                                  #
+# integron_finder is free software: you can redistribute it and/or modify          #
+# it under the terms of the GNU General Public License as published by             #
+# the Free Software Foundation, either version 3 of the License, or                #
+# (at your option) any later version.                                              #
+#                                                                                  #
+# integron_finder is distributed in the hope that it will be useful,               #
+# but WITHOUT ANY WARRANTY; without even the implied warranty of                   #
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the                    #
+# GNU General Public License for more details.                                     #
+#                                                                                  #
+# You should have received a copy of the GNU General Public License                #
+# along with this program (COPYING file).                                          #
+# If not, see <http://www.gnu.org/licenses/>.                                      #
+####################################################################################
+
+
+import os
+import shutil
+import hashlib
+import tempfile
+import functools
+import subprocess
+
+import colorlog
+
+from . import timing
+
+_log = colorlog.getLogger(__name__)
+
+
+class ResultsCache:
+    """
+    A persistent cache of the outputs of the external tools (cmsearch, hmmsearch, prodigal),
+    shared by all the runs of integron_finder using the same cache directory.
+
+    The outputs of a command are stored in <cache_dir>/<key[:2]>/<key>/
+    where key is computed by :func:`command_key` from the content of the command inputs,
+    the version of the tool and its options. So a command is run only once for a given sequence
+    and model whatever the name of the input and output files.
+    Each time an entry is used its modification time is updated, when the size of the cache
+    exceeds max_size, the least recently used entries are removed.
+    """
+
+    def __init__(self, cache_dir, max_size=None):
+        """
+        :param str cache_dir: the path to the directory where the entries are stored.
+        :param int max_size: the maximum size of the cache in bytes. None for no limit.
+        """
+        self.cache_dir = os.path.abspath(cache_dir)
+        self.max_size = max_size
+
+    def _entry_path(self, key):
+        return os.path.join(self.cache_dir, key[:2], key)
+
+    def get(self, key, outputs):
+        """
+        Copy the outputs stored under key to the paths of the outputs.
+
+        :param str key: the entry key
+        :param outputs: the paths where to copy the outputs, in the order they were stored.
+        :type outputs: list of str
+        :return: True if the entry exists and the outputs have been copied, False otherwise.
+        :rtype: bool
+        """
+        entry = self._entry_path(key)
+        stored = [os.path.join(entry, "out{}".format(idx)) for idx in range(len(outputs))]
+        if not all(os.path.isfile(path) for path in stored):
+            return False
+        try:
+            for stored_path, output in zip(stored, outputs):
+                shutil.copyfile(stored_path, output)
+            os.utime(entry)
+        except OSError as err:
+            # the entry may have been evicted by another run meanwhile
+            _log.debug("cannot get cache entry {}: {}".format(key, err))
+            return False
+        return True
+
+    def put(self, key, outputs):
+        """
+        Store the outputs under key, then remove the least recently used entries
+        if the cache is larger than max_size.
+
+        :param str key: the entry key
+        :param outputs: the paths of the outputs to store
+        :type outputs: list of str
+        """
+        entry = self._entry_path(key)
+        if os.path.exists(entry):
+            return
+        os.makedirs(os.path.dirname(entry), exist_ok=True)
+        # several runs can share the cache
+        # so the entry is written in a temporary directory then renamed
+        tmp_entry = tempfile.mkdtemp(dir=os.path.dirname(entry), prefix='.tmp_')
+        try:
+            for idx, output in enumerate(outputs):
+                shutil.copyfile(output, os.path.join(tmp_entry, "out{}".format(idx)))
+            os.rename(tmp_entry, entry)
+        except OSError as err:
+            _log.debug("cannot put cache entry {}: {}".format(key, err))
+            shutil.rmtree(tmp_entry, ignore_errors=True)
+            return
+        if self.max_size is not None:
+            self.evict()
+
+    def entries(self):
+        """
+        :return: the entries of the cache: (modification time, size in bytes, path)
+        :rtype: list of tuple (float, int, str)
+        """
+        entries = []
+        if not os.path.isdir(self.cache_dir):
+            return entries
+        for prefix in os.scandir(self.cache_dir):
+            if not prefix.is_dir():
+                continue
+            for entry in os.scandir(prefix.path):
+                if entry.name.startswith('.tmp_') or not entry.is_dir():
+                    continue
+                try:
+                    size = sum(f.stat().st_size for f in os.scandir(entry.path))
+                    entries.append((entry.stat().st_mtime, size, entry.path))
+                except OSError:
+                    # removed by another run
+                    continue
+        return entries
+
+    def evict(self):
+        """
+        Remove the least recently used entries until the size of the cache is lower than max_size.
+        """
+        entries = self.entries()
+        cache_size = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if cache_size <= self.max_size:
+                break
+            _log.debug("evict cache entry {}".format(path))
+            shutil.rmtree(path, ignore_errors=True)
+            cache_size -= size
+
+
+@functools.lru_cache(maxsize=None)
+def tool_version(binary, option='-h'):
+    """
+    :param str binary: the path to the tool
+    :param str option: the option to display the tool version
+    :return: the output of the tool called with option, an empty string if the tool cannot be run.
+    :rtype: str
+    """
+    try:
+        proc = subprocess.run([binary, option], stdout=subprocess.PIPE, stderr=subprocess.STDOUT, timeout=60)
+    except Exception as err:
+        _log.debug("cannot get {} version: {}".format(binary, err))
+        return ''
+    return proc.stdout.decode(errors='replace')
+
+
+@functools.lru_cache(maxsize=None)
+def _digest(path, size, mtime):
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+def file_digest(path):
+    """
+    :param str path: the path to a file
+    :return: the sha256 of the file content, computed once per file version.
+    :rtype: str
+    """
+    stat = os.stat(path)
+    return _digest(os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+
+
+def command_key(cmd, inputs=(), outputs=(), stdin=None, version=''):
+    """
+    Compute the key of a command, independent of the input and output file names
+    and of the number of cpu.
+
+    :param cmd: the command line
+    :type cmd: list of str
+    :param inputs: the paths of the input files of the command (sequences, models)
+                   they are replaced by their content digest
+    :type inputs: list of str
+    :param outputs: the paths of the output files of the command
+                    they are replaced by their index
+    :type outputs: list of str
+    :param bytes stdin: the data sent to the command standard input
+    :param str version: the version of the tool
+    :return: the key of the command
+    :rtype: str
+    """
+    digests = {path: file_digest(path) for path in inputs}
+    out_idx = {path: idx for idx, path in enumerate(outputs)}
+    args = []
+    skip = False
+    for arg in cmd[1:]:
+        if skip:
+            skip = False
+        elif arg == '--cpu':
+            # the results do not depend on the number of cpu
+            skip = True
+        elif arg in digests:
+            args.append("in:" + digests[arg])
+        elif arg in out_idx:
+            args.append("out:{}".format(out_idx[arg]))
+        else:
+            args.append(arg)
+    sha = hashlib.sha256()
+    sha.update(os.path.basename(cmd[0]).encode())
+    sha.update(b'\0')
+    sha.update(version.encode())
+    for arg in args:
+        sha.update(b'\0')
+        sha.update(arg.encode())
+    if stdin is not None:
+        sha.update(b'\0stdin:')
+        sha.update(hashlib.sha256(stdin).hexdigest().encode())
+    return sha.hexdigest()
+
+
+def cached_run(cache, cmd, inputs, outputs, run, stdin=None, version_option='-h'):
+    """
+    Get the outputs of a command from the cache, or run it and store its outputs in the cache.
+
+    :param cache: the cache to use, if None the command is always run.
+    :type cache: :class:`ResultsCache` object or None
+    :param cmd: the command line
+    :type cmd: list of str
+    :param inputs: the paths of the input files of the command
+    :type inputs: list of str
+    :param outputs: the paths of the output files of the command
+    :type outputs: list of str
+    :param run: the function which run the command (without argument)
+    :param bytes stdin: the data sent to the command standard input
+    :param str version_option: the option to get the version of the tool
+    """
+    tool = os.path.basename(cmd[0])
+    if cache is None:
+        with timing.stage(tool, outputs=outputs):
+            run()
+        return
+    key = command_key(cmd, inputs=inputs, outputs=outputs, stdin=stdin,
+                      version=tool_version(cmd[0], version_option))
+    if cache.get(key, outputs):
+        _log.debug("{} outputs found in cache: {}".format(tool, key))
+        return
+    with timing.stage(tool, outputs=outputs):
+        run()
+    cache.put(key, outputs)
@@ -27,9 +27,12 @@
 ####################################################################################
 
 import os
+import json
+import hashlib
 
 from . import utils
 from . import __INTEGRON_DATA__
+from .cache import ResultsCache, file_digest
 
 
 class Config:
@@ -47,6 +50,10 @@ class Config:
             self._prefix_data = os.path.join(__INTEGRON_DATA__, 'data')
 
     def __getattr__(self, item):
+        if item == '_args':
+            # _args is not set yet, for instance when the config is unpickled
+            # in a worker process, avoid an infinite recursion
+            raise AttributeError("config object has no attribute '{}'".format(item))
         try:
             attr = getattr(self._args, item)
             return attr
@@ -81,6 +88,74 @@ class Config:
         """The absolute path of the tmp results dir."""
         return os.path.join(self.result_dir, 'tmp_{}'.format(replicon_id))
 
+    def hits_path(self, replicon_id):
+        """The absolute path of the directory where the hits of the search phase are stored."""
+        return os.path.join(self.tmp_dir(replicon_id), '{}_hits'.format(replicon_id))
+
+    @property
+    def journal_path(self):
+        """The absolute path of the journal of the run (see :class:`integron_finder.journal.RunJournal`)."""
+        return os.path.join(self.result_dir, 'integron_finder.journal')
+
+    @property
+    def resume(self):
+        """
+        :return: True if the replicons already analysed by a previous run must be skipped, False otherwise.
+        :rtype: bool
+        """
+        try:
+            return bool(self._args.resume)
+        except AttributeError:
+            return False
+
+    @property
+    def fingerprint(self):
+        """
+        :return: a digest of the input file content and of the options which change the results of each replicon
+                 (the options which only change the resources used or the logs are ignored).
+        :rtype: str
+        """
+        # the phase is not ignored, as only the search phase stores the hits used by the reanalyze phase
+        ignored = ('cpu', 'jobs', 'mute', 'verbose', 'quiet', 'keep_tmp', 'resume',
+                   'cache_dir', 'cache_max_size', 'outdir', 'split_results', 'timings')
+        params = {name: value for name, value in vars(self._args).items() if name not in ignored}
+        params['replicon'] = self.input_seq_path
+        params['replicon_digest'] = file_digest(self.input_seq_path) if os.path.exists(self.input_seq_path) else None
+        return hashlib.sha256(json.dumps(params, sort_keys=True, default=str).encode()).hexdigest()
+
+    @property
+    def timings(self):
+        """
+        :return: True if the resources used by each stage of the analysis must be recorded, False otherwise.
+        :rtype: bool
+        """
+        try:
+            return bool(self._args.timings)
+        except AttributeError:
+            return False
+
+    @property
+    def timings_path(self):
+        """The absolute path of the file where the timings are recorded
+        (see :mod:`integron_finder.timing`), None if the timings are not recorded."""
+        return os.path.join(self.result_dir, 'timings.tsv') if self.timings else None
+
+    @property
+    def timings_summary_path(self):
+        """The absolute path of the summary of the timings in json format."""
+        return os.path.join(self.result_dir, 'timings.json')
+
+    @property
+    def phase(self):
+        """
+        :return: the phase of the analysis: 'all' (default), 'search' or 'reanalyze'
+        :rtype: str
+        """
+        try:
+            return self._args.phase or 'all'
+        except AttributeError:
+            return 'all'
+
     @property
     def default_topology(self):
         """The default topology
@@ -95,6 +170,106 @@ class Config:
         except AttributeError:
             return None
 
+    @property
+    def hmm_domtblout(self):
+        """
+        :return: True if hmmsearch must report the hits in domain tabular format (--domtblout)
+                 instead of the text output, False otherwise.
+        :rtype: bool
+        """
+        try:
+            return bool(self._args.hmm_domtblout)
+        except AttributeError:
+            return False
+
+    @property
+    def combined_integrase_search(self):
+        """
+        :return: True if the integrase and phage integrase profiles must be searched
+                 with one hmmsearch run, False otherwise.
+        :rtype: bool
+        """
+        try:
+            return bool(self._args.combined_integrase_search)
+        except AttributeError:
+            return False
+
+    @property
+    def cmsearch_stdin(self):
+        """
+        :return: True if the sequences must be sent to cmsearch through its standard input
+                 instead of being written in the tmp dir, False otherwise.
+        :rtype: bool
+        """
+        try:
+            return bool(self._args.cmsearch_stdin)
+        except AttributeError:
+            return False
+
+    @property
+    def local_max_merge_windows(self):
+        """
+        :return: True if the overlapping windows searched by local_max must be merged, False otherwise.
+        :rtype: bool
+        """
+        try:
+            return bool(self._args.local_max_merge_windows)
+        except AttributeError:
+            return False
+
+    @property
+    def batch_integrase_search(self):
+        """
+        :return: True if the integrases of all replicons must be searched in one step
+                 before analysing each replicon, False otherwise.
+        :rtype: bool
+        """
+        try:
+            return bool(self._args.batch_integrase_search)
+        except AttributeError:
+            return False
+
+    @property
+    def batch_tmp_dir(self):
+        """The absolute path of the tmp results dir of the integrase search on all replicons
+        (see :func:`integron_finder.integrase.find_integrase_batch`)"""
+        return os.path.join(self.result_dir, 'tmp_batch_integrase')
+
+    @property
+    def cache_dir(self):
+        """
+        :return: The absolute path to the directory where the outputs of cmsearch, hmmsearch and prodigal
+                 are cached across runs, None if the cache is disabled.
+        :rtype: str
+        """
+        try:
+            cache_dir = self._args.cache_dir
+        except AttributeError:
+            return None
+        return os.path.abspath(cache_dir) if cache_dir else None
+
+    @property
+    def cache_max_size(self):
+        """
+        :return: The maximum size of the cache in bytes, None for no limit.
+        :rtype: int
+        """
+        try:
+            max_size = self._args.cache_max_size
+        except AttributeError:
+            return None
+        return int(max_size * 1024 * 1024) if max_size else None
+
+    @property
+    def cache(self):
+        """
+        :return: the cache of the tools outputs, None if the cache is disabled.
+        :rtype: :class:`integron_finder.cache.ResultsCache` object
+        """
+        if self.cache_dir is None:
+            return None
+        return ResultsCache(self.cache_dir, max_size=self.cache_max_size)
+
     @property
     def model_dir(self):
         """The absolute path to the directory containing the models"""
@@ -110,6 +285,12 @@ class Config:
         """The absolute path to the phage-integrase model file"""
         return os.path.join(self.model_dir, "phage-int.hmm")
 
+    @property
+    def model_integrases(self):
+        """The absolute path to the file containing both integrase and phage-integrase models
+        (built by :func:`integron_finder.integrase.integrase_models`)"""
+        return os.path.join(self.result_dir, "integrase_models.hmm")
+
     @property
     def model_attc_path(self):
         """The absolute path to the attC model file"""
@@ -0,0 +1,256 @@
+# -*- coding: utf-8 -*-
+
+####################################################################################
+# Integron_Finder - Integron Finder aims at detecting integrons in DNA sequences   #
+# by finding particular features of the integron:                                  #
+#   - the attC sites                                                               #
+#   - the integrase                                                                #
+#   - and when possible attI site and promoters.                                   #
+#                                                                                  #
+# Authors: Jean Cury, Bertrand Neron, Eduardo PC Rocha                             #
+# Copyright (c) 2015 - 2018  Institut Pasteur, Paris and CNRS.                     #
+# See the COPYRIGHT file for details                                               #
+#                                                                                  #
+# integron_finder is free software: you can redistribute it and/or modify          #
+# it under the terms of the GNU General Public License as published by             #
+# the Free Software Foundation, either version 3 of the License, or                #
+# (at your option) any later version.                                              #
+#                                                                                  #
+# integron_finder is distributed in the hope that it will be useful,               #
+# but WITHOUT ANY WARRANTY; without even the implied warranty of                   #
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the                    #
+# GNU General Public License for more details.                                     #
+#                                                                                  #
+# You should have received a copy of the GNU General Public License                #
+# along with this program (COPYING file).                                          #
+# If not, see <http://www.gnu.org/licenses/>.                                      #
+####################################################################################
+
+
+import os
+import json
+import shutil
+
+import colorlog
+import numpy as np
+import pandas as pd
+
+from . import IntegronError
+
+_log = colorlog.getLogger(__name__)
+
+"""
+The version of the layout of the hits stores, it must be incremented at each incompatible change.
+"""
+SCHEMA_VERSION = 1
+
+"""
+The name of the file describing a store
+"""
+SCHEMA_FILE = 'schema.json'
+
+
+def write_table(store_path, table, **meta):
+    """
+    Store a table of hits in a directory, column by column.
+
+    The layout of the directory is::
+
+        store_path/
+            schema.json   {"format": "table", "version": SCHEMA_VERSION, "rows": <number of rows>,
+                           "columns": [{"name": <column name>, "dtype": <numpy dtype>, "file": "<idx>.npy"}, ...],
+                           "meta": {...}}
+            0.npy         the values of the first column (numpy .npy format)
+            1.npy         ...
+
+    The string columns are stored as fixed size unicode arrays, so all columns can be memory-mapped.
+    The store is written in a temporary directory then renamed, so a store is always complete.
+
+    :param str store_path: the path of the directory to write
+    :param table: the hits to store
+    :type table: :class:`pandas.DataFrame` object
+    :param meta: the values describing how the hits were found (thresholds, model length, ...)
+    """
+    tmp_path = store_path + '.tmp'
+    if os.path.exists(tmp_path):
+        shutil.rmtree(tmp_path)
+    os.makedirs(tmp_path)
+    columns = []
+    for idx, col in enumerate(table.columns):
+        values = table[col].values
+        if values.dtype == object:
+            values = values.astype(str)
+        file_name = "{}.npy".format(idx)
+        np.save(os.path.join(tmp_path, file_name), values, allow_pickle=False)
+        columns.append({"name": col, "dtype": values.dtype.str, "file": file_name})
+    _write_schema(tmp_path, {"format": "table",
+                             "version": SCHEMA_VERSION,
+                             "rows": len(table),
+                             "columns": columns,
+                             "meta": meta})
+    _replace_dir(tmp_path, store_path)
+
+
+def read_schema(store_path, store_format='table'):
+    """
+    :param str store_path: the path of a store written by :func:`write_table` or :func:`save_hits`
+    :param str store_format: the expected format of the store 'table' or 'hits'
+    :return: the description of the store
+    :rtype: dict
+    :raise IntegronError: if the store does not exist, or has not the expected format or version
+    """
+    schema_path = os.path.join(store_path, SCHEMA_FILE)
+    if not os.path.exists(schema_path):
+        raise IntegronError("{} is not a hits store".format(store_path))
+    with open(schema_path) as schema_file:
+        schema = json.load(schema_file)
+    if schema.get("format") != store_format or schema.get("version") != SCHEMA_VERSION:
+        raise IntegronError("{} is a {} store version {}, expected a {} store version {}".format(
+            store_path, schema.get("format"), schema.get("version"), store_format, SCHEMA_VERSION))
+    return schema
+
+
+def read_columns(store_path, columns=None, mmap=True):
+    """
+    Read some columns of a store written by :func:`write_table`, without reading the other ones.
+
+    :param str store_path: the path of the store
+    :param columns: the names of the columns to read, None to read all columns.
+    :type columns: list of str
+    :param bool mmap: if True the columns are memory-mapped (read only) instead of being loaded in memory.
+    :return: the values of each column, in the order of *columns*
+    :rtype: dict {str column name: :class:`numpy.ndarray` object}
+    :raise KeyError: if a column is not in the store
+    """
+    schema = read_schema(store_path)
+    stored = {col["name"]: col for col in schema["columns"]}
+    if columns is None:
+        columns = [col["name"] for col in schema["columns"]]
+    arrays = {}
+    for col in columns:
+        if col not in stored:
+            raise KeyError("column '{}' is not in store {}".format(col, store_path))
+        values = np.load(os.path.join(store_path, stored[col]["file"]),
+                         mmap_mode='r' if mmap and schema["rows"] else None,
+                         allow_pickle=False)
+        arrays[col] = values
+    return arrays
+
+
+def read_table(store_path, columns=None):
+    """
+    :param str store_path: the path of a store written by :func:`write_table`
+    :param columns: the names of the columns to read, None to read all columns.
+    :type columns: list of str
+    :return: the hits stored, the string columns have the object dtype
+    :rtype: :class:`pandas.DataFrame` object
+    """
+    arrays = read_columns(store_path, columns=columns, mmap=False)
+    data = {col: values.astype(object) if values.dtype.kind == 'U' else values
+            for col, values in arrays.items()}
+    return pd.DataFrame(data, columns=list(arrays))
+
+
+def save_hits(hits_path, tables, **meta):
+    """
+    Store several tables of hits in a directory,
+    each table is stored in a sub directory by :func:`write_table`::
+
+        hits_path/
+            schema.json   {"format": "hits", "version": SCHEMA_VERSION, "tables": [<table name>, ...],
+                           "meta": {...}}
+            <table name>/ ...
+
+    :param str hits_path: the path of the directory to write
+    :param tables: the tables to store
+    :type tables: dict {str name: :class:`pandas.DataFrame` object}
+    :param meta: the values describing how the hits were found (thresholds, model length, ...)
+    """
+    tmp_path = hits_path + '.tmp'
+    if os.path.exists(tmp_path):
+        shutil.rmtree(tmp_path)
+    os.makedirs(tmp_path)
+    for name, table in tables.items():
+        write_table(os.path.join(tmp_path, name), table)
+    _write_schema(tmp_path, {"format": "hits",
+                             "version": SCHEMA_VERSION,
+                             "tables": list(tables),
+                             "meta": meta})
+    _replace_dir(tmp_path, hits_path)
+
+
+def load_hits(hits_path, tables=None):
+    """
+    :param str hits_path: the path of a directory written by :func:`save_hits`
+    :param tables: the names of the tables to read, None to read all tables.
+    :type tables: list of str
+    :return: the tables and the meta values stored
+    :rtype: tuple (dict {str name: :class:`pandas.DataFrame` object}, dict {str name: value})
+    """
+    schema = read_schema(hits_path, store_format='hits')
+    if tables is None:
+        tables = schema["tables"]
+    return ({name: read_table(os.path.join(hits_path, name)) for name in tables if name in schema["tables"]},
+            schema["meta"])
+
+
+def _write_schema(store_path, schema):
+    with open(os.path.join(store_path, SCHEMA_FILE), 'w') as schema_file:
+        json.dump(schema, schema_file, indent=2)
+
+
+def _replace_dir(src, dst):
+    """
+    Replace the directory dst by src
+    """
+    if os.path.exists(dst):
+        old = dst + '.old'
+        if os.path.exists(old):
+            shutil.rmtree(old)
+        os.rename(dst, old)
+        os.rename(src, dst)
+        shutil.rmtree(old)
+    else:
+        os.rename(src, dst)
+
+
+def filter_attc(attc, len_model_attc, evalue=1., size_max_attc=200, size_min_attc=40):
+    """
+    Filter the attC sites parsed by :func:`integron_finder.infernal.read_infernal` without thresholds,
+    as read_infernal would have done it.
+    The size of a hit is computed on the aligned part of the model (before extending the hit to the whole model).
+
+    :param attc: the attC sites
+    :type attc: :class:`pandas.DataFrame` object
+    :param int len_model_attc: the length of the attc model
+    :param float evalue: evalue threshold to filter out hits above it
+    :param int size_max_attc: The maximum value fot the attC size
+    :param int size_min_attc: The minimum value fot the attC size
+    :return: the attC sites kept
+    :rtype: :class:`pandas.DataFrame` object
+    """
+    size = (attc.pos_end - attc.pos_beg) - (attc.cm_debut - 1) - (len_model_attc - attc.cm_fin)
+    keep = (attc.evalue < evalue) & (size < size_max_attc) & (size_min_attc < size)
+    attc = attc[keep.astype(bool)].copy()
+    attc.index = list(range(len(attc)))
+    return attc
+
+
+def filter_attc_max(attc_max, evalue=1., size_max_attc=200, size_min_attc=40):
+    """
+    Filter the attC sites found with local_max (see :func:`integron_finder.attc.find_attc_max`)
+    with new thresholds.
+
+    :param attc_max: the attC sites
+    :type attc_max: :class:`pandas.DataFrame` object
+    :param float evalue: evalue threshold to filter out hits above it
+    :param int size_max_attc: The maximum value fot the attC size
+    :param int size_min_attc: The minimum value fot the attC size
+    :return: the attC sites kept
+    :rtype: :class:`pandas.DataFrame` object
+    """
+    size = abs(attc_max.pos_end - attc_max.pos_beg)
+    keep = (attc_max.evalue < evalue) & (size < size_max_attc) & (size_min_attc < size)
+    attc_max = attc_max[keep.astype(bool)].copy()
+    attc_max.index = list(range(len(attc_max)))
+    return attc_max
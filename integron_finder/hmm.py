@@ -93,15 +93,127 @@ def scan_hmm_bank(path):
         raise IOError("{} no such file or directory".format(path))
 
 
+def hmm_names(path):
+    """
+    :param str path: the path to a file of hmm profiles (in hmmer3 format)
+    :return: the names (NAME field) of the profiles in the order of the file
+    :rtype: list of str
+    """
+    names = []
+    with open(path) as hmm_file:
+        for line in hmm_file:
+            if line.startswith('NAME '):
+                names.append(line.split()[1])
+    return names
+
+
+def hmmsearch_output_options(hmm_out, cfg):
+    """
+    :param str hmm_out: the path of the hmmsearch output that will be parsed by :func:`read_hmm`
+    :param cfg: the config
+    :type cfg: :class:`integron_finder.config.Config` object.
+    :return: the hmmsearch options to write the hits in *hmm_out*.
+             If cfg.hmm_domtblout is True, *hmm_out* is in domain tabular format (--domtblout)
+             and the text output is written in <hmm_out without extension>.out only if cfg.keep_tmp is True.
+             Otherwise *hmm_out* is the text output.
+    :rtype: list of str
+    """
+    if cfg.hmm_domtblout:
+        text_out = os.path.splitext(hmm_out)[0] + '.out' if cfg.keep_tmp else os.devnull
+        return ["--domtblout", hmm_out, "-o", text_out]
+    else:
+        return ["-o", hmm_out]
+
+
+def hmm_sniffer(infile):
+    """
+    Detect the format of an hmmsearch output
+
+    :param str infile: the path to the hmmsearch output
+    :return: 'hmmer3-domtab' if infile is in domain tabular format (--domtblout) 'hmmer3-text' otherwise.
+    :rtype: str
+    """
+    with open(infile) as hmm_out:
+        line = hmm_out.readline()
+    if line.startswith('#') and '--- full sequence ---' in line:
+        return 'hmmer3-domtab'
+    else:
+        return 'hmmer3-text'
+
+
+def _parse_hmmer_text(infile):
+    """
+    Parse hmmsearch text output (-o) with :mod:`Bio.SearchIO`
+
+    :param str infile: the path to the hmmsearch output
+    :return: for each hit, the best domain (lowest i-evalue):
+             (query_name, query_accession, query_length, hit_id, i-evalue, hmmfrom, hmmto, alifrom, alito)
+    :rtype: generator of tuples
+    """
+    for query_result in SearchIO.parse(infile, 'hmmer3-text'):
+        len_profile = query_result.seq_len
+        query = query_result.id
+
+        try:
+            id_query = query_result.accession
+        except AttributeError:
+            id_query = "-"
+        for hit in query_result.hits:
+            # keep the domain with the best i-evalue
+            best_hsp = min(hit.hsps, key=lambda hsp: hsp.evalue)
+            yield (query, id_query, len_profile, hit.id,
+                   best_hsp.evalue,
+                   best_hsp.query_start + 1,
+                   best_hsp.query_end,
+                   best_hsp.hit_start + 1,
+                   best_hsp.hit_end)
+
+
+def _parse_domtblout(infile):
+    """
+    Parse hmmsearch domain tabular output (--domtblout).
+    Only the columns used by integron_finder are parsed:
+    target name(0), query name(3), query accession(4), qlen(5), i-Evalue(12),
+    hmm from(15), hmm to(16), ali from(17), ali to(18)
+
+    :param str infile: the path to the hmmsearch output
+    :return: for each hit, the best domain (lowest i-evalue):
+             (query_name, query_accession, query_length, hit_id, i-evalue, hmmfrom, hmmto, alifrom, alito)
+    :rtype: generator of tuples
+    """
+    best = None
+    with open(infile) as domtblout:
+        for line in domtblout:
+            if line.startswith('#'):
+                continue
+            fields = line.split(None, 22)
+            if len(fields) < 22:
+                continue
+            domain = (fields[3], fields[4], int(fields[5]), fields[0],
+                      float(fields[12]),
+                      int(fields[15]), int(fields[16]), int(fields[17]), int(fields[18]))
+            if best is not None and best[:4] == domain[:4]:
+                # an other domain of the same hit
+                if domain[4] < best[4]:
+                    best = domain
+            else:
+                if best is not None:
+                    yield best
+                best = domain
+    if best is not None:
+        yield best
+
+
 def read_hmm(replicon_id, prot_db, infile, cfg, evalue=1., coverage=0.5):
     """
     Function that parse hmmer --out output and returns a pandas DataFrame
     filter output by evalue and coverage. (Being % of the profile aligned)
+    The hmmer domain tabular output (--domtblout) is also supported, the format is detected automatically.
 
     :param str replicon_id: the id of the replicon
     :param prot_db: The protein database corresponding to the replicon translation
     :type prot_db: :class:`integron_finder.prot_db.ProteinDB` object.
-    :param str infile: the hmm output (in tabulated format) to parse
+    :param str infile: the hmm output (text or domain tabular format) to parse
     :param cfg: the config
     :type cfg: :class:`integron_finder.config.Config` object.
     :param float evalue: filter out hits with evalue greater tha evalue.
@@ -113,55 +225,36 @@ def read_hmm(replicon_id, prot_db, infile, cfg, evalue=1., coverage=0.5):
 
     :rtype: a :class:`pandas.DataFrame`
     """
-    df = pd.DataFrame(columns=["Accession_number", "query_name", "ID_query",
-                               "ID_prot", "strand", "pos_beg", "pos_end",
-                               "evalue", "hmmfrom", "hmmto", "alifrom",
-                               "alito", "len_profile"])
-    _log.debug("Parse {}".format(infile))
-    gen = SearchIO.parse(infile, 'hmmer3-text')
-    for idx, query_result in enumerate(gen):
-        len_profile = query_result.seq_len
-        query = query_result.id
+    columns = ["Accession_number", "query_name", "ID_query",
+               "ID_prot", "strand", "pos_beg", "pos_end",
+               "evalue", "hmmfrom", "hmmto", "alifrom",
+               "alito", "len_profile"]
+    # the hits are accumulated column by column, the DataFrame is built once at the end
+    hits = {col: [] for col in columns}
+    hmm_format = hmm_sniffer(infile)
+    _log.debug("Parse {} ({})".format(infile, hmm_format))
+    if hmm_format == 'hmmer3-domtab':
+        gen = _parse_domtblout(infile)
+    else:
+        gen = _parse_hmmer_text(infile)
+    for query, id_query, len_profile, id_prot, i_evalue, hmmfrom, hmmto, alifrom, alito in gen:
+        _, strand, pos_beg, pos_end = prot_db.get_description(id_prot)
 
-        try:
-            id_query = query_result.accession
-        except AttributeError:
-            id_query = "-"
-        for idx2, hit in enumerate(query_result.hits):
-            id_prot = hit.id
-
-            _, strand, pos_beg, pos_end = prot_db.get_description(hit.id)
-
-            evalue_tmp = []
-            hmmfrom = []
-            hmmto = []
-            alifrom = []
-            alito = []
-
-            for hsp in hit.hsps:
-                # strand = hsp.query_strand
-                evalue_tmp.append(hsp.evalue)
-                hmmfrom.append(hsp.query_start + 1)
-                hmmto.append(hsp.query_end)
-                alifrom.append(hsp.hit_start + 1)
-                alito.append(hsp.hit_end)
-
-            best_evalue = np.argmin(evalue_tmp)
-
-            df.loc[idx+idx2, "ID_prot"] = id_prot
-            df.loc[idx+idx2, "ID_query"] = id_query  # "-"  # remnant of ancient parsing function to keep data structure
-            df.loc[idx+idx2, "pos_beg"] = pos_beg
-            df.loc[idx+idx2, "pos_end"] = pos_end
-            df.loc[idx+idx2, "strand"] = strand
-            df.loc[idx+idx2, "evalue"] = evalue_tmp[best_evalue]   # i-evalue
-            df.loc[idx+idx2, "hmmfrom"] = hmmfrom[best_evalue]   # hmmfrom
-            df.loc[idx+idx2, "hmmto"] = hmmto[best_evalue]     # hmm to
-            df.loc[idx+idx2, "alifrom"] = alifrom[best_evalue]   # alifrom
-            df.loc[idx+idx2, "alito"] = alito[best_evalue]  # ali to
-            df.loc[idx+idx2, "len_profile"] = float(len_profile)
-            df.loc[idx+idx2, "Accession_number"] = replicon_id
-            df.loc[idx+idx2, "query_name"] = query
+        hits["ID_prot"].append(id_prot)
+        hits["ID_query"].append(id_query)  # "-"  # remnant of ancient parsing function to keep data structure
+        hits["pos_beg"].append(pos_beg)
+        hits["pos_end"].append(pos_end)
+        hits["strand"].append(strand)
+        hits["evalue"].append(i_evalue)  # i-evalue
+        hits["hmmfrom"].append(hmmfrom)  # hmmfrom
+        hits["hmmto"].append(hmmto)  # hmm to
+        hits["alifrom"].append(alifrom)  # alifrom
+        hits["alito"].append(alito)  # ali to
+        hits["len_profile"].append(float(len_profile))
+        hits["Accession_number"].append(replicon_id)
+        hits["query_name"].append(query)
 
+    df = pd.DataFrame(hits, columns=columns, dtype=object)
     intcols = ["pos_beg", "pos_end", "strand"]
     floatcol = ["evalue", "len_profile"]
     df[intcols] = df[intcols].astype(int)
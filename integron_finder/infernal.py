@@ -26,17 +26,74 @@
 # If not, see <http://www.gnu.org/licenses/>.                                      #
 ####################################################################################
 
+import io
 import os
-from subprocess import call
+import shutil
+import tempfile
+from subprocess import call, run
+from concurrent.futures import ThreadPoolExecutor
 import colorlog
+import numpy as np
 import pandas as pd
 from Bio import SeqIO
 
 from .utils import model_len
+from .cache import cached_run
 
 _log = colorlog.getLogger(__name__)
 
 
+def read_tblout(infile):
+    """
+    Parse the cmsearch --tblout output in one pass.
+    The lines are read one by one, only the columns needed by integron_finder are kept.
+
+    :param str infile: the path to the output of cmsearch in tabulated format (--tblout)
+    :return: the columns of the table, with the following keys:
+
+            | "target_name", "cm_attC", "cm_debut", "cm_fin", "pos_beg_tmp", "pos_end_tmp", "sens", "evalue"
+            | target_name, cm_attC and sens are :class:`numpy.ndarray` of str (object),
+            | cm_debut, cm_fin, pos_beg_tmp and pos_end_tmp are :class:`numpy.ndarray` of int
+            | and evalue a :class:`numpy.ndarray` of float.
+    :rtype: dict
+    """
+    target_name = []
+    query_name = []
+    mdl_from = []
+    mdl_to = []
+    seq_from = []
+    seq_to = []
+    strand = []
+    evalue = []
+    with open(infile) as tblout:
+        for line in tblout:
+            if line.startswith('#') or not line.strip():
+                continue
+            # the description of target can contain spaces,
+            # it is the last column so we split only the 17 first columns
+            # target name(0), query_name(2), mdl from(5), mdl to(6), seq from(7),
+            # seq to(8), strand(9), E-value(15)
+            fields = line.split(None, 17)
+            target_name.append(fields[0])
+            query_name.append(fields[2])
+            mdl_from.append(fields[5])
+            mdl_to.append(fields[6])
+            seq_from.append(fields[7])
+            seq_to.append(fields[8])
+            strand.append(fields[9])
+            evalue.append(fields[15])
+
+    return {"target_name": np.array(target_name, dtype=object),
+            "cm_attC": np.array(query_name, dtype=object),
+            "cm_debut": np.array(mdl_from, dtype=np.int64),
+            "cm_fin": np.array(mdl_to, dtype=np.int64),
+            "pos_beg_tmp": np.array(seq_from, dtype=np.int64),
+            "pos_end_tmp": np.array(seq_to, dtype=np.int64),
+            "sens": np.array(strand, dtype=object),
+            "evalue": np.array(evalue, dtype=np.float64)
+            }
+
+
 def read_infernal(infile, replicon_id, len_model_attc,
                   evalue=1, size_max_attc=200, size_min_attc=40):
     """
@@ -57,44 +114,53 @@ def read_infernal(infile, replicon_id, len_model_attc,
     _log.debug("read_infernal {}, {}, {}, evalue={}, size_max_attc={}, size_min_attc={}".format(
         infile, replicon_id, len_model_attc, evalue, size_max_attc, size_min_attc
     ))
-    try:
-        _ = pd.read_csv(infile, comment="#", sep="\t")
-    except Exception:
-        return pd.DataFrame(columns=["Accession_number", "cm_attC", "cm_debut",
-                                     "cm_fin", "pos_beg", "pos_end", "sens", "evalue"])
-
-    df = pd.read_csv(infile, sep="\s+", engine="python",  header=None,
-                     skipfooter=10, skiprows=2, usecols=[2, 5, 6, 7, 8, 9, 15])
-    # some line can have different number of columns due to difference in description
-    # we do not use this columns so we must parse only cols we need
-    # Keep only columns: query_name(2), mdl from(5), mdl to(6), seq from(7),
-    # seq to(8), strand(9), E-value(15)
-    df.columns = ["cm_attC", "cm_debut", "cm_fin", "pos_beg_tmp", "pos_end_tmp", "sens", "evalue"]
-    df["Accession_number"] = replicon_id
-    _log.debug("Before filtering on evalue {}, there were {} attC sites".format(evalue, len(df)))
-    df = df[df.evalue < evalue]  # filter on evalue
-    _log.debug("After filtering on evalue {}, there are now {} attC sites".format(evalue, len(df)))
-    df = df[(abs(df.pos_end_tmp - df.pos_beg_tmp) < size_max_attc) &
-            (size_min_attc < abs(df.pos_end_tmp - df.pos_beg_tmp))]
+    columns = ["Accession_number", "cm_attC", "cm_debut", "cm_fin", "pos_beg", "pos_end", "sens", "evalue"]
+    if not os.path.exists(infile):
+        return pd.DataFrame(columns=columns)
+    hits = read_tblout(infile)
+
+    _log.debug("Before filtering on evalue {}, there were {} attC sites".format(evalue, len(hits['evalue'])))
+    keep = hits['evalue'] < evalue
+    _log.debug("After filtering on evalue {}, there are now {} attC sites".format(evalue, keep.sum()))
+    size = np.abs(hits['pos_end_tmp'] - hits['pos_beg_tmp'])
+    keep &= (size < size_max_attc) & (size_min_attc < size)
     _log.debug("After filtering on size max: {} and size min: {}, "
-               "there are now {} attC sites".format(size_max_attc, size_min_attc, len(df)))
-    if not df.empty:
-        df.sort_values(['pos_end_tmp', 'evalue'], inplace=True)
-        df.index = list(range(0, len(df)))
-        idx = (df.pos_beg_tmp > df.pos_end_tmp)
-        df.loc[idx, "pos_beg"] = df.loc[idx].apply(lambda x: x["pos_end_tmp"] - (len_model_attc - x["cm_fin"]), axis=1)
-        df.loc[idx, "pos_end"] = df.loc[idx].apply(lambda x: x["pos_beg_tmp"] + (x["cm_debut"] - 1), axis=1)
-
-        df.loc[~idx, "pos_end"] = df.loc[~idx].apply(lambda x: x["pos_end_tmp"] + (len_model_attc - x["cm_fin"]), axis=1)
-        df.loc[~idx, "pos_beg"] = df.loc[~idx].apply(lambda x: x["pos_beg_tmp"] - (x["cm_debut"] - 1), axis=1)
-
-        return df[["Accession_number", "cm_attC", "cm_debut", "cm_fin", "pos_beg", "pos_end", "sens", "evalue"]]
-    else:
-        return pd.DataFrame(columns=["Accession_number", "cm_attC", "cm_debut",
-                                     "cm_fin", "pos_beg", "pos_end", "sens", "evalue"])
-
-
-def find_attc(replicon_path, replicon_id, cmsearch_path, out_dir, model_attc, incE=1., cpu=1):
+               "there are now {} attC sites".format(size_max_attc, size_min_attc, keep.sum()))
+    if not keep.any():
+        return pd.DataFrame(columns=columns)
+
+    hits = {col: values[keep] for col, values in hits.items()}
+    # sort on pos_end_tmp then evalue (np.lexsort use the last key as primary key)
+    order = np.lexsort((hits['evalue'], hits['pos_end_tmp']))
+    hits = {col: values[order] for col, values in hits.items()}
+
+    cm_debut = hits['cm_debut']
+    cm_fin = hits['cm_fin']
+    pos_beg_tmp = hits['pos_beg_tmp']
+    pos_end_tmp = hits['pos_end_tmp']
+    # the hit is on the reverse strand
+    # the positions of the attC are extended to the whole model length
+    reverse = pos_beg_tmp > pos_end_tmp
+    pos_beg = np.where(reverse,
+                       pos_end_tmp - (len_model_attc - cm_fin),
+                       pos_beg_tmp - (cm_debut - 1))
+    pos_end = np.where(reverse,
+                       pos_beg_tmp + (cm_debut - 1),
+                       pos_end_tmp + (len_model_attc - cm_fin))
+
+    df = pd.DataFrame({"Accession_number": replicon_id,
+                       "cm_attC": hits['cm_attC'],
+                       "cm_debut": cm_debut,
+                       "cm_fin": cm_fin,
+                       "pos_beg": pos_beg,
+                       "pos_end": pos_end,
+                       "sens": hits['sens'],
+                       "evalue": hits['evalue']},
+                      columns=columns)
+    return df
+
+
+def find_attc(replicon_path, replicon_id, cmsearch_path, out_dir, model_attc, incE=1., cpu=1, cache=None):
     """
     Call cmsearch to find attC sites in a single replicon.
 
@@ -105,28 +171,23 @@ def find_attc(replicon_path, replicon_id, cmsearch_path, out_dir, model_attc, in
     :param str model_attc: path to the attc model (Covariance Matrix).
     :param float incE: consider sequences <= this E-value threshold as significant (to get the alignment with -A)
     :param int cpu: the number of cpu used by cmsearch.
+    :param cache: the cache of the cmsearch outputs, None to always run cmsearch.
+    :type cache: :class:`integron_finder.cache.ResultsCache` object
     :returns: None, the results are written on the disk.
     :raises RuntimeError: when cmsearch run failed.
     """
+    out = os.path.join(out_dir, replicon_id + "_attc.res")
+    tblout_path = os.path.join(out_dir, replicon_id + "_attc_table.res")
     cmsearch_cmd = "{cmsearch} --cpu {cpu} -A {out} --tblout {tblout_path} " \
                    "-E 10 --incE {incE} {mod_attc} {infile}".format(cmsearch=cmsearch_path,
                                                                     cpu=cpu,
-                                                                    out=os.path.join(out_dir,
-                                                                                     replicon_id + "_attc.res"),
-                                                                    tblout_path=os.path.join(out_dir,
-                                                                                             replicon_id +
-                                                                                             "_attc_table.res"),
+                                                                    out=out,
+                                                                    tblout_path=tblout_path,
                                                                     incE=incE,
                                                                     mod_attc=model_attc,
                                                                     infile=replicon_path)
-    try:
-        _log.debug("run cmsearch: {}".format(cmsearch_cmd))
-        with open(os.devnull, 'w') as dev_null:
-            returncode = call(cmsearch_cmd.split(), stdout=dev_null)
-    except Exception as err:
-        raise RuntimeError("{0} failed : {1}".format(cmsearch_cmd, err))
-    if returncode != 0:
-        raise RuntimeError("{0} failed returncode = {1}".format(cmsearch_cmd, returncode))
+    cached_run(cache, cmsearch_cmd.split(), [model_attc, replicon_path], [out, tblout_path],
+               lambda: _run_cmsearch(cmsearch_cmd))
 
 
 def local_max(replicon,
@@ -134,7 +195,7 @@ def local_max(replicon,
               model_attc_path,
               strand_search="both",
               evalue_attc=1., max_attc_size=200, min_attc_size=40,
-              cmsearch_bin='cmsearch', out_dir='.', cpu_nb=1):
+              cmsearch_bin='cmsearch', out_dir='.', cpu_nb=1, cache=None):
     """
     :param replicon: The name of replicon (without suffix)
     :type replicon: :class:`Bio.Seq.SeqRecord` object.
@@ -155,75 +216,434 @@ def local_max(replicon,
     :param str cmsearch_bin: The path to cmsearch
     :param str out_dir: The path to directory where to write results
     :param int cpu_nb: The number of cpu used by cmsearch
+    :param cache: the cache of the cmsearch outputs, None to always run cmsearch.
+    :type cache: :class:`integron_finder.cache.ResultsCache` object
     :return: DataFrame with same structure as the DataFrame returns by :func:`read_infernal`
              where position are converted on position on replicon and attc are filtered
              by evalue, min_attc_size, max_attc_size
-             also write a file with intermediate results <replicon_id>_subseq_attc_table_end.res
+             also write a file with intermediate results
+             <replicon_id>_<window_beg>_<window_end>_<strand_search>_subseq_attc_table_end.res
              this file store the local_max results before filtering by max_attc_size and min_attc_size
     :rtype: :class:`pandas.DataFrame` object
     """
+    return local_max_windows(replicon, [(window_beg, window_end, strand_search)],
+                             model_attc_path,
+                             evalue_attc=evalue_attc,
+                             max_attc_size=max_attc_size,
+                             min_attc_size=min_attc_size,
+                             cmsearch_bin=cmsearch_bin,
+                             out_dir=out_dir,
+                             cpu_nb=cpu_nb,
+                             cache=cache)[0]
+
+
+def local_max_windows(replicon, windows,
+                      model_attc_path,
+                      evalue_attc=1., max_attc_size=200, min_attc_size=40,
+                      cmsearch_bin='cmsearch', out_dir='.', cpu_nb=1, stdin=False, merge=False, cache=None):
+    """
+    Search attC sites with cmsearch --max in several windows of a replicon.
+    The subsequences of the windows to search on the same strand(s) are written in one fasta file
+    and searched with one cmsearch run. Each subsequence is searched independently and
+    the E-values are computed on the replicon size (-Z),
+    so the results are the same as if each window was searched alone by :func:`local_max`.
+
+    With *merge* the windows which overlap are merged before the search (see :func:`merge_windows`),
+    so each base is searched once, and the hits are given back to each window they are included in.
+    The results can differ from the search of each window alone:
+    a hit which crosses the border of a window is not given to this window instead of being reported truncated,
+    and as cmsearch --max removes the overlapping hits, a hit spanning 2 windows can hide
+    a lower-scoring hit inside one of them.
+
+    The results of each window, filtered on the size of the cmsearch hits (see :func:`read_infernal`)
+    but before filtering their positions on the replicon by max_attc_size and min_attc_size, are stored in
+    <replicon_id>_<window_beg>_<window_end>_<strand_search>_subseq_attc_table_end.res (see :func:`window_store_path`).
+    The windows with stored results are not searched again.
+
+    :param replicon: The replicon to search
+    :type replicon: :class:`Bio.Seq.SeqRecord` object.
+    :param windows: the windows to search: (window_beg, window_end, strand_search)
+                    if window_beg > window_end the window overlaps the origin of the replicon.
+                    see :func:`local_max` for the strand_search values.
+    :type windows: list of tuple (int, int, str)
+    :param str model_attc_path: The path to the covariance model for attc (eg: attc_4.cm)
+                                used by cmsearch to find attC sites
+    :param float evalue_attc: evalue threshold to filter out hits above it
+    :param int max_attc_size: The maximum value fot the attC size
+    :param int min_attc_size: The minimum value fot the attC size
+    :param str cmsearch_bin: The path to cmsearch
+    :param str out_dir: The path to directory where to write results
+    :param int cpu_nb: The number of cpu used by cmsearch
+    :param bool stdin: if True the subsequences are sent to cmsearch through its standard input
+                       and the cmsearch outputs are written in a temporary directory (in TMPDIR)
+                       which is removed at the end. Only the results of each window are written in out_dir.
+    :param bool merge: if True the overlapping windows are merged before the search.
+    :param cache: the cache of the cmsearch outputs, None to always run cmsearch.
+                  The cmsearch runs are cached, so a run on the same subsequences is not done again
+                  even if the windows stored results have been removed.
+    :type cache: :class:`integron_finder.cache.ResultsCache` object
+    :return: for each window, the DataFrame :func:`local_max` would return for this window.
+    :rtype: list of :class:`pandas.DataFrame` objects
+    """
     replicon_size = len(replicon)
-    if window_beg < window_end:
-        subseq = replicon[window_beg:window_end]
+    len_model_attc = model_len(model_attc_path)
+    results = {}
+    for window in set(windows):
+        store_path = window_store_path(replicon.id, window, out_dir)
+        if os.path.exists(store_path):
+            _log.debug("local_max results of window {} are already stored in {}".format(window, store_path))
+            results[window] = _filter_size(read_window_store(store_path), min_attc_size, max_attc_size)
+    # plan the cmsearch runs
+    strands_windows = []
+    for strand_search in ("both", "top", "bottom"):
+        # a window can be asked several times
+        strand_windows = sorted({(beg, end) for beg, end, strand in windows
+                                 if strand == strand_search and (beg, end, strand) not in results})
+        if not strand_windows:
+            continue
+        if merge:
+            merged_windows = merge_windows(strand_windows, replicon_size)
+        else:
+            merged_windows = [(beg, end, [(beg, end)]) for beg, end in strand_windows]
+        _log.debug("local_max {} strand(s): {} windows ({} bp) merged in {} windows ({} bp), "
+                   "replicon size {} bp".format(strand_search,
+                                                len(strand_windows),
+                                                sum(_window_len(w, replicon_size) for w in strand_windows),
+                                                len(merged_windows),
+                                                sum(_window_len(w[:2], replicon_size) for w in merged_windows),
+                                                replicon_size))
+        strands_windows.append((strand_search, strand_windows, merged_windows))
+    # cmsearch does not scale well on small sequences,
+    # so the windows are split in several runs which are executed concurrently
+    chunks_nb = max(1, cpu_nb // max(1, len(strands_windows)))
+    runs = []
+    for strand_search, strand_windows, merged_windows in strands_windows:
+        chunks = _chunk_windows(merged_windows, chunks_nb, replicon_size)
+        for chunk in chunks:
+            # the windows of a strand are distinct and the merged windows do not overlap,
+            # so the first one gives a unique name to the run files
+            # (prefixed by 'run' to not clash with the outputs of the windows see _split_tblout)
+            name = "run_{}_{}_{}".format(chunk[0][0], chunk[0][1], strand_search)
+            runs.append((strand_search, name, chunk))
+    run_cpu = max(1, cpu_nb // max(1, len(runs)))
+
+    if stdin and runs:
+        work_dir = tempfile.mkdtemp(prefix='integron_finder_')
     else:
-        # the window overlap the replicon origin
-        subseq1 = replicon[window_beg:]
-        subseq2 = replicon[:window_end]
-        subseq = subseq1 + subseq2
-
-    infile_path = os.path.join(out_dir, replicon.id + "_subseq.fst")
-    with open(infile_path, "w") as f:
-        SeqIO.write(subseq, f, "fasta")
-
-    output_path = os.path.join(out_dir, "{name}_{win_beg}_{win_end}_subseq_attc.res".format(name=replicon.id,
-                                                                                            win_beg=window_beg,
-                                                                                            win_end=window_end))
-    tblout_path = os.path.join(out_dir, "{name}_{win_beg}_{win_end}_subseq_attc_table.res".format(name=replicon.id,
-                                                                                                  win_beg=window_beg,
-                                                                                                  win_end=window_end))
-
-    cmsearch_cmd = \
-        "{bin} -Z {size} {strand} --max --cpu {cpu} -A {out} --tblout {tblout} -E 10 " \
-        "--incE {incE} {mod_attc_path} {infile}".format(bin=cmsearch_bin,
-                                                        size=replicon_size / 1000000.,
-                                                        strand={"both": "",
-                                                                "top": "--toponly",
-                                                                "bottom": "--bottomonly"}[strand_search],
-                                                        cpu=cpu_nb,
-                                                        out=output_path,
-                                                        tblout=tblout_path,
-                                                        incE=evalue_attc,
-                                                        mod_attc_path=model_attc_path,
-                                                        infile=infile_path)
+        work_dir = out_dir
+    try:
+        cmds = []
+        runs_targets = []
+        for strand_search, name, chunk in runs:
+            targets = {}
+            infile_path = os.path.join(work_dir, "{}_{}_subseq.fst".format(replicon.id, name))
+            with (io.StringIO() if stdin else open(infile_path, "w")) as f:
+                for window_beg, window_end, included in chunk:
+                    if window_beg < window_end:
+                        subseq = replicon[window_beg:window_end]
+                    else:
+                        # the window overlap the replicon origin
+                        subseq1 = replicon[window_beg:]
+                        subseq2 = replicon[:window_end]
+                        subseq = subseq1 + subseq2
+                    subseq.id = "{name}_{win_beg}_{win_end}".format(name=replicon.id,
+                                                                    win_beg=window_beg,
+                                                                    win_end=window_end)
+                    subseq.description = ''
+                    targets[subseq.id] = [(window,
+                                           (window[0] - window_beg) % replicon_size,
+                                           _window_len(window, replicon_size)) for window in included]
+                    SeqIO.write(subseq, f, "fasta")
+                subseqs = f.getvalue().encode() if stdin else None
+
+            output_path = os.path.join(work_dir, "{}_{}_subseq_attc.res".format(replicon.id, name))
+            tblout_path = os.path.join(work_dir, "{}_{}_subseq_attc_table.res".format(replicon.id, name))
+
+            cmsearch_cmd = \
+                "{bin} -Z {size} {strand} --max --cpu {cpu} -A {out} --tblout {tblout} -E 10 " \
+                "--incE {incE} {mod_attc_path} {infile}".format(bin=cmsearch_bin,
+                                                                size=replicon_size / 1000000.,
+                                                                strand={"both": "",
+                                                                        "top": "--toponly",
+                                                                        "bottom": "--bottomonly"}[strand_search],
+                                                                cpu=run_cpu,
+                                                                out=output_path,
+                                                                tblout=tblout_path,
+                                                                incE=evalue_attc,
+                                                                mod_attc_path=model_attc_path,
+                                                                # cmsearch reads the target on stdin with '-'
+                                                                infile='-' if stdin else infile_path)
+            cmds.append((cmsearch_cmd, subseqs,
+                         [model_attc_path] if stdin else [model_attc_path, infile_path],
+                         [output_path, tblout_path]))
+            runs_targets.append((strand_search, tblout_path, targets))
+
+        # at most cpu_nb runs at the same time, so the --cpu budget (shared between the --jobs) is respected
+        workers = min(len(cmds), cpu_nb)
+        if workers > 1:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                # list to raise the first error
+                list(executor.map(lambda cmd: _cached_cmsearch(cache, *cmd), cmds))
+        else:
+            for cmd in cmds:
+                _cached_cmsearch(cache, *cmd)
+
+        # the windows outputs do not depend on the strand,
+        # so the outputs are split then read run after run
+        for strand_search, tblout_path, targets in runs_targets:
+            windows_tblout = _split_tblout(tblout_path, targets, replicon.id, strand_search, work_dir)
+            for window_beg, window_end in sorted(windows_tblout):
+                df_max = read_infernal(windows_tblout[(window_beg, window_end)],
+                                       replicon.id, len_model_attc,
+                                       evalue=evalue_attc,
+                                       size_max_attc=max_attc_size,
+                                       size_min_attc=min_attc_size)
+                # if replicon is linear
+                # df_max.pos_beg + window_beg is always < replicon_size
+                # (df_max.pos_beg + window_beg) % replicon_size = (df_max.pos_beg + window_beg)
+                # if replicon is circular and attc site overlap origin
+                # df_max.pos_beg + window_beg  > replicon_size
+                # (df_max.pos_beg + window_beg) % replicon_size is position on replicon
+                # for instance with pos = 100 and replicon size = 90
+                # 100 % 90 = 10
+                df_max.pos_beg = (df_max.pos_beg + window_beg) % replicon_size
+                df_max.pos_end = (df_max.pos_end + window_beg) % replicon_size
+                window = (window_beg, window_end, strand_search)
+                write_window_store(df_max, window_store_path(replicon.id, window, out_dir))
+                results[window] = _filter_size(df_max, min_attc_size, max_attc_size)
+    finally:
+        if work_dir != out_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+    return [results[window] for window in windows]
+
+
+def _filter_size(df_max, min_attc_size, max_attc_size):
+    """
+    :param df_max: the attC sites found by local_max
+    :type df_max: :class:`pandas.DataFrame` object
+    :param int min_attc_size: The minimum value fot the attC size
+    :param int max_attc_size: The maximum value fot the attC size
+    :return: the attC sites with a size between min_attc_size and max_attc_size
+    :rtype: :class:`pandas.DataFrame` object
+    """
+    return df_max[(abs(df_max.pos_end - df_max.pos_beg) > min_attc_size) &
+                  (abs(df_max.pos_end - df_max.pos_beg) < max_attc_size)]
+
+
+def window_store_path(replicon_id, window, out_dir):
+    """
+    :param str replicon_id: the id of the replicon
+    :param window: the window (window_beg, window_end, strand_search)
+    :type window: tuple (int, int, str)
+    :param str out_dir: The path to directory where the results are written
+    :return: the path of the file storing the local_max results of the window
+             <replicon_id>_<window_beg>_<window_end>_<strand_search>_subseq_attc_table_end.res
+    :rtype: str
+    """
+    return os.path.join(out_dir, "{}_{}_{}_{}_subseq_attc_table_end.res".format(replicon_id, *window))
+
+
+def write_window_store(df_max, store_path):
+    """
+    Store the local_max results of a window, in tabulated format without header.
+    The file is written under a temporary name then renamed,
+    so a stored result is always complete.
+
+    :param df_max: the attC sites found in the window, before filtering their positions on size
+    :type df_max: :class:`pandas.DataFrame` object
+    :param str store_path: the path of the file to write
+    """
+    tmp_path = store_path + '.tmp'
+    df_max.to_csv(tmp_path, sep="\t", index=0, header=0)
+    os.replace(tmp_path, store_path)
+
+
+def read_window_store(store_path):
+    """
+    :param str store_path: the path of a file written by :func:`write_window_store`
+    :return: the attC sites stored, with same structure as the DataFrame returns by :func:`read_infernal`
+    :rtype: :class:`pandas.DataFrame` object
+    """
+    columns = ["Accession_number", "cm_attC", "cm_debut", "cm_fin", "pos_beg", "pos_end", "sens", "evalue"]
+    if os.path.getsize(store_path) == 0:
+        return pd.DataFrame(columns=columns)
+    return pd.read_csv(store_path, sep="\t", header=None, names=columns,
+                       dtype={"Accession_number": str, "cm_attC": str, "sens": str,
+                              "cm_debut": np.int64, "cm_fin": np.int64,
+                              "pos_beg": np.int64, "pos_end": np.int64,
+                              "evalue": np.float64})
+
+
+def merge_window_stores(replicon_id, windows, out_dir):
+    """
+    Write the local_max results stored for each window in <replicon_id>_subseq_attc_table_end.res,
+    the file is overwritten so its content does not depend on previous runs.
+
+    :param str replicon_id: the id of the replicon
+    :param windows: the searched windows (window_beg, window_end, strand_search) in the order of the search
+    :type windows: list of tuple (int, int, str)
+    :param str out_dir: The path to directory where the results are written
+    :return: the path of the merged file
+    :rtype: str
+    """
+    table_end_path = os.path.join(out_dir, replicon_id + "_subseq_attc_table_end.res")
+    with open(table_end_path, 'w') as table_end:
+        for window in windows:
+            with open(window_store_path(replicon_id, window, out_dir)) as store:
+                shutil.copyfileobj(store, table_end)
+    return table_end_path
+
+
+def _run_cmsearch(cmsearch_cmd, subseqs=None):
+    """
+    :param str cmsearch_cmd: the cmsearch command line
+    :param bytes subseqs: the sequences in fasta format to send to cmsearch standard input
+                          None if cmsearch reads the sequences in a file.
+    :raise RuntimeError: if cmsearch cannot be executed or does not end successfully
+    """
     try:
         _log.debug("run cmsearch: {}".format(cmsearch_cmd))
         with open(os.devnull, 'w') as dev_null:
-            returncode = call(cmsearch_cmd.split(), stdout=dev_null)
+            if subseqs is None:
+                returncode = call(cmsearch_cmd.split(), stdout=dev_null)
+            else:
+                returncode = run(cmsearch_cmd.split(), input=subseqs, stdout=dev_null).returncode
     except Exception as err:
         raise RuntimeError("{0} failed : {1}".format(cmsearch_cmd, err))
     if returncode != 0:
         raise RuntimeError("{0} failed returncode = {1}".format(cmsearch_cmd, returncode))
-    df_max = read_infernal(tblout_path,
-                           replicon.id, model_len(model_attc_path),
-                           evalue=evalue_attc,
-                           size_max_attc=max_attc_size,
-                           size_min_attc=min_attc_size)
-    # if replicon is linear
-    # df_max.pos_beg + window_beg is always < replicon_size
-    # (df_max.pos_beg + window_beg) % replicon_size = (df_max.pos_beg + window_beg)
-    # if replicon is circular and attc site overlap origin
-    # df_max.pos_beg + window_beg  > replicon_size
-    # (df_max.pos_beg + window_beg) % replicon_size is position on replicon
-    # for instance with pos = 100 and replicon size = 90
-    # 100 % 90 = 10
-    df_max.pos_beg = (df_max.pos_beg + window_beg) % replicon_size
-    df_max.pos_end = (df_max.pos_end + window_beg) % replicon_size
-    df_max.to_csv(os.path.join(out_dir, replicon.id + "_subseq_attc_table_end.res"),
-                  sep="\t", index=0, mode="a", header=0)
-    # filter on size
-    df_max = df_max[(abs(df_max.pos_end - df_max.pos_beg) > min_attc_size) &
-                    (abs(df_max.pos_end - df_max.pos_beg) < max_attc_size)]
-    return df_max
+
+
+def _cached_cmsearch(cache, cmsearch_cmd, subseqs, inputs, outputs):
+    """
+    Run cmsearch unless its outputs are in the cache.
+
+    :param cache: the cache of the cmsearch outputs, None to always run cmsearch.
+    :type cache: :class:`integron_finder.cache.ResultsCache` object
+    :param str cmsearch_cmd: the cmsearch command line
+    :param bytes subseqs: the sequences to send to cmsearch standard input, None if they are in a file.
+    :param inputs: the paths of the cmsearch input files
+    :type inputs: list of str
+    :param outputs: the paths of the cmsearch output files
+    :type outputs: list of str
+    """
+    cached_run(cache, cmsearch_cmd.split(), inputs, outputs,
+               lambda: _run_cmsearch(cmsearch_cmd, subseqs),
+               stdin=subseqs)
+
+
+def _chunk_windows(windows, chunks_nb, replicon_size):
+    """
+    Split the windows in chunks of similar total length.
+
+    :param windows: the merged windows (window_beg, window_end, included windows) see :func:`merge_windows`
+    :type windows: list of tuple
+    :param int chunks_nb: the maximum number of chunks
+    :param int replicon_size: the size of the replicon
+    :return: the chunks of windows, the windows keep their order in each chunk
+    :rtype: list of list of tuple
+    """
+    chunks_nb = min(chunks_nb, len(windows))
+    chunks = [[] for _ in range(chunks_nb)]
+    chunks_len = [0] * chunks_nb
+    # the longest windows first, each in the shortest chunk
+    for idx in sorted(range(len(windows)), key=lambda i: -_window_len(windows[i][:2], replicon_size)):
+        chunk_idx = chunks_len.index(min(chunks_len))
+        chunks[chunk_idx].append(idx)
+        chunks_len[chunk_idx] += _window_len(windows[idx][:2], replicon_size)
+    return [[windows[idx] for idx in sorted(chunk)] for chunk in chunks]
+
+
+def _window_len(window, replicon_size):
+    """
+    :param window: the window (window_beg, window_end)
+    :type window: tuple (int, int)
+    :param int replicon_size: the size of the replicon
+    :return: the length of the window, a window with window_beg > window_end overlaps the origin
+    :rtype: int
+    """
+    window_beg, window_end = window
+    return window_end - window_beg if window_beg < window_end else replicon_size - window_beg + window_end
+
+
+def merge_windows(windows, replicon_size):
+    """
+    Merge the overlapping windows.
+    A window with window_beg > window_end overlaps the origin of the replicon,
+    the merged windows never cover the whole replicon.
+
+    :param windows: the windows to merge (window_beg, window_end)
+    :type windows: list of tuple (int, int)
+    :param int replicon_size: the size of the replicon
+    :return: the merged windows and the windows included in each of them
+    :rtype: list of tuple (int window_beg, int window_end, list of tuple (int, int) included windows)
+    """
+    # the windows are unrolled: end > beg, end can be greater than the replicon size
+    unrolled = sorted((beg, beg + _window_len((beg, end), replicon_size), (beg, end)) for beg, end in windows)
+    merged = []
+    for beg, end, window in unrolled:
+        if merged and beg <= merged[-1][1] and max(end, merged[-1][1]) - merged[-1][0] < replicon_size:
+            merged[-1][1] = max(end, merged[-1][1])
+            merged[-1][2].append(window)
+        else:
+            merged.append([beg, end, [window]])
+    if len(merged) > 1:
+        # the last window can overlap the first one across the origin
+        last, first = merged[-1], merged[0]
+        if last[1] - replicon_size >= first[0] and \
+                max(last[1], first[1] + replicon_size) - last[0] < replicon_size:
+            last[1] = max(last[1], first[1] + replicon_size)
+            last[2].extend(first[2])
+            merged = merged[1:]
+    return [(beg, end % replicon_size if end != replicon_size else end, included)
+            for beg, end, included in merged]
+
+
+def _split_tblout(tblout_path, targets, replicon_id, strand_search, out_dir):
+    """
+    Split a cmsearch tabular output (--tblout) on several merged windows in one output per window
+    <replicon_id>_<window_beg>_<window_end>_<strand_search>_subseq_attc_table.res
+    Each hit is given to the windows which include it,
+    and its positions are converted in positions on the window.
+    The comment lines are written in all outputs.
+
+    :param str tblout_path: the cmsearch tabular output to split
+    :param dict targets: for each target name (a merged window) the windows included in it:
+                         (window (window_beg, window_end), offset of the window in the target, length of the window)
+    :param str replicon_id: the id of the replicon
+    :param str strand_search: the strand option of the search (see :func:`local_max`),
+                              a window can be searched with several strand options.
+    :param str out_dir: The path to directory where to write the outputs
+    :return: the path of the output of each window
+    :rtype: dict {(int window_beg, int window_end): str path}
+    """
+    paths = {}
+    outs = {}
+    try:
+        for included in targets.values():
+            for window, _, _ in included:
+                paths[window] = os.path.join(out_dir, "{}_{}_{}_{}_subseq_attc_table.res".format(replicon_id, *window,
+                                                                                                strand_search))
+                outs[window] = open(paths[window], 'w')
+        with open(tblout_path) as tblout:
+            for line in tblout:
+                if line.startswith('#') or not line.strip():
+                    for out in outs.values():
+                        out.write(line)
+                else:
+                    fields = line.split(None, 17)
+                    seq_from = int(fields[7])
+                    seq_to = int(fields[8])
+                    for window, offset, length in targets[fields[0]]:
+                        if 0 < min(seq_from, seq_to) - offset and max(seq_from, seq_to) - offset <= length:
+                            fields[0] = "{}_{}_{}".format(replicon_id, *window)
+                            fields[7] = str(seq_from - offset)
+                            fields[8] = str(seq_to - offset)
+                            outs[window].write(' '.join(fields).rstrip('\n') + '\n')
+    finally:
+        for out in outs.values():
+            out.close()
+    return paths
 
 
 def expand(replicon,
@@ -270,7 +690,50 @@ def expand(replicon,
     :rtype: :class:`pandas.DataFrame` object
 
     """
-    replicon_size = len(replicon)
+    def search(window):
+        window_beg, window_end, searched_strand = window
+        return local_max(replicon,
+                         window_beg, window_end,
+                         model_attc_path,
+                         max_attc_size=max_attc_size,
+                         min_attc_size=min_attc_size,
+                         strand_search=searched_strand,
+                         out_dir=out_dir, cpu_nb=cpu,
+                         evalue_attc=evalue_attc)
+
+    return run_windows_search(expand_windows(len(replicon),
+                                             window_beg, window_end, max_elt, df_max,
+                                             circular, dist_threshold,
+                                             max_attc_size=max_attc_size,
+                                             search_left=search_left, search_right=search_right),
+                              search)
+
+
+def expand_windows(replicon_size,
+                   window_beg, window_end, max_elt, df_max,
+                   circular, dist_threshold,
+                   max_attc_size=200,
+                   search_left=False, search_right=False):
+    """
+    The windows search of :func:`expand`, the search of the windows is delegated to the caller,
+    so the windows of several elements can be searched together (see :func:`local_max_windows`).
+    The generator yields the windows to search (window_beg, window_end, strand_search)
+    and must be sent the result of the search of each window (see :func:`run_windows_search`).
+
+    :param int replicon_size: The size of the replicon to annotate
+    :param int window_beg: start of window to search for attc (position of protein)
+    :param int window_end: end of window to search for attc (position of protein)
+    :param max_elt: the attC sites already found (see :func:`expand`)
+    :type max_elt: :class:`pandas.DataFrame` object
+    :param df_max: the attC sites found by the last search (see :func:`expand`)
+    :type df_max: :class:`pandas.DataFrame` object
+    :param bool circular: True if replicon topology is circular otherwise False.
+    :param int dist_threshold: Two elements are aggregated if they are distant of dist_threshold [4kb] or less
+    :param int max_attc_size: The maximum value for the attC size
+    :param bool search_left: trigger the local_max search on the left of the already detected element
+    :param bool search_right: trigger the local_max search on the right of the already detected element
+    :return: a generator which returns a copy of max_elt with attC hits
+    """
     # for a given element, we can search on the left hand side of it
     # (if the integrase is on the right and attC sites on the left for instance),
     # on the right hand side of it (opposite situation), or on both sides (only integrase or only attC sites)
@@ -291,15 +754,7 @@ def expand(replicon,
         searched_strand = "both" if search_left else "top"  # search on both strands if search in both directions
 
         while not df_max.empty and 0 < (window_beg and window_end) < replicon_size:
-            df_max = local_max(replicon,
-                               window_beg, window_end,
-                               model_attc_path,
-                               max_attc_size=max_attc_size,
-                               min_attc_size=min_attc_size,
-                               strand_search=searched_strand,
-                               out_dir=out_dir, cpu_nb=cpu,
-                               evalue_attc=evalue_attc
-                               )
+            df_max = yield window_beg, window_end, searched_strand
             max_elt = pd.concat([max_elt, df_max])
 
             if circular:
@@ -326,15 +781,7 @@ def expand(replicon,
 
         while not df_max.empty and 0 < (window_beg and window_end) < replicon_size:
 
-            df_max = local_max(replicon,
-                               window_beg, window_end,
-                               model_attc_path,
-                               max_attc_size=max_attc_size,
-                               min_attc_size=min_attc_size,
-                               strand_search=searched_strand,
-                               out_dir=out_dir,
-                               cpu_nb=cpu,
-                               evalue_attc=evalue_attc)
+            df_max = yield window_beg, window_end, searched_strand
             max_elt = pd.concat([max_elt, df_max])  # update of attC list of hits.
 
             if circular:
@@ -347,3 +794,22 @@ def expand(replicon,
     max_elt.drop_duplicates(inplace=True)
     max_elt.index = list(range(len(max_elt)))
     return max_elt
+
+
+def run_windows_search(windows_search, search):
+    """
+    Drive a windows search generator (as :func:`expand_windows`) until it ends.
+
+    :param windows_search: the generator which yields the windows to search
+                           and must be sent the result of each search.
+    :param search: the function to search a window, it takes a window (window_beg, window_end, strand_search)
+                   and returns the attC sites found in it.
+    :type search: function
+    :return: the value returned by the generator
+    """
+    try:
+        window = next(windows_search)
+        while True:
+            window = windows_search.send(search(window))
+    except StopIteration as stop:
+        return stop.value
@@ -27,10 +27,13 @@
 ####################################################################################
 
 import os
+import tempfile
 from subprocess import call
 import colorlog
 
 from . import EmptyFileError
+from .hmm import hmmsearch_output_options, hmm_names, hmm_sniffer
+from .cache import cached_run
 
 _log = colorlog.getLogger(__name__)
 
@@ -59,28 +62,330 @@ def find_integrase(replicon_id, prot_file, out_dir, cfg):
         _log.warning(msg)
         raise EmptyFileError(msg)
 
+    intI_table_out = os.path.join(out_dir, replicon_id + "_intI_table.res")
+    phage_hmm_out = os.path.join(out_dir, replicon_id + "_phage_int.res")
+    phage_table_out = os.path.join(out_dir, replicon_id + "_phage_int_table.res")
+
+    if cfg.combined_integrase_search:
+        if not (os.path.isfile(intI_hmm_out) and os.path.isfile(phage_hmm_out)):
+            integrases_hmm_out = os.path.join(out_dir, replicon_id + "_integrases.res")
+            integrases_table_out = os.path.join(out_dir, replicon_id + "_integrases_table.res")
+            _cached_hmmsearch([cfg.hmmsearch,
+                               "--cpu", str(cfg.cpu),
+                               "--tblout", integrases_table_out] +
+                              hmmsearch_output_options(integrases_hmm_out, cfg) +
+                              [integrase_models(cfg),
+                               prot_file], cfg)
+            split_integrases_results(integrases_hmm_out, integrases_table_out,
+                                     {cfg.model_integrase: (intI_hmm_out, intI_table_out),
+                                      cfg.model_phage_int: (phage_hmm_out, phage_table_out)})
+        return
+
     if not os.path.isfile(intI_hmm_out):
         hmm_cmd.append([cfg.hmmsearch,
                         "--cpu", str(cfg.cpu),
-                        "--tblout", os.path.join(out_dir, replicon_id + "_intI_table.res"),
-                        "-o", intI_hmm_out,
-                        cfg.model_integrase,
+                        "--tblout", intI_table_out] +
+                       hmmsearch_output_options(intI_hmm_out, cfg) +
+                       [cfg.model_integrase,
                         prot_file])
 
-    phage_hmm_out = os.path.join(out_dir, replicon_id + "_phage_int.res")
     if not os.path.isfile(phage_hmm_out):
         hmm_cmd.append([cfg.hmmsearch,
                         "--cpu", str(cfg.cpu),
-                        "--tblout", os.path.join(out_dir, replicon_id + "_phage_int_table.res"),
-                        "-o", phage_hmm_out,
-                        cfg.model_phage_int,
+                        "--tblout", phage_table_out] +
+                       hmmsearch_output_options(phage_hmm_out, cfg) +
+                       [cfg.model_phage_int,
                         prot_file])
 
     for cmd in hmm_cmd:
-        try:
-            _log.debug("run hmmsearch: {}".format(' '.join(cmd)))
-            returncode = call(cmd)
-        except Exception as err:
-            raise RuntimeError("{0} failed : {1}".format(' '.join(cmd), err))
-        if returncode != 0:
-            raise RuntimeError("{0} failed return code = {1}".format(' '.join(cmd), returncode))
+        _cached_hmmsearch(cmd, cfg)
+
+
+def _run_hmmsearch(cmd):
+    """
+    :param cmd: the hmmsearch command line
+    :type cmd: list of str
+    :raise RuntimeError: if hmmsearch cannot be executed or does not end successfully
+    """
+    try:
+        _log.debug("run hmmsearch: {}".format(' '.join(cmd)))
+        returncode = call(cmd)
+    except Exception as err:
+        raise RuntimeError("{0} failed : {1}".format(' '.join(cmd), err))
+    if returncode != 0:
+        raise RuntimeError("{0} failed return code = {1}".format(' '.join(cmd), returncode))
+
+
+def _cached_hmmsearch(cmd, cfg):
+    """
+    Run hmmsearch unless its outputs are in the cache (see :attr:`integron_finder.config.Config.cache`).
+
+    :param cmd: the hmmsearch command line, ending with the hmm file and the sequences file
+    :type cmd: list of str
+    :param cfg: the configuration
+    :type cfg: a :class:`integron_finder.config.Config` object
+    """
+    outputs = [cmd[idx + 1] for idx, arg in enumerate(cmd[:-1])
+               if arg in ("-o", "--tblout", "--domtblout") and cmd[idx + 1] != os.devnull]
+    cached_run(cfg.cache, cmd, cmd[-2:], outputs, lambda: _run_hmmsearch(cmd))
+
+
+def integrase_models(cfg):
+    """
+    Concatenate the integrase and phage-integrase profiles in one file, so both can be searched
+    with one hmmsearch run. The file is built once and shared by all replicons of the analysis.
+
+    .. note::
+        hmmsearch does not use the binary files generated by hmmpress (only hmmscan does),
+        so the profiles are just concatenated.
+
+    :param cfg: the configuration
+    :type cfg: a :class:`integron_finder.config.Config` object
+    :return: the path to the file containing both profiles
+    :rtype: str
+    """
+    models_path = cfg.model_integrases
+    if not os.path.exists(models_path):
+        models_dir = os.path.dirname(models_path)
+        if not os.path.exists(models_dir):
+            os.makedirs(models_dir, exist_ok=True)
+        # the replicons can be analysed in parallel
+        # so the file is written under a temporary name then renamed
+        fd, tmp_path = tempfile.mkstemp(dir=models_dir, suffix='.hmm')
+        with os.fdopen(fd, 'w') as models:
+            for model_path in (cfg.model_integrase, cfg.model_phage_int):
+                with open(model_path) as model:
+                    models.write(model.read())
+        os.replace(tmp_path, models_path)
+    return models_path
+
+
+def split_integrases_results(hmm_out, table_out, models):
+    """
+    Split the results of an hmmsearch run with several hmm files concatenated,
+    into the results we would get with one hmmsearch per hmm file.
+
+    :param str hmm_out: the hmmsearch output (text or domain tabular format)
+    :param str table_out: the hmmsearch tabular output (--tblout)
+    :param models: for each concatenated hmm file, the path to the hmmsearch output and tabular output to generate
+    :type models: dict {str: (str, str)}
+    """
+    query_2_out = {}
+    for model_path, outputs in models.items():
+        for name in hmm_names(model_path):
+            query_2_out[name] = outputs
+    if hmm_sniffer(hmm_out) == 'hmmer3-domtab':
+        _split_table(hmm_out, query_2_out, 0, 3)
+    else:
+        _split_text(hmm_out, query_2_out, 0)
+    _split_table(table_out, query_2_out, 1, 2)
+
+
+def _split_text(hmm_out, query_2_out, out_idx):
+    """
+    Split an hmmsearch text output, each query result is written in the output of its hmm file.
+    The header and the footer are written in all outputs.
+
+    :param str hmm_out: the hmmsearch text output
+    :param dict query_2_out: for each query name, the outputs of its hmm file
+    :param int out_idx: the index of the output to write in the outputs
+    """
+    header = []
+    footer = []
+    queries = {path[out_idx]: [] for path in query_2_out.values()}
+    current = header
+    with open(hmm_out) as hmm_file:
+        for line in hmm_file:
+            if line.startswith('Query:'):
+                current = queries[query_2_out[line.split()[1]][out_idx]]
+            current.append(line)
+            if line.startswith('//'):
+                current = footer
+    for path, lines in queries.items():
+        with open(path, 'w') as out:
+            out.writelines(header)
+            out.writelines(lines)
+            out.writelines(footer)
+
+
+def _split_table(table_out, query_2_out, out_idx, query_col):
+    """
+    Split an hmmsearch tabular output (--tblout or --domtblout),
+    each line is written in the output of the hmm file of its query.
+    The comment lines are written in all outputs.
+
+    :param str table_out: the hmmsearch tabular output
+    :param dict query_2_out: for each query name, the outputs of its hmm file
+    :param int out_idx: the index of the output to write in the outputs
+    :param int query_col: the index of the column containing the query name
+    """
+    outs = {path[out_idx]: open(path[out_idx], 'w') for path in query_2_out.values()}
+    try:
+        with open(table_out) as table:
+            for line in table:
+                if line.startswith('#'):
+                    for out in outs.values():
+                        out.write(line)
+                else:
+                    outs[query_2_out[line.split()[query_col]][out_idx]].write(line)
+    finally:
+        for out in outs.values():
+            out.close()
+
+
+def find_integrase_batch(replicons, out_dir, cfg):
+    """
+    Search the integrases in the proteins of several replicons with one hmmsearch run per profile
+    (or one run for both profiles if cfg.combined_integrase_search is True),
+    instead of two hmmsearch runs per replicon.
+    The hits are then split by replicon in the files generated by :func:`find_integrase`
+    (<replicon_id>_intI.res and <replicon_id>_phage_int.res, in domain tabular format),
+    so the integrase search is skipped when each replicon is analysed.
+
+    The E-values computed by hmmsearch depend on the number of sequences searched.
+    To get the same E-values that a search on the proteins of each replicon would give,
+    hmmsearch is run with *-Z 1 --domZ 1* so it reports P-values, which are multiplied afterwards
+    by the number of proteins of the replicon (-Z) and by the number of its reported hits (--domZ).
+    The hmmsearch default reporting thresholds (-E 10 --domE 10) are applied after this rescaling.
+
+    :param replicons: for each replicon, its id, the path to its protein file
+                      and the directory where to write its results.
+    :type replicons: list of tuple (str replicon_id, str prot_file, str replicon_out_dir)
+    :param str out_dir: the directory where to write the proteins of all replicons and the hmmsearch outputs
+    :param cfg: the configuration
+    :type cfg: a :class:`integron_finder.config.Config` object
+    :returns: None, the results are written on the disk
+    """
+    todo = []
+    for replicon_id, prot_file, replicon_out_dir in replicons:
+        intI_hmm_out = os.path.join(replicon_out_dir, replicon_id + "_intI.res")
+        phage_hmm_out = os.path.join(replicon_out_dir, replicon_id + "_phage_int.res")
+        if not os.path.isfile(intI_hmm_out) or not os.path.isfile(phage_hmm_out):
+            todo.append((replicon_id, prot_file, {cfg.model_integrase: intI_hmm_out,
+                                                  cfg.model_phage_int: phage_hmm_out}))
+    if not todo:
+        return
+    if not os.path.exists(out_dir):
+        os.makedirs(out_dir)
+
+    all_prot_file = os.path.join(out_dir, "proteins.prt")
+    prots_nb = []
+    with open(all_prot_file, 'w') as all_prots:
+        for replicon_id, prot_file, _ in todo:
+            prot_nb = 0
+            if os.path.exists(prot_file):
+                with open(prot_file) as prots:
+                    for line in prots:
+                        if line.startswith('>'):
+                            prot_nb += 1
+                        all_prots.write(line)
+            prots_nb.append(prot_nb)
+    if not any(prots_nb):
+        # find_integrase will report the missing or empty protein files replicon by replicon
+        return
+
+    if cfg.combined_integrase_search:
+        hmm_files = [integrase_models(cfg)]
+    else:
+        hmm_files = [cfg.model_integrase, cfg.model_phage_int]
+    hmm_outs = []
+    for hmm_file in hmm_files:
+        hmm_out = os.path.join(out_dir, os.path.splitext(os.path.basename(hmm_file))[0] + ".res")
+        text_out = os.path.splitext(hmm_out)[0] + '.out' if cfg.keep_tmp else os.devnull
+        _cached_hmmsearch([cfg.hmmsearch,
+                           "--cpu", str(cfg.cpu),
+                           "-Z", "1",
+                           "--domZ", "1",
+                           "--domtblout", hmm_out,
+                           "-o", text_out,
+                           hmm_file,
+                           all_prot_file], cfg)
+        hmm_outs.append(hmm_out)
+
+    query_2_model = {}
+    for model_path in (cfg.model_integrase, cfg.model_phage_int):
+        for name in hmm_names(model_path):
+            query_2_model[name] = model_path
+    split_batch_results(hmm_outs, all_prot_file, todo, prots_nb, query_2_model)
+
+
+def split_batch_results(hmm_outs, all_prot_file, replicons, prots_nb, query_2_model, evalue=10., dom_evalue=10.):
+    """
+    Split the domain tabular outputs of hmmsearch runs done with *-Z 1 --domZ 1*
+    on the proteins of several replicons, in one output per replicon and hmm file,
+    with the E-values rescaled to the proteins of each replicon.
+
+    :param hmm_outs: the paths to the hmmsearch domain tabular outputs (--domtblout)
+    :type hmm_outs: list of str
+    :param str all_prot_file: the proteins searched by hmmsearch,
+                              the proteins of each replicon are consecutive and in the order of *replicons*
+    :param replicons: for each replicon, its id, its protein file,
+                      and for each hmm file the path of the output to write.
+    :type replicons: list of tuple (str replicon_id, str prot_file, dict {str hmm_file: str hmm_out})
+    :param prots_nb: the number of proteins of each replicon
+    :type prots_nb: list of int
+    :param dict query_2_model: for each query name, the hmm file it comes from
+    :param float evalue: the reporting threshold on the sequence E-value (hmmsearch -E)
+    :param float dom_evalue: the reporting threshold on the domain conditional E-value (hmmsearch --domE)
+    """
+    header = []
+    # for each hit: the domains in the order of the hmmsearch outputs
+    hits = {}
+    for hmm_out in hmm_outs:
+        with open(hmm_out) as domtblout:
+            for line in domtblout:
+                if line.startswith('#'):
+                    if len(header) < 3:
+                        header.append(line)
+                    continue
+                fields = line.rstrip('\n').split(None, 22)
+                hits.setdefault((fields[0], fields[3]), []).append(fields)
+
+    # the proteins of the replicons are consecutive in all_prot_file
+    hit_ids = {target for target, _ in hits}
+    prot_2_replicon = {}
+    replicon_idx = 0
+    prot_nb = 0
+    with open(all_prot_file) as all_prots:
+        for line in all_prots:
+            if line.startswith('>'):
+                while prot_nb == prots_nb[replicon_idx]:
+                    replicon_idx += 1
+                    prot_nb = 0
+                prot_nb += 1
+                prot_id = line[1:].split(None, 1)[0]
+                if prot_id in hit_ids:
+                    prot_2_replicon[prot_id] = replicon_idx
+
+    # for each replicon and query, the reported hits
+    reported = {}
+    for (target, query), domains in hits.items():
+        replicon_idx = prot_2_replicon[target]
+        seq_evalue = float(domains[0][6]) * prots_nb[replicon_idx]
+        if seq_evalue <= evalue:
+            reported.setdefault((replicon_idx, query), []).append((seq_evalue, domains))
+
+    outputs = {}
+    for (replicon_idx, query), query_hits in reported.items():
+        dom_z = len(query_hits)
+        z = prots_nb[replicon_idx]
+        for seq_evalue, domains in query_hits:
+            for fields in domains:
+                p_value = float(fields[12])
+                if p_value * dom_z > dom_evalue:
+                    continue
+                fields = list(fields)
+                fields[6] = "{:9.2g}".format(seq_evalue)
+                fields[11] = "{:9.2g}".format(p_value * dom_z)
+                fields[12] = "{:9.2g}".format(p_value * z)
+                out_path = replicons[replicon_idx][2][query_2_model[query]]
+                outputs.setdefault(out_path, []).append(' '.join(fields) + '\n')
+
+    for (_, _, hmm_outs_path), prot_nb in zip(replicons, prots_nb):
+        if not prot_nb:
+            # let find_integrase report the missing or empty protein file
+            continue
+        for out_path in hmm_outs_path.values():
+            with open(out_path, 'w') as out:
+                out.writelines(header)
+                out.writelines(outputs.get(out_path, []))
@@ -27,6 +27,7 @@
 ####################################################################################
 
 import os
+import functools
 import colorlog
 import numpy as np
 import pandas as pd
@@ -42,11 +43,456 @@ from Bio import motifs
 
 from .hmm import read_hmm
 from .infernal import read_infernal
-from .attc import search_attc
+from .attc import cluster_attc
+from .pattern import find_all
 
 _log = colorlog.getLogger(__name__)
 
 
+def _with_reverse_complement(motif):
+    """
+    :param motif: a motif
+    :type motif: :class:`Bio.motifs.Motif` object
+    :return: the motif and its reverse complement (which has the same name)
+    :rtype: tuple of 2 :class:`Bio.motifs.Motif` objects
+    """
+    reverse = motif.reverse_complement()
+    reverse.name = motif.name
+    return motif, reverse
+
+
+@functools.lru_cache(maxsize=None)
+def intI_promoter_motifs():
+    """
+    The motifs of the promoters of the integrases, they are built once per process
+    and shared by all integrons.
+
+    :return: the motifs and their reverse complement
+    :rtype: tuple of tuples (:class:`Bio.motifs.Motif` motif, :class:`Bio.motifs.Motif` reverse complement)
+    """
+    # PintI1
+    p_intI1 = motifs.create([Seq.Seq("TTGCTGCTTGGATGCCCGAGGCATAGACTGTACA")])
+    p_intI1.name = "P_intI1"
+
+    # PintI2
+    # Not known
+
+    # PintI3
+    # Not known
+
+    return (_with_reverse_complement(p_intI1),)
+
+
+@functools.lru_cache(maxsize=None)
+def pc_promoter_motifs(model_dir):
+    """
+    The motifs of the promoters of the cassettes, they are built once per process (and per models directory)
+    and shared by all integrons.
+
+    :param str model_dir: the directory containing the file of the variants of Pc_intI1 (variants_Pc_intI1.fst)
+    :return: the motifs and their reverse complement
+    :rtype: tuple of tuples (:class:`Bio.motifs.Motif` motif, :class:`Bio.motifs.Motif` reverse complement)
+    """
+    # Pc-int1
+    motifs_Pc = []
+
+    pc = SeqIO.parse(os.path.join(model_dir, "variants_Pc_intI1.fst"), "fasta")
+    pseq = [i for i in pc]
+    d = {len(i): [] for i in pseq}
+    _ = [d[len(i)].append(i.seq.upper()) for i in pseq]
+    for k, i in d.items():
+        motifs_Pc.append(motifs.create(i))
+        motifs_Pc[-1].name = "Pc_int1"
+
+    # Pc-int2
+    # Not known
+
+    # Pc-int3
+
+    pc_intI3 = motifs.create([Seq.Seq("TAGACATAAGCTTTCTCGGTCTGTAGGCTGTAATG"),
+                              Seq.Seq("TAGACATAAGCTTTCTCGGTCTGTAGGATGTAATG")])
+    pc_intI3.name = "Pc_int3"
+    motifs_Pc.append(pc_intI3)
+    return tuple(_with_reverse_complement(m) for m in motifs_Pc)
+
+
+@functools.lru_cache(maxsize=None)
+def attI_motifs():
+    """
+    The motifs of the attI sites, they are built once per process and shared by all integrons.
+
+    :return: the motifs and their reverse complement
+    :rtype: tuple of tuples (:class:`Bio.motifs.Motif` motif, :class:`Bio.motifs.Motif` reverse complement)
+    """
+    # attI1
+    instances_attI1 = [Seq.Seq('TGATGTTATGGAGCAGCAACGATGTTACGCAGCAGGGCAGTCGCCCTAAAACAAAGTT')]
+    attI1 = motifs.create(instances_attI1)
+    attI1.name = "attI1"
+
+    # attI2
+    instances_attI2 = [Seq.Seq('TTAATTAACGGTAAGCATCAGCGGGTGACAAAACGAGCATGCTTACTAATAAAATGTT')]
+    attI2 = motifs.create(instances_attI2)
+    attI2.name = "attI2"
+
+    # attI3
+    instances_attI3 = [Seq.Seq('CTTTGTTTAACGACCACGGTTGTGGGTATCCGGTGTTTGGTCAGATAAACCACAAGTT')]
+    attI3 = motifs.create(instances_attI3)
+    attI3.name = "attI3"
+
+    return tuple(_with_reverse_complement(m) for m in (attI1, attI2, attI3))
+
+
+def _instances(motifs_with_rc):
+    """
+    :param motifs_with_rc: the motifs and their reverse complement (see :func:`pc_promoter_motifs`)
+    :type motifs_with_rc: tuple of tuples (:class:`Bio.motifs.Motif` motif, :class:`Bio.motifs.Motif` reverse complement)
+    :return: the instances of all the motifs, in both orientations
+    :rtype: set of str
+    """
+    return {str(instance) for motif_and_rc in motifs_with_rc for motif in motif_and_rc for instance in motif.instances}
+
+
+def _motifs_positions(motifs_with_rc, hits):
+    """
+    A motif is found at most once at each position, even if several of its instances match.
+
+    :param motifs_with_rc: the motifs and their reverse complement (see :func:`pc_promoter_motifs`)
+    :type motifs_with_rc: tuple of tuples (:class:`Bio.motifs.Motif` motif, :class:`Bio.motifs.Motif` reverse complement)
+    :param hits: the positions of the instances (see :func:`integron_finder.pattern.find_all`)
+    :type hits: dict {str instance: :class:`numpy.ndarray` of int}
+    :return: the sorted start positions of each motif, for the motif (orientation 0)
+             and for its reverse complement (orientation 1)
+    :rtype: dict {(int motif index, int orientation): :class:`numpy.ndarray` of int}
+    """
+    return {(motif_idx, orientation): np.unique(np.concatenate([hits[str(instance)]
+                                                                for instance in motif.instances]))
+            for motif_idx, motif_and_rc in enumerate(motifs_with_rc)
+            for orientation, motif in enumerate(motif_and_rc)}
+
+
+def search_motifs(motifs_with_rc, seq):
+    """
+    Search all the motifs, in both orientations, in one pass on the sequence
+    (see :func:`integron_finder.pattern.find_all`).
+    As :meth:`Bio.motifs.Instances.search` a motif is found at most once at each position,
+    even if several of its instances match.
+
+    :param motifs_with_rc: the motifs and their reverse complement (see :func:`pc_promoter_motifs`)
+    :type motifs_with_rc: tuple of tuples (:class:`Bio.motifs.Motif` motif, :class:`Bio.motifs.Motif` reverse complement)
+    :param seq: the sequence to search
+    :type seq: :class:`Bio.Seq.Seq` or str
+    :return: the sorted start positions of each motif, for the motif (orientation 0)
+             and for its reverse complement (orientation 1)
+    :rtype: dict {(int motif index, int orientation): list of int}
+    """
+    positions = _motifs_positions(motifs_with_rc, find_all(str(seq), _instances(motifs_with_rc)))
+    return {key: motif_pos.tolist() for key, motif_pos in positions.items() if motif_pos.size}
+
+
+class MotifsIndex:
+    """
+    The positions of all the promoter and attI motifs (see :func:`intI_promoter_motifs`,
+    :func:`pc_promoter_motifs` and :func:`attI_motifs`) in the windows of the integrons of a replicon.
+    The windows are scanned once (see :func:`integron_finder.pattern.find_all`),
+    then the motifs in the window of each integron are found by binary search.
+    """
+
+    def __init__(self, seq, model_dir, windows=None):
+        """
+        :param seq: the sequence of the replicon
+        :type seq: :class:`Bio.Seq.Seq` or str
+        :param str model_dir: the directory containing the file of the variants of Pc_intI1
+        :param windows: the windows which will be searched (see :meth:`Integron.motifs_windows`),
+                        only these windows are scanned, the whole replicon is scanned by default.
+        :type windows: list of tuples (int start, int stop, bool across the origin)
+        """
+        self.model_dir = model_dir
+        self.size = len(seq)
+        self._seq = seq
+        all_motifs = (intI_promoter_motifs(), pc_promoter_motifs(model_dir), attI_motifs())
+        if windows is None:
+            max_len = max(m.length for motifs_with_rc in all_motifs for m, _ in motifs_with_rc)
+            # the motifs which overlap the origin are searched too,
+            # for the windows which overlap the origin (see search_across_origin)
+            regions = [(0, self.size + min(max_len - 1, self.size))]
+        else:
+            regions = sorted(self._region(*window) for window in windows)
+        # the scanned regions of the replicon, the regions which overlap the origin end after the size of the replicon
+        self._regions = []
+        for start, end in regions:
+            if self._regions and start <= self._regions[-1][1]:
+                self._regions[-1][1] = max(self._regions[-1][1], end)
+            elif start < end:
+                self._regions.append([start, end])
+
+        text = str(seq)
+        instances = set().union(*(_instances(motifs_with_rc) for motifs_with_rc in all_motifs))
+        hits = {instance: [] for instance in instances}
+        for start, end in self._regions:
+            region_hits = find_all(text[start:min(end, self.size)] + text[:max(0, end - self.size)], instances)
+            for instance, positions in region_hits.items():
+                hits[instance].append((positions + start) % self.size)
+        hits = {instance: np.concatenate(positions) if positions else np.zeros(0, dtype=int)
+                for instance, positions in hits.items()}
+        # {motifs_with_rc: {(motif index, orientation): sorted positions}}
+        self._positions = {motifs_with_rc: _motifs_positions(motifs_with_rc, hits) for motifs_with_rc in all_motifs}
+
+    def _region(self, start, stop, across_origin):
+        """
+        :param int start: the start of the window
+        :param int stop: the end of the window
+        :param bool across_origin: True if the window is *seq[start:] + seq[:stop]*, False if it is *seq[start:stop]*
+        :return: the start and the end of the window on the replicon,
+                 the end is after the size of the replicon if the window overlaps the origin.
+        :rtype: tuple (int start, int end)
+        """
+        if across_origin:
+            return slice(start, None).indices(self.size)[0], self.size + slice(None, stop).indices(self.size)[1]
+        start, stop, _ = slice(start, stop).indices(self.size)
+        return start, max(start, stop)
+
+    def _is_indexed(self, start, end):
+        """
+        :param int start: the start of a window on the replicon (see :meth:`_region`)
+        :param int end: the end of a window on the replicon
+        :return: True if the window has been scanned, False otherwise
+        :rtype: bool
+        """
+        # a region which overlaps the origin covers the beginning of the replicon too
+        return any((reg_start <= start and end <= reg_end) or
+                   (reg_start <= start + self.size and end + self.size <= reg_end)
+                   for reg_start, reg_end in self._regions)
+
+    def search(self, motifs_with_rc, start, stop):
+        """
+        Find the motifs in *seq[start:stop]*, the positions are the same as if
+        :func:`search_motifs` were called on *seq[start:stop]* (start and stop are interpreted as python slice).
+        If the window has not been scanned, the motifs are searched in the window.
+
+        :param motifs_with_rc: the motifs and their reverse complement (see :func:`pc_promoter_motifs`)
+        :type motifs_with_rc: tuple of tuples (:class:`Bio.motifs.Motif` motif,
+                              :class:`Bio.motifs.Motif` reverse complement)
+        :param int start: the start of the window
+        :param int stop: the end of the window
+        :return: the sorted start positions (from the start of the window) of each motif,
+                 for the motif (orientation 0) and for its reverse complement (orientation 1)
+        :rtype: dict {(int motif index, int orientation): list of int}
+        """
+        start, stop = self._region(start, stop, False)
+        if not self._is_indexed(start, stop):
+            return search_motifs(motifs_with_rc, self._seq[start:stop])
+        return self._search(motifs_with_rc, [(start, stop, -start)])
+
+    def search_across_origin(self, motifs_with_rc, start, stop):
+        """
+        Find the motifs in *seq[start:] + seq[:stop]*, the positions are the same as if
+        :func:`search_motifs` were called on *seq[start:] + seq[:stop]*.
+        If the window has not been scanned, the motifs are searched in the window.
+
+        :param motifs_with_rc: the motifs and their reverse complement (see :func:`pc_promoter_motifs`)
+        :type motifs_with_rc: tuple of tuples (:class:`Bio.motifs.Motif` motif,
+                              :class:`Bio.motifs.Motif` reverse complement)
+        :param int start: the start of the window (before the origin)
+        :param int stop: the end of the window (after the origin)
+        :return: the sorted start positions (from the start of the window) of each motif,
+                 for the motif (orientation 0) and for its reverse complement (orientation 1)
+        :rtype: dict {(int motif index, int orientation): list of int}
+        """
+        start, end = self._region(start, stop, True)
+        stop = end - self.size
+        if not self._is_indexed(start, end):
+            return search_motifs(motifs_with_rc, self._seq[start:] + self._seq[:stop])
+        # the motifs which start before the origin may end after it
+        return self._search(motifs_with_rc, [(start, end, -start), (0, stop, self.size - start)])
+
+    def search_window(self, motifs_with_rc, window):
+        """
+        :param motifs_with_rc: the motifs and their reverse complement (see :func:`pc_promoter_motifs`)
+        :type motifs_with_rc: tuple of tuples (:class:`Bio.motifs.Motif` motif,
+                              :class:`Bio.motifs.Motif` reverse complement)
+        :param window: the window to search (see :meth:`Integron.motifs_windows`)
+        :type window: tuple (int start, int stop, bool across the origin)
+        :return: the sorted start positions (from the start of the window) of each motif
+                 (see :meth:`search` and :meth:`search_across_origin`)
+        :rtype: dict {(int motif index, int orientation): list of int}
+        """
+        start, stop, across_origin = window
+        if across_origin:
+            return self.search_across_origin(motifs_with_rc, start, stop)
+        return self.search(motifs_with_rc, start, stop)
+
+    def _search(self, motifs_with_rc, parts):
+        """
+        :param motifs_with_rc: the motifs and their reverse complement
+        :param parts: the parts of the window, each part is the start and the end of the motifs on the replicon,
+                      and the shift to apply to their positions
+        :type parts: list of tuples (int start, int end, int shift)
+        :return: the sorted start positions (shifted) of each motif
+        :rtype: dict {(int motif index, int orientation): list of int}
+        """
+        hits = {}
+        for (motif_idx, orientation), positions in self._positions[motifs_with_rc].items():
+            motif_len = motifs_with_rc[motif_idx][orientation].length
+            found = []
+            for start, end, shift in parts:
+                first = np.searchsorted(positions, start, side='left')
+                last = np.searchsorted(positions, end - motif_len, side='right')
+                found.extend((positions[first:last] + shift).tolist())
+            if found:
+                hits[(motif_idx, orientation)] = found
+        return hits
+
+
+class _SortedPoints:
+    """
+    Points sorted by position, from which points can be removed,
+    to find the nearest remaining points of a position.
+    The removed points are skipped with "next remaining point" links (with path compression).
+    """
+
+    def __init__(self, positions):
+        """
+        :param positions: the positions of the points, a point is identified by its index in *positions*
+        :type positions: :class:`numpy.ndarray` object
+        """
+        # the points with the same position are sorted by index
+        self._order = np.argsort(positions, kind='mergesort')
+        self._rank = np.empty_like(self._order)
+        self._rank[self._order] = np.arange(len(self._order))
+        self.positions = positions[self._order]
+        self._size = len(self._order)
+        # _next[rank] is a rank >= rank, the next remaining point follows its links (size if there is none)
+        self._next = list(range(self._size + 1))
+        # _prev[rank + 1] is a rank + 1 <= rank + 1, the previous remaining point follows its links (0 if there is none)
+        self._prev = list(range(self._size + 1))
+
+    @staticmethod
+    def _find(links, item):
+        root = item
+        while links[root] != root:
+            root = links[root]
+        while links[item] != root:
+            links[item], item = root, links[item]
+        return root
+
+    def remove(self, point):
+        """
+        :param int point: the index of the point to remove
+        """
+        rank = int(self._rank[point])
+        self._next[rank] = rank + 1
+        self._prev[rank + 1] = rank
+
+    def first_after(self, position):
+        """
+        :param position: a position
+        :return: the rank of the first remaining point at or after *position*, None if there is no such point
+        """
+        rank = self._find(self._next, int(np.searchsorted(self.positions, position, side='left')))
+        return rank if rank < self._size else None
+
+    def last_before(self, position):
+        """
+        :param position: a position
+        :return: the rank of the last remaining point at or before *position*, None if there is no such point
+        """
+        rank = self._find(self._prev, int(np.searchsorted(self.positions, position, side='right'))) - 1
+        return rank if rank >= 0 else None
+
+    def lowest_point(self, rank):
+        """
+        :param int rank: the rank of a remaining point
+        :return: the lowest index of the remaining points at the same position
+        :rtype: int
+        """
+        return int(self._order[self.first_after(self.positions[rank])])
+
+
+def match_integrases_arrays(int_beg, int_end, attc_left, attc_right, replicon_size, circular, distance_threshold):
+    """
+    Match each integrase to the nearest attC array, the integrases are matched one after the other
+    and an array is matched at most once.
+
+    An integrase is matched to the array with the lowest distance between the end of the integrase
+    and the beginning of the array (array on the left) or between the end of the array and the beginning
+    of the integrase (array on the right), if this distance is lower than *distance_threshold*.
+    If several arrays are at the lowest distance, the array on the left with the lowest index is matched,
+    or if there is no such array, the array on the right with the lowest index.
+
+    The remaining arrays are kept sorted by their positions, so the nearest arrays of each integrase are found
+    by binary search, the matching is done in O((number of integrases + number of arrays) * log(number of arrays)).
+
+    :param int_beg: the beginning of each integrase
+    :type int_beg: :class:`numpy.ndarray` object
+    :param int_end: the end of each integrase
+    :type int_end: :class:`numpy.ndarray` object
+    :param attc_left: the beginning of each array (the beginning of its first attC site)
+    :type attc_left: :class:`numpy.ndarray` object
+    :param attc_right: the end of each array (the end of its last attC site)
+    :type attc_right: :class:`numpy.ndarray` object
+    :param int replicon_size: the size of the replicon
+    :param bool circular: True if the replicon is circular, the distances are computed along the replicon
+                          from the integrase to the array on the left and from the array to the integrase
+                          on the right. Otherwise the distances are absolute.
+    :param distance_threshold: the maximal distance between an integrase and its array
+    :return: the index of the array matched to each integrase, -1 for the integrases without array
+    :rtype: :class:`numpy.ndarray` object
+    """
+    matches = np.full(len(int_beg), -1, dtype=int)
+    remaining = len(attc_left)
+    if circular:
+        lefts = _SortedPoints(attc_left % replicon_size)
+        rights = _SortedPoints(attc_right % replicon_size)
+    else:
+        lefts = _SortedPoints(attc_left)
+        rights = _SortedPoints(attc_right)
+
+    def nearest(points, ranks, distance):
+        """
+        :return: the lowest distance to the points of ranks, and the lowest index of the points at this distance
+        """
+        best = None
+        for rank in ranks:
+            if rank is None:
+                continue
+            point = points.lowest_point(rank)
+            dist = distance(point)
+            if best is None or dist < best[0] or (dist == best[0] and point < best[1]):
+                best = (dist, point)
+        return best
+
+    for i in range(len(int_beg)):
+        if remaining == 0:
+            break
+        if circular:
+            # the first array after the integrase, or after the origin
+            left_rank = lefts.first_after(int_end[i] % replicon_size)
+            if left_rank is None:
+                left_rank = lefts.first_after(-np.inf)
+            left = nearest(lefts, [left_rank],
+                           lambda point: (attc_left[point] - int_end[i]) % replicon_size)
+            # the last array before the integrase, or before the origin
+            right_rank = rights.last_before(int_beg[i] % replicon_size)
+            if right_rank is None:
+                right_rank = rights.last_before(np.inf)
+            right = nearest(rights, [right_rank],
+                            lambda point: (int_beg[i] - attc_right[point]) % replicon_size)
+        else:
+            left = nearest(lefts,
+                           [lefts.last_before(int_end[i]), lefts.first_after(int_end[i])],
+                           lambda point: abs(attc_left[point] - int_end[i]))
+            right = nearest(rights,
+                            [rights.last_before(int_beg[i]), rights.first_after(int_beg[i])],
+                            lambda point: abs(int_beg[i] - attc_right[point]))
+        dist, array_idx = left if left[0] <= right[0] else right
+        if dist < distance_threshold:
+            matches[i] = array_idx
+            lefts.remove(array_idx)
+            rights.remove(array_idx)
+            remaining -= 1
+    return matches
+
+
 def find_integron(replicon, prot_db, attc_file, intI_file, phageI_file, cfg):
     """
     Function that looks for integrons given rules :
@@ -66,18 +512,28 @@ def find_integron(replicon, prot_db, attc_file, intI_file, phageI_file, cfg):
     :type prot_db: a :class:`integron_finder.prot_db.ProteinDB` object.
     :param attc_file: the output of cmsearch or the result of parsing of this file by read_infernal
     :type attc_file: path to cmsearch output or :class:`pd.Dataframe`
-    :param str intI_file: the output of hmmsearch with the integrase model
-    :param str phageI_file: the output of hmmsearch with the phage model
+    :param intI_file: the output of hmmsearch with the integrase model or the result of parsing of this file
+                      by read_hmm
+    :type intI_file: path to hmmsearch output or :class:`pd.Dataframe`
+    :param phageI_file: the output of hmmsearch with the phage model or the result of parsing of this file
+                        by read_hmm
+    :type phageI_file: path to hmmsearch output or :class:`pd.Dataframe`
     :param cfg: configuration
     :type cfg: a :class:`integron_finder.config.Config` object
     :returns: list of all integrons, be they complete or not
     :retype: list of :class:`Integron` object
     """
     if not cfg.no_proteins:
-        intI = read_hmm(replicon.id, prot_db, intI_file, cfg)
+        if isinstance(intI_file, pd.DataFrame):
+            intI = intI_file.copy()
+        else:
+            intI = read_hmm(replicon.id, prot_db, intI_file, cfg)
         intI.sort_values(["Accession_number", "pos_beg", "evalue"], inplace=True)
 
-        phageI = read_hmm(replicon.id, prot_db, phageI_file, cfg)
+        if isinstance(phageI_file, pd.DataFrame):
+            phageI = phageI_file.copy()
+        else:
+            phageI = read_hmm(replicon.id, prot_db, phageI_file, cfg)
         phageI.sort_values(["Accession_number", "pos_beg", "evalue"], inplace=True)
 
         tmp = intI[intI.ID_prot.isin(phageI.ID_prot)].copy()
@@ -109,102 +565,41 @@ def find_integron(replicon, prot_db, attc_file, intI_file, phageI_file, cfg):
                              size_min_attc=cfg.min_attc_size)
         attc.sort_values(["Accession_number", "pos_beg", "evalue"], inplace=True)
 
-    # attc_ac = list of Dataframe, each have a an array of attC
-    attc_ac = search_attc(attc, cfg.keep_palindromes, cfg.distance_threshold, len(replicon))
+    # attc_ac = the arrays of attC (see AttcArrays)
+    attc_ac = cluster_attc(attc, cfg.keep_palindromes, cfg.distance_threshold, len(replicon))
     integrons = []
 
     if not intI_ac.empty and attc_ac:
-        n_attc_array = len(attc_ac)
-        # If an array hasn't been clustered with an Integrase
-        # or if an integrase lacks an array
-        # redundant info, we could check for len(attc_ac)==0
-        # -> to remove
+        # the index of the array of each integrase, -1 if there is no array close to the integrase
+        arrays_idx = match_integrases_arrays(intI_ac.pos_beg.values, intI_ac.pos_end.values,
+                                             attc_ac.left, attc_ac.right, len(replicon),
+                                             replicon.topology == 'circ', cfg.distance_threshold)
         for i, id_int in enumerate(intI_ac.ID_prot.values):  # For each Integrase
-
-            if n_attc_array == 0:  # No more array to attribute to an integrase
-
-                integrons.append(Integron(replicon, cfg))
-                integrons[-1].add_integrase(intI_ac.pos_beg.values[i],
-                                            intI_ac.pos_end.values[i],
-                                            id_int,
-                                            int(intI_ac.strand.values[i]),
-                                            intI_ac.evalue.values[i],
-                                            intI_ac.query_name.values[i])
-
-            else:  # we still have attC and int :
-                attc_left = np.array([i_attc.pos_beg.values[0] for i_attc in attc_ac])
-                attc_right = np.array([i_attc.pos_end.values[-1] for i_attc in attc_ac])
-
-                if replicon.topology == 'circ':
-                    distances = np.array([(attc_left - intI_ac.pos_end.values[i]),
-                                          (intI_ac.pos_beg.values[i] - attc_right)]) % len(replicon)
-                else:
-                    distances = np.array([abs(attc_left - intI_ac.pos_end.values[i]),
-                                          abs(intI_ac.pos_beg.values[i] - attc_right)])
-                if attc_ac:
-                    # tmp = (distances /
-                    #       np.array([[len(aac) for aac in attc_ac]]))
-
-                    side, idx_attc = np.where(distances == distances.min())
-                    # side : 0 <=> left; 1 <=> right
-                    # index of the closest and biggest attC array to the integrase
-                    # exactly tmp = dist(cluster to integrase) / size cluster
-                    # to make a decision between 2 equally distant arrays
-                    # Usually they are on the same side but on 2 different strands
-
-                    # If they are exactly similar (same distance, same number of attC, take the first one arbitrarily
-                    # Or just flatten from idx_attc=[i] to idx_attc=i
-                    idx_attc = idx_attc[0]
-                    side = side[0]
-
-                else:
-                    idx_attc = 0
-                    side = np.argmin(distances)
-
-                if distances[side, idx_attc] < cfg.distance_threshold:
-                    integrons.append(Integron(replicon, cfg))
-                    integrons[-1].add_integrase(intI_ac.pos_beg.values[i],
-                                                intI_ac.pos_end.values[i],
-                                                id_int,
-                                                int(intI_ac.strand.values[i]),
-                                                intI_ac.evalue.values[i],
-                                                intI_ac.query_name.values[i])
-
-                    attc_tmp = attc_ac.pop(idx_attc)
-
-                    for a_tmp in attc_tmp.values:
-                        integrons[-1].add_attC(a_tmp[4],
-                                               a_tmp[5],
-                                               1 if a_tmp[6] == "+" else -1,
-                                               a_tmp[7], cfg.model_attc_name)
-                    n_attc_array -= 1
-
-                else:  # no array close to the integrase on both side
-                    integrons.append(Integron(replicon, cfg))
-                    integrons[-1].add_integrase(intI_ac.pos_beg.values[i],
-                                                intI_ac.pos_end.values[i],
-                                                id_int,
-                                                int(intI_ac.strand.values[i]),
-                                                intI_ac.evalue.values[i], intI_ac.query_name.values[i])
-
-        if n_attc_array > 0:  # after the integrase loop (<=> no more integrases)
-            for attc_array in attc_ac:
+            integrons.append(Integron(replicon, cfg))
+            integrons[-1].add_integrase(intI_ac.pos_beg.values[i],
+                                        intI_ac.pos_end.values[i],
+                                        id_int,
+                                        int(intI_ac.strand.values[i]),
+                                        intI_ac.evalue.values[i],
+                                        intI_ac.query_name.values[i])
+            if arrays_idx[i] >= 0:
+                for pos_beg, pos_end, strand, evalue in attc_ac.attc_sites(arrays_idx[i]):
+                    integrons[-1].add_attC(pos_beg, pos_end, strand, evalue, cfg.model_attc_name)
+
+        # the arrays without integrase
+        matched_arrays = set(arrays_idx[arrays_idx >= 0].tolist())
+        for attc_idx in range(len(attc_ac)):
+            if attc_idx not in matched_arrays:
                 integrons.append(Integron(replicon, cfg))
 
-                for a_tmp in attc_array.values:
-                    integrons[-1].add_attC(a_tmp[4],
-                                           a_tmp[5],
-                                           1 if a_tmp[6] == "+" else -1,
-                                           a_tmp[7], cfg.model_attc_name)
+                for pos_beg, pos_end, strand, evalue in attc_ac.attc_sites(attc_idx):
+                    integrons[-1].add_attC(pos_beg, pos_end, strand, evalue, cfg.model_attc_name)
 
     elif intI_ac.pos_end.values.size == 0 and attc_ac:  # If attC only
-        for attc_array in attc_ac:
+        for attc_idx in range(len(attc_ac)):
             integrons.append(Integron(replicon, cfg))
-            for a_tmp in attc_array.values:
-                integrons[-1].add_attC(a_tmp[4],
-                                       a_tmp[5],
-                                       1 if a_tmp[6] == "+" else -1,
-                                       a_tmp[7], cfg.model_attc_name)
+            for pos_beg, pos_end, strand, evalue in attc_ac.attc_sites(attc_idx):
+                integrons[-1].add_attC(pos_beg, pos_end, strand, evalue, cfg.model_attc_name)
 
     elif intI_ac.pos_end.values.size >= 1 and not attc_ac:  # If intI only
         for i, id_int in enumerate(intI_ac.ID_prot.values):
@@ -241,12 +636,98 @@ def find_integron(replicon, prot_db, attc_file, intI_file, phageI_file, cfg):
     return integrons
 
 
+class _ElementBuffer(object):
+    """
+    Append only columns storage for the elements of an integron.
+    The rows are accumulated in lists and converted in a DataFrame on demand.
+    """
+
+    __slots__ = ("index", "pos_beg", "pos_end", "strand", "evalue",
+                 "type_elt", "model", "distance_2attC", "annotation")
+
+    def __init__(self):
+        self.clear()
+
+    def __len__(self):
+        return len(self.pos_beg)
+
+    def clear(self):
+        """
+        remove all rows from the buffer
+        """
+        self.index = []
+        self.pos_beg = []
+        self.pos_end = []
+        self.strand = []
+        self.evalue = []
+        self.type_elt = []
+        self.model = []
+        self.distance_2attC = []
+        self.annotation = []
+
+    def append(self, index, pos_beg, pos_end, strand, evalue, type_elt, model, annotation, distance_2attC=np.nan):
+        """
+        add one element at the end of the buffer
+        """
+        self.index.append(index)
+        self.pos_beg.append(pos_beg)
+        self.pos_end.append(pos_end)
+        self.strand.append(strand)
+        self.evalue.append(evalue)
+        self.type_elt.append(type_elt)
+        self.model.append(model)
+        self.distance_2attC.append(distance_2attC)
+        self.annotation.append(annotation)
+
+    def to_frame(self, columns, dtype):
+        """
+        :param columns: the name of the columns of the DataFrame
+        :type columns: list of str
+        :param dtype: the type of each column
+        :type dtype: dict
+        :return: the elements stored in this buffer
+        :rtype: :class:`pandas.DataFrame` object
+        """
+        df = pd.DataFrame({col: getattr(self, col) for col in columns},
+                          columns=columns,
+                          index=self.index)
+        return df.astype(dtype=dtype)
+
+
+def _elements(kind, doc):
+    """
+    Build a property giving access to one kind of elements of an integron as a DataFrame.
+    The DataFrame is built lazily from the buffer of this kind of element.
+
+    :param str kind: the kind of element ('integrase', 'attC', 'promoter', 'attI', 'proteins')
+    :param str doc: the docstring of the property
+    """
+    def getter(self):
+        return self._get_elements(kind)
+
+    def setter(self, df):
+        self._set_elements(kind, df)
+
+    return property(getter, setter, doc=doc)
+
+
 class Integron(object):
     """Integron object represents an object composed of an integrase, attC sites and gene cassettes.
     Each element is characterized by their coordinates in the replicon, the strand (+ or -),
     the ID of the gene (except attC).
     The object Integron is also characterized by the ID of the replicon."""
 
+    _kinds = ("integrase", "attC", "promoter", "attI", "proteins")
+
+    integrase = _elements("integrase", "The integrase of this integron")
+    attC = _elements("attC", "The attC sites of this integron")
+    promoter = _elements("promoter", "The promoters found in this integron")
+    attI = _elements("attI", "The attI sites found in this integron")
+    proteins = _elements("proteins", "The proteins included in this integron")
+
+    dist_prom = 500  # pb distance from edge of the element for which we seek promoter
+    dist_atti = 500  # pb distance from edge of the element for which we seek attI
+
     def __init__(self, replicon, cfg):
         """
         :param replicon: The replicon where integrons has been found
@@ -266,22 +747,68 @@ class Integron(object):
                        "model": "str",
                        "distance_2attC": "float",
                        "annotation": "str"}
-        self.integrase = pd.DataFrame(columns=self._columns)
-        self.integrase = self.integrase.astype(dtype=self._dtype)
+        self._buffers = {kind: _ElementBuffer() for kind in self._kinds}
+        self._frames = {kind: self._empty_frame() for kind in self._kinds}
+
+    def _empty_frame(self):
+        df = pd.DataFrame(columns=self._columns)
+        return df.astype(dtype=self._dtype)
 
-        self.attC = pd.DataFrame(columns=self._columns)
-        self.attC = self.attC.astype(dtype=self._dtype)
+    def _get_elements(self, kind):
+        """
+        :param str kind: the kind of element
+        :return: the elements of *kind*, the rows still in the buffer are added to the DataFrame
+        :rtype: :class:`pandas.DataFrame` object
+        """
+        buffer = self._buffers[kind]
+        if len(buffer):
+            new_elts = buffer.to_frame(self._columns, self._dtype)
+            buffer.clear()
+            frame = self._frames[kind]
+            frame = new_elts if frame.empty else pd.concat([frame, new_elts])
+            if kind == "attC":
+                frame = self._set_attC_distances(frame)
+            self._frames[kind] = frame
+        return self._frames[kind]
+
+    def _set_elements(self, kind, df):
+        """
+        Replace the elements of *kind* by *df*
 
-        self.promoter = pd.DataFrame(columns=self._columns)
-        self.promoter = self.promoter.astype(dtype=self._dtype)
+        :param str kind: the kind of element
+        :param df: the new elements
+        :type df: :class:`pandas.DataFrame` object
+        """
+        self._buffers[kind].clear()
+        self._frames[kind] = df
 
-        self.attI = pd.DataFrame(columns=self._columns)
-        self.attI = self.attI.astype(dtype=self._dtype)
+    def _set_attC_distances(self, attC):
+        """
+        compute the index and the distance between consecutive attC sites.
 
-        self.proteins = pd.DataFrame(columns=self._columns)
-        self.proteins = self.proteins.astype(dtype=self._dtype)
+        :param attC: the attC sites
+        :type attC: :class:`pandas.DataFrame` object
+        :return: the attC with index ('attc_001', 'attc_002', ...) and the distance_2attC column updated
+        :rtype: :class:`pandas.DataFrame` object
+        """
+        pos_beg = attC.pos_beg.values
+        pos_end = attC.pos_end.values
+        distances = np.empty(len(attC), dtype=float)
+        distances[0] = np.nan
+        distances[1:] = (pos_beg[1:] - pos_end[:-1]) % self.replicon_size
+        attC["distance_2attC"] = distances
+        attC.index = ["attc_%03i" % (j + 1) for j in range(len(attC))]
+        return attC
 
-        self.sizes_cassettes = None
+    @property
+    def sizes_cassettes(self):
+        """
+        :return: the distances between consecutive attC sites, None if there is no attC site
+        :rtype: list of float
+        """
+        if not self.has_attC():
+            return None
+        return list(self.attC.distance_2attC)
 
     @property
     def dtype(self):
@@ -298,20 +825,10 @@ class Integron(object):
         :param str model: the name of integrase model (for instance intersection_tyr_intI)
         """
 
-        if not self.integrase.empty:
+        if self.has_integrase():
             raise RuntimeError("add_integrase should be called once.")
-        tmp_df = pd.DataFrame(columns=self._columns)
-        tmp_df = tmp_df.astype(dtype=self._dtype)
-        tmp_df["pos_beg"] = [pos_beg_int]
-        tmp_df["pos_end"] = [pos_end_int]
-        tmp_df["strand"] = [strand_int]
-        tmp_df["evalue"] = [evalue]
-        tmp_df["type_elt"] = "protein"
-        tmp_df["annotation"] = "intI"
-        tmp_df["model"] = [model]
-        tmp_df.index = [id_int]
-        tmp_df["distance_2attC"] = [np.nan]
-        self.integrase = self.integrase.append(tmp_df)
+        self._buffers["integrase"].append(id_int, pos_beg_int, pos_end_int, strand_int, evalue,
+                                          "protein", model, "intI")
 
 
     def add_attC(self, pos_beg_attC, pos_end_attC, strand, evalue, model):
@@ -323,26 +840,9 @@ class Integron(object):
         :param float evalue: the evalue associated to this attc site
         :param str model: the name of attc model (for instance attc4)
         """
-        tmp_df = pd.DataFrame(columns=self._columns)
-        tmp_df = tmp_df.astype(dtype=self._dtype)
-        tmp_df["pos_beg"] = [pos_beg_attC]
-        tmp_df["pos_end"] = [pos_end_attC]
-        tmp_df["strand"] = [strand]
-        tmp_df["evalue"] = [evalue]
-        tmp_df["type_elt"] = "attC"
-        tmp_df["annotation"] = "attC"
-        tmp_df["model"] = [model]
-        self.attC = self.attC.append(tmp_df, ignore_index=True)
-        attC_len = len(self.attC)
-        if attC_len < 2:
-            self.sizes_cassettes = [np.nan]
-        else:
-            self.sizes_cassettes.append((self.attC.iloc[attC_len - 1].pos_beg -
-                                         self.attC.iloc[attC_len - 2].pos_end) % len(self.replicon))
-        self.attC["distance_2attC"] = self.sizes_cassettes
-
-        # self.attC.sort_values(["pos_beg"], inplace = True)G669
-        self.attC.index = ["attc_%03i" % int(j + 1) for j in self.attC.index]
+        # the index and the distance_2attC are computed when the DataFrame is built
+        self._buffers["attC"].append(None, pos_beg_attC, pos_end_attC, strand, evalue,
+                                     "attC", model, "attC")
 
 
     def type(self):
@@ -362,88 +862,13 @@ class Integron(object):
             return "CALIN"
 
 
-    def add_promoter(self):
+    def _array_bounds(self):
         """
-        Looks for known promoters if they exists within your integrons element.
-        It takes 1s for about 13kb.
+        :return: the bounds of the array of cassettes (between the integrase and the attC sites for a complete integron)
+                 and its strand ("both" for an In0)
+        :rtype: tuple (int left, int right, int or str strand)
         """
-        dist_prom = 500  # pb distance from edge of the element for which we seek promoter
-
-        ######## Promoter of integrase #########
-
-        if self.has_integrase():
-            # PintI1
-            p_intI1 = motifs.create([Seq.Seq("TTGCTGCTTGGATGCCCGAGGCATAGACTGTACA")])
-            p_intI1.name = "P_intI1"
-
-            # PintI2
-            # Not known
-
-            # PintI3
-            # Not known
-
-            motifs_Pint = [p_intI1]
-
-            seq_p_int = self.replicon.seq[int(self.integrase.pos_beg.min()) - dist_prom:
-                                          int(self.integrase.pos_end.max()) + dist_prom]
-
-            for m in motifs_Pint:
-                if self.integrase.strand.values[0] == 1:
-                    generator_motifs = m.instances.search(seq_p_int[:dist_prom])
-                    for pos, s in generator_motifs:
-                        tmp_df = pd.DataFrame(columns=self._columns)
-                        tmp_df = tmp_df.astype(dtype=self._dtype)
-                        tmp_df["pos_beg"] = [self.integrase.pos_beg.values[0] - dist_prom + pos]
-                        tmp_df["pos_end"] = [self.integrase.pos_beg.values[0] - dist_prom + pos + len(s)]
-                        tmp_df["strand"] = [self.integrase.strand.values[0]]
-                        tmp_df["evalue"] = [np.nan]
-                        tmp_df["type_elt"] = "Promoter"
-                        tmp_df["annotation"] = "Pint_%s" %(m.name[-1])
-                        tmp_df["model"] = "NA"
-                        tmp_df.index = [m.name]
-                        tmp_df["distance_2attC"] = [np.nan]
-                        self.promoter = self.promoter.append(tmp_df)
-                else:
-                    generator_motifs = m.instances.reverse_complement().search(seq_p_int[-dist_prom:])
-                    for pos, s in generator_motifs:
-                        tmp_df = pd.DataFrame(columns=self._columns)
-                        tmp_df = tmp_df.astype(dtype=self._dtype)
-                        tmp_df["pos_beg"] = [self.integrase.pos_end.max() + pos]
-                        tmp_df["pos_end"] = [self.integrase.pos_end.max() + pos + len(s)]
-                        tmp_df["strand"] = [self.integrase.strand.values[0]]
-                        tmp_df["evalue"] = [np.nan]
-                        tmp_df["type_elt"] = "Promoter"
-                        tmp_df["annotation"] = "Pint_%s" % (m.name[-1])
-                        tmp_df["model"] = "NA"
-                        tmp_df.index = [m.name]
-                        tmp_df["distance_2attC"] = [np.nan]
-                        self.promoter = self.promoter.append(tmp_df)
-
-        ######## Promoter of K7 #########
-
-        # Pc-int1
-        motifs_Pc = []
-
-        pc = SeqIO.parse(os.path.join(self.cfg.model_dir, "variants_Pc_intI1.fst"), "fasta")
-        pseq = [i for i in pc]
-        d = {len(i): [] for i in pseq}
-        _ = [d[len(i)].append(i.seq.upper()) for i in pseq]
-        for k, i in d.items():
-            motifs_Pc.append(motifs.create(i))
-            motifs_Pc[-1].name = "Pc_int1"
-
-        # Pc-int2
-        # Not known
-
-        # Pc-int3
-
-        pc_intI3 = motifs.create([Seq.Seq("TAGACATAAGCTTTCTCGGTCTGTAGGCTGTAATG"),
-                                  Seq.Seq("TAGACATAAGCTTTCTCGGTCTGTAGGATGTAATG")])
-        pc_intI3.name = "Pc_int3"
-        motifs_Pc.append(pc_intI3)
-
         if self.type() == "complete":
-
             if ((self.attC.pos_beg.values[0] - self.integrase.pos_end.values[0]) % self.replicon_size >
                     (self.integrase.pos_beg.values[0] - self.attC.pos_end.values[-1]) % self.replicon_size):
                 # if integrase after attcs (on the right)
@@ -464,112 +889,141 @@ class Integron(object):
             left = int(self.attC.pos_beg.values[0])
             right = int(self.attC.pos_end.values[-1])
             strand_array = self.attC.strand.unique()[0]
+        return left, right, strand_array
+
+    def _array_window(self, dist):
+        """
+        :param int dist: the number of bases searched on both sides of the array
+        :return: the window around the array of cassettes (see :meth:`_array_bounds`)
+        :rtype: tuple (int start, int stop, bool across the origin)
+        """
+        left, right, _ = self._array_bounds()
+        return left - dist, right + dist, left >= right
 
-        if left < right:
-            seq_Pc = self.replicon.seq[left - dist_prom:right + dist_prom]
+    def _pint_window(self):
+        """
+        :return: the window where the promoter of the integrase is searched,
+                 the first (or the last on the reverse strand) dist_prom bases around the integrase
+        :rtype: tuple (int start, int stop, bool across the origin)
+        """
+        replicon_window = slice(int(self.integrase.pos_beg.min()) - self.dist_prom,
+                                int(self.integrase.pos_end.max()) + self.dist_prom)
+        p_int_start, p_int_stop, _ = replicon_window.indices(self.replicon_size)
+        p_int_stop = max(p_int_start, p_int_stop)
+        if self.integrase.strand.values[0] == 1:
+            return p_int_start, min(p_int_stop, p_int_start + self.dist_prom), False
         else:
-            seq_Pc1 = self.replicon.seq[left - dist_prom:self.replicon_size]
-            seq_Pc2 = self.replicon.seq[:right + dist_prom]
-            seq_Pc = seq_Pc1 + seq_Pc2
+            return max(p_int_start, p_int_stop - self.dist_prom), p_int_stop, False
 
-        for m in motifs_Pc:
-            if strand_array == 1:
-                mot = [m]
-            elif strand_array == "both":
-                mot = [m.reverse_complement(), m]
-            else:
-                mot = [m.reverse_complement()]
-
-            for sa, mo in enumerate(mot):
-                for pos, s in mo.instances.search(seq_Pc):
-                    tmp_df = pd.DataFrame(columns=self._columns)
-                    tmp_df = tmp_df.astype(dtype=self._dtype)
-                    tmp_df["pos_beg"] = [(left - dist_prom + pos) % self.replicon_size]
-                    tmp_df["pos_end"] = [(left - dist_prom + pos + len(s)) % self.replicon_size]
-                    tmp_df["strand"] = [strand_array] if strand_array != "both" else [sa * 2 - 1]
-                    tmp_df["evalue"] = [np.nan]
-                    tmp_df["type_elt"] = "Promoter"
-                    tmp_df["annotation"] = "Pc_%s" % (m.name[-1])
-                    tmp_df["model"] = "NA"
-                    tmp_df.index = [m.name]
-                    tmp_df["distance_2attC"] = [np.nan]
-                    self.promoter = self.promoter.append(tmp_df)
-
-
-    def add_attI(self):
+    def motifs_windows(self):
         """
-        Looking for Att1 sites and add them to this integron.
+        :return: the windows of the replicon where :meth:`add_promoter` and :meth:`add_attI` search the motifs
+        :rtype: list of tuples (int start, int stop, bool across the origin)
         """
-        dist_atti = 500
+        windows = [self._array_window(self.dist_prom), self._array_window(self.dist_atti)]
+        if self.has_integrase():
+            windows.append(self._pint_window())
+        return windows
 
-        # attI1
-        instances_attI1 = [Seq.Seq('TGATGTTATGGAGCAGCAACGATGTTACGCAGCAGGGCAGTCGCCCTAAAACAAAGTT')]
-        attI1 = motifs.create(instances_attI1)
-        attI1.name = "attI1"
+    def add_promoter(self, motifs_index=None):
+        """
+        Looks for known promoters if they exists within your integrons element.
+        It takes 1s for about 13kb.
 
-        # attI2
-        instances_attI2 = [Seq.Seq('TTAATTAACGGTAAGCATCAGCGGGTGACAAAACGAGCATGCTTACTAATAAAATGTT')]
-        attI2 = motifs.create(instances_attI2)
-        attI2.name = "attI2"
+        :param motifs_index: the motifs of the windows of the integrons of the replicon (see :meth:`motifs_windows`),
+                             by default the windows of this integron are scanned.
+        :type motifs_index: :class:`MotifsIndex` object
+        """
+        dist_prom = self.dist_prom
+        motifs_Pc = pc_promoter_motifs(self.cfg.model_dir)
+        pc_window = self._array_window(dist_prom)
+        windows = [pc_window]
+        if self.has_integrase():
+            pint_window = self._pint_window()
+            windows.append(pint_window)
+        if motifs_index is None:
+            motifs_index = MotifsIndex(self.replicon.seq, self.cfg.model_dir, windows)
 
-        # attI3
-        instances_attI3 = [Seq.Seq('CTTTGTTTAACGACCACGGTTGTGGGTATCCGGTGTTTGGTCAGATAAACCACAAGTT')]
-        attI3 = motifs.create(instances_attI3)
-        attI3.name = "attI3"
+        ######## Promoter of integrase #########
 
-        motif_attI = [attI1, attI2, attI3]
+        if self.has_integrase():
+            motifs_Pint = intI_promoter_motifs()
+            hits = motifs_index.search_window(motifs_Pint, pint_window)
+            for m_idx, (m, m_rc) in enumerate(motifs_Pint):
+                if self.integrase.strand.values[0] == 1:
+                    for pos in hits.get((m_idx, 0), []):
+                        self._buffers["promoter"].append(m.name,
+                                                         self.integrase.pos_beg.values[0] - dist_prom + pos,
+                                                         self.integrase.pos_beg.values[0] - dist_prom + pos + m.length,
+                                                         self.integrase.strand.values[0],
+                                                         np.nan,
+                                                         "Promoter", "NA", "Pint_%s" % (m.name[-1]))
+                else:
+                    for pos in hits.get((m_idx, 1), []):
+                        self._buffers["promoter"].append(m.name,
+                                                         self.integrase.pos_end.max() + pos,
+                                                         self.integrase.pos_end.max() + pos + m.length,
+                                                         self.integrase.strand.values[0],
+                                                         np.nan,
+                                                         "Promoter", "NA", "Pint_%s" % (m.name[-1]))
 
-        if self.type() == "complete":
-            if ((self.attC.pos_beg.values[0] - self.integrase.pos_end.values[0]) % self.replicon_size >
-                    (self.integrase.pos_beg.values[0] - self.attC.pos_end.values[-1]) % self.replicon_size):
-                # if integrase after attcs (on the right)
+        ######## Promoter of K7 #########
 
-                left = int(self.attC.pos_end.values[-1])
-                right = int(self.integrase.pos_beg.values[0])
+        left, _, strand_array = self._array_bounds()
+        hits = motifs_index.search_window(motifs_Pc, pc_window)
+        for m_idx, (m, m_rc) in enumerate(motifs_Pc):
+            # the orientations to report: 0 for the motif, 1 for its reverse complement
+            if strand_array == 1:
+                orientations = [0]
+            elif strand_array == "both":
+                orientations = [1, 0]
             else:
-                left = int(self.integrase.pos_end.values[-1])
-                right = int(self.attC.pos_beg.values[0])
-            strand_array = self.attC.strand.unique()[0]
+                orientations = [1]
 
-        elif self.type() == "In0":
-            left = int(self.integrase.pos_beg)
-            right = int(self.integrase.pos_end)
-            strand_array = "both"
-        elif self.type() == "CALIN":
-            left = int(self.attC.pos_beg.values[0])
-            right = int(self.attC.pos_end.values[-1])
-            strand_array = self.attC.strand.unique()[0]
+            for sa, orientation in enumerate(orientations):
+                for pos in hits.get((m_idx, orientation), []):
+                    self._buffers["promoter"].append(m.name,
+                                                     (left - dist_prom + pos) % self.replicon_size,
+                                                     (left - dist_prom + pos + m.length) % self.replicon_size,
+                                                     strand_array if strand_array != "both" else sa * 2 - 1,
+                                                     np.nan,
+                                                     "Promoter", "NA", "Pc_%s" % (m.name[-1]))
 
-        if left < right:
-            seq_attI = self.replicon.seq[left - dist_atti:right + dist_atti]
-        else:
-            seq_attI1 = self.replicon.seq[left - dist_atti:self.replicon_size]
-            seq_attI2 = self.replicon.seq[:right + dist_atti]
-            seq_attI = seq_attI1 + seq_attI2
 
-        for m in motif_attI:
+    def add_attI(self, motifs_index=None):
+        """
+        Looking for Att1 sites and add them to this integron.
+
+        :param motifs_index: the motifs of the windows of the integrons of the replicon (see :meth:`motifs_windows`),
+                             by default the window of this integron is scanned.
+        :type motifs_index: :class:`MotifsIndex` object
+        """
+        dist_atti = self.dist_atti
+
+        motif_attI = attI_motifs()
 
+        left, _, strand_array = self._array_bounds()
+        window = self._array_window(dist_atti)
+        if motifs_index is None:
+            motifs_index = MotifsIndex(self.replicon.seq, self.cfg.model_dir, [window])
+        hits = motifs_index.search_window(motif_attI, window)
+        for m_idx, (m, m_rc) in enumerate(motif_attI):
+            # the orientations to report: 0 for the motif, 1 for its reverse complement
             if strand_array == 1:
-                mot = [m]
+                orientations = [0]
             elif strand_array == "both":
-                mot = [m.reverse_complement(), m]
+                orientations = [1, 0]
             else:
-                mot = [m.reverse_complement()]
-
-            for sa, mo in enumerate(mot):
-                for pos, s in mo.instances.search(seq_attI):
-                    tmp_df = pd.DataFrame(columns=self._columns)
-                    tmp_df = tmp_df.astype(dtype=self._dtype)
-                    tmp_df["pos_beg"] = [(left - dist_atti + pos) % self.replicon_size]
-                    tmp_df["pos_end"] = [(left - dist_atti + pos + len(s)) % self.replicon_size]
-                    tmp_df["strand"] = [strand_array] if strand_array != "both" else [sa * 2 - 1]
-                    tmp_df["evalue"] = [np.nan]
-                    tmp_df["type_elt"] = "attI"
-                    tmp_df["annotation"] = "attI_%s" % (m.name[-1])
-                    tmp_df["model"] = "NA"
-                    tmp_df.index = [m.name]
-                    tmp_df["distance_2attC"] = [np.nan]
-                    self.attI = self.attI.append(tmp_df)
+                orientations = [1]
+
+            for sa, orientation in enumerate(orientations):
+                for pos in hits.get((m_idx, orientation), []):
+                    self._buffers["attI"].append(m.name,
+                                                 (left - dist_atti + pos) % self.replicon_size,
+                                                 (left - dist_atti + pos + m.length) % self.replicon_size,
+                                                 strand_array if strand_array != "both" else sa * 2 - 1,
+                                                 np.nan,
+                                                 "attI", "NA", "attI_%s" % (m.name[-1]))
 
 
     def add_proteins(self, prot_db):
@@ -594,31 +1048,16 @@ class Integron(object):
             window_start = attc_start - 200
             window_end = attc_end + 200
 
-        for prot_id in prot_db:
-            prot_attr = prot_db.get_description(prot_id)
-
-            s_int = (window_end - window_start) % self.replicon_size
-
-            if ((window_end - prot_attr.stop) % self.replicon_size < s_int) or \
-                    ((prot_attr.start - window_start) % self.replicon_size < s_int):
-                # We keep proteins (<--->) if start (<) and end (>) follows that scheme:
-                #
-                # ok:            <--->         <--->
-                # ok:  <--->                                    <--->
-                #          ^ 200pb v                    v 200pb ^
-                #                  |------integron------|
-                #                window_start                 fin
-
-                prot_annot = "protein"
-                prot_evalue = np.nan
-                prot_model = "NA"
-
-                self.proteins.loc[prot_attr.id] = [prot_attr.start, prot_attr.stop, prot_attr.strand, prot_evalue,
-                                                   "protein", prot_model, np.nan, prot_annot]
-            intcols = ["pos_beg", "pos_end", "strand"]
-            floatcols = ["evalue", "distance_2attC"]
-            self.proteins[intcols] = self.proteins[intcols].astype(int)
-            self.proteins[floatcols] = self.proteins[floatcols].astype(float)
+        # We keep proteins (<--->) if start (<) and end (>) follows that scheme:
+        #
+        # ok:            <--->         <--->
+        # ok:  <--->                                    <--->
+        #          ^ 200pb v                    v 200pb ^
+        #                  |------integron------|
+        #                window_start                 fin
+        for prot_attr in prot_db.proteins_in_window(window_start, window_end):
+            self._buffers["proteins"].append(prot_attr.id, prot_attr.start, prot_attr.stop, prot_attr.strand,
+                                             np.nan, "protein", "NA", "protein")
 
 
     def describe(self):
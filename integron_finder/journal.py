@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+
+####################################################################################
+# Integron_Finder - Integron Finder aims at detecting integrons in DNA sequences   #
+# by finding particular features of the integron:                                  #
+#   - the attC sites                                                               #
+#   - the integrase                                                                #
+#   - and when possible attI site and promoters.                                   #
+#                                                                                  #
+# Authors: Jean Cury, Bertrand Neron, Eduardo PC Rocha                             #
+# Copyright (c) 2015 - 2018  Institut Pasteur, Paris and CNRS.                     #
+# See the COPYRIGHT file for details                                               #
+#                                                                                  #
+# integron_finder is free software: you can redistribute it and/or modify          #
+# it under the terms of the GNU General Public License as published by             #
+# the Free Software Foundation, either version 3 of the License, or                #
+# (at your option) any later version.                                              #
+#                                                                                  #
+# integron_finder is distributed in the hope that it will be useful,               #
+# but WITHOUT ANY WARRANTY; without even the implied warranty of                   #
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the                    #
+# GNU General Public License for more details.                                     #
+#                                                                                  #
+# You should have received a copy of the GNU General Public License                #
+# along with this program (COPYING file).                                          #
+# If not, see <http://www.gnu.org/licenses/>.                                      #
+####################################################################################
+
+
+import os
+import json
+
+import colorlog
+
+_log = colorlog.getLogger(__name__)
+
+
+class RunJournal:
+    """
+    The journal of a run records the replicons analysed, with the paths of their results,
+    so a run which has been interrupted can be resumed without analysing them again.
+
+    The journal is a text file, the first line describes the run, each following line a replicon::
+
+        {"fingerprint": "<the fingerprint of the parameters of the run>"}
+        {"replicon": "<replicon id>", "integrons": "<path>", "summary": "<path>"}
+        ...
+
+    The lines are appended when each replicon analysis ends, by the process which analysed it.
+    """
+
+    def __init__(self, path, fingerprint):
+        """
+        :param str path: the path of the journal file
+        :param str fingerprint: the fingerprint of the parameters which change the results
+                                (see :attr:`integron_finder.config.Config.fingerprint`)
+        """
+        self.path = path
+        self.fingerprint = fingerprint
+
+    def start(self):
+        """
+        Start a new journal, the previous one (if any) is overwritten.
+        """
+        with open(self.path, 'w') as journal:
+            journal.write(json.dumps({"fingerprint": self.fingerprint}) + '\n')
+
+    def record(self, replicon_id, integron_file, summary_file):
+        """
+        Record that a replicon has been analysed.
+
+        :param str replicon_id: the replicon id
+        :param str integron_file: the path of the integrons file of the replicon ('' if it was skipped)
+        :param str summary_file: the path of the summary file of the replicon ('' if it was skipped)
+        """
+        line = json.dumps({"replicon": replicon_id, "integrons": integron_file, "summary": summary_file}) + '\n'
+        # the line is written with one write call in append mode,
+        # so the lines written by several processes are not mixed
+        fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT)
+        try:
+            os.write(fd, line.encode())
+        finally:
+            os.close(fd)
+
+    def done(self):
+        """
+        :return: the replicons analysed by a previous run with the same parameters,
+                 for which the results are still on the disk.
+        :rtype: dict {str replicon_id: (str integron_file, str summary_file)}
+        """
+        done = {}
+        if not os.path.exists(self.path):
+            return done
+        with open(self.path) as journal:
+            lines = journal.readlines()
+        try:
+            header = json.loads(lines[0])
+        except (IndexError, ValueError):
+            _log.warning("The journal {} is not readable, all replicons will be analysed".format(self.path))
+            return done
+        if header.get("fingerprint") != self.fingerprint:
+            _log.warning("The journal {} was written by a run with other parameters, "
+                         "all replicons will be analysed".format(self.path))
+            return done
+        for line in lines[1:]:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                # the last line may be truncated if the run has been killed while writing it
+                continue
+            results = (entry["integrons"], entry["summary"])
+            if all(os.path.exists(path) for path in results if path):
+                done[entry["replicon"]] = results
+        return done
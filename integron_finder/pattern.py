@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+
+####################################################################################
+# Integron_Finder - Integron Finder aims at detecting integrons in DNA sequences   #
+# by finding particular features of the integron:                                  #
+#   - the attC sites                                                               #
+#   - the integrase                                                                #
+#   - and when possible attI site and promoters.                                   #
+#                                                                                  #
+# Authors: Jean Cury, Bertrand Neron, Eduardo PC Rocha                             #
+# Copyright (c) 2015 - 2018  Institut Pasteur, Paris and CNRS.                     #
+# See the COPYRIGHT file for details                                               #
+#                                                                                  #
+# integron_finder is free software: you can redistribute it and/or modify          #
+# it under the terms of the GNU General Public License as published by             #
+# the Free Software Foundation, either version 3 of the License, or                #
+# (at your option) any later version.                                              #
+#                                                                                  #
+# integron_finder is distributed in the hope that it will be useful,               #
+# but WITHOUT ANY WARRANTY; without even the implied warranty of                   #
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the                    #
+# GNU General Public License for more details.                                     #
+#                                                                                  #
+# You should have received a copy of the GNU General Public License                #
+# along with this program (COPYING file).                                          #
+# If not, see <http://www.gnu.org/licenses/>.                                      #
+####################################################################################
+
+
+import numpy as np
+
+
+def _encode(kmer):
+    """
+    :param str kmer: a sequence of A, C, G, T
+    :return: the 2 bits encoding of the kmer
+    :rtype: int
+    """
+    code = 0
+    for base in kmer:
+        code = (code << 2) | 'ACGT'.index(base)
+    return code
+
+
+def find_all(text, patterns):
+    """
+    Find all the occurrences of several DNA patterns in a long text (a whole replicon for instance).
+
+    The text is scanned once with numpy: the first *k* bases (up to 32) of each position are encoded
+    on 2 bits per base, the positions which start with the first *k* bases of a pattern are the candidates,
+    which are then compared to the whole patterns. The patterns must contain only A, C, G and T,
+    the comparison is case sensitive.
+
+    :param str text: the text to search
+    :param patterns: the patterns to search
+    :type patterns: iterable of str
+    :return: the start positions (sorted) of each pattern
+    :rtype: dict {str pattern: :class:`numpy.ndarray` of int}
+    :raise ValueError: if a pattern is empty or contains other characters than A, C, G, T
+    """
+    patterns = set(patterns)
+    hits = {pattern: [] for pattern in patterns}
+    for pattern in patterns:
+        if not pattern or pattern.strip('ACGT'):
+            raise ValueError("cannot search the pattern '{}', "
+                             "the patterns must contain only A, C, G and T".format(pattern))
+    if patterns and len(text) >= min(len(pattern) for pattern in patterns):
+        k = min(32, min(len(pattern) for pattern in patterns))
+        prefixes = {}
+        for pattern in patterns:
+            prefixes.setdefault(_encode(pattern[:k]), []).append(pattern)
+
+        # the code of each base, 4 for all other characters
+        table = np.full(256, 4, dtype=np.uint64)
+        for code, base in enumerate(b'ACGT'):
+            table[base] = code
+        codes = table[np.frombuffer(text.encode('ascii', 'replace'), dtype=np.uint8)]
+        kmers_nb = len(codes) - k + 1
+        kmers = np.zeros(kmers_nb, dtype=np.uint64)
+        for i in range(k):
+            kmers <<= np.uint64(2)
+            kmers |= codes[i:i + kmers_nb] & np.uint64(3)
+        # the kmers which contain other characters than A, C, G, T cannot match
+        others = np.concatenate(([0], np.cumsum(codes == 4)))
+        valid = others[k:] == others[:kmers_nb]
+        candidates = np.nonzero(valid & np.isin(kmers, np.array(list(prefixes), dtype=np.uint64)))[0]
+        for pos in candidates.tolist():
+            for pattern in prefixes[int(kmers[pos])]:
+                if text.startswith(pattern, pos):
+                    hits[pattern].append(pos)
+    return {pattern: np.array(positions, dtype=int) for pattern, positions in hits.items()}
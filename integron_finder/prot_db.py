@@ -33,9 +33,11 @@ from collections import namedtuple
 import re
 
 import colorlog
+import numpy as np
 import pandas as pd
 from Bio import SeqIO, Seq
 from integron_finder import IntegronError
+from integron_finder.cache import cached_run
 
 _log = colorlog.getLogger(__name__)
 
@@ -65,6 +67,7 @@ class ProteinDB(ABC):
         else:
             self._prot_file = prot_file
         self._prot_db = self._make_db()
+        self._positions = None
 
     def __getitem__(self, prot_seq_id):
         """
@@ -120,6 +123,84 @@ class ProteinDB(ABC):
         return self._prot_file
 
 
+    def _make_positions(self):
+        """
+        Build the index of the proteins positions on the replicon.
+        The starts and the stops (modulo the replicon size) are sorted separately,
+        the order of the proteins in the db is kept in the 'order' arrays.
+
+        :return: the positions index
+        :rtype: dict
+        """
+        descriptions = [self.get_description(seq_id) for seq_id in self]
+        replicon_size = len(self.replicon)
+        starts = np.array([desc.start for desc in descriptions], dtype=np.int64) % replicon_size
+        stops = np.array([desc.stop for desc in descriptions], dtype=np.int64) % replicon_size
+        start_order = np.argsort(starts, kind='mergesort')
+        stop_order = np.argsort(stops, kind='mergesort')
+        return {'descriptions': descriptions,
+                'start_order': start_order,
+                'starts': starts[start_order],
+                'stop_order': stop_order,
+                'stops': stops[stop_order]
+                }
+
+
+    @staticmethod
+    def _circular_range(sorted_pos, lower, size, replicon_size, side):
+        """
+        :param sorted_pos: positions sorted in ascending order, all positions are in [0, replicon_size[
+        :type sorted_pos: :class:`numpy.ndarray` object
+        :param int lower: the lower bound of the range
+        :param int size: the size of the range (< replicon_size)
+        :param int replicon_size: the size of the circular replicon
+        :param str side: 'left' to select positions in [lower, lower + size[
+                         'right' to select positions in ]lower, lower + size]
+        :return: the indices in sorted_pos of the selected positions
+        :rtype: :class:`numpy.ndarray` object
+        """
+        lower %= replicon_size
+        upper = lower + size
+        first = np.searchsorted(sorted_pos, lower, side=side)
+        if upper <= replicon_size:
+            return np.arange(first, np.searchsorted(sorted_pos, upper, side=side))
+        else:
+            # the range overlap the origin of the replicon
+            return np.concatenate((np.arange(first, len(sorted_pos)),
+                                   np.arange(0, np.searchsorted(sorted_pos, upper - replicon_size, side=side))))
+
+
+    def proteins_in_window(self, window_start, window_end):
+        """
+        Select the proteins which start or end in a window of the replicon.
+        The replicon is considered as circular, so the window can overlap the origin.
+        A protein is selected if its start is in [window_start, window_end[
+        or if its stop is in ]window_start, window_end] ::
+
+            ok:            <--->         <--->
+            ok:  <--->                                    <--->
+                    |-------------------window-----------------|
+                 window_start                              window_end
+
+        The index of positions is built on the first call, then each query cost O(log n + k)
+
+        :param int window_start: the position of the beginning of the window
+        :param int window_end: the position of the end of the window
+        :return: the description of the selected proteins in the order of the db
+        :rtype: list of :class:`SeqDesc` namedtuple object
+        """
+        if self._positions is None:
+            self._positions = self._make_positions()
+        replicon_size = len(self.replicon)
+        size = (window_end - window_start) % replicon_size
+        start_idx = self._circular_range(self._positions['starts'], window_start, size, replicon_size, 'left')
+        stop_idx = self._circular_range(self._positions['stops'], window_start, size, replicon_size, 'right')
+        selected = np.union1d(self._positions['start_order'][start_idx],
+                              self._positions['stop_order'][stop_idx])
+        descriptions = self._positions['descriptions']
+        return [descriptions[i] for i in selected]
+
+
 class GembaseDB(ProteinDB):
     """
     Implements :class:`ProteinDB` from a Gembase.
@@ -159,11 +240,13 @@ class GembaseDB(ProteinDB):
         self._replicon_name = os.path.splitext(os.path.basename(self.cfg.input_seq_path))[0]
         self._gembase_file_basename = self._find_gembase_file_basename(self._gembase_path, self.cfg.input_seq_path)
         self._info = self._parse_lst()
+        self._descriptions = self._make_descriptions(self._info)
         if prot_file is None:
             self._prot_file = self._make_protfile()
         else:
             self._prot_file = prot_file
         self._prot_db = self._make_db()
+        self._positions = None
 
 
     def _find_gembase_file_basename(self, gembase_path, input_seq_path):
@@ -328,6 +411,45 @@ class GembaseDB(ProteinDB):
         return prots_info
 
 
+    @staticmethod
+    def _normalize_gene_id(gene_id):
+        """
+        In gembase the first letter of the gene number is b or i (for draft) or the replicon type (for complete)
+        for instance ACBA.0917.00019.b0001_00001 or ESCO001.C.00001.C001_00001.
+        This letter is removed, so the gene can be found whatever the letter used to query it.
+
+        :param str gene_id: a Gembase gene identifier
+        :return: the normalized gene identifier for instance ACBA.0917.00019.0001_00001
+        :rtype: str
+        :raise ValueError: when gene_id is not a valid Gembase gene identifier
+        """
+        specie, date, strain, contig_gene = gene_id.split('.')
+        return '{}.{}.{}.{}'.format(specie, date, strain, contig_gene[1:])
+
+
+    def _make_descriptions(self, prots_info):
+        """
+        :param prots_info: the information related to the CDS of the replicon
+        :type prots_info: :class:`pandas.DataFrame` object
+        :return: the description of each protein, the keys are the normalized gene identifiers
+                 if several genes have the same normalized id, the first one is kept.
+        :rtype: dict {str: :class:`SeqDesc` namedtuple object}
+        """
+        descriptions = {}
+        for seq_id, strand, start, end in zip(prots_info.seq_id.values,
+                                              prots_info.strand.values,
+                                              prots_info.start.values,
+                                              prots_info.end.values):
+            try:
+                norm_id = self._normalize_gene_id(seq_id)
+            except ValueError:
+                _log.warning("'{}' is not a valid Gembase protein identifier.".format(seq_id))
+                continue
+            if norm_id not in descriptions:
+                descriptions[norm_id] = SeqDesc(seq_id, 1 if strand == "D" else -1, start, end)
+        return descriptions
+
+
     def __getitem__(self, prot_seq_id):
         """
         :param str prot_seq_id: the id of a protein sequence
@@ -354,27 +476,34 @@ class GembaseDB(ProteinDB):
         :raise KeyError: if gene_id is not found in GembaseDB instance
         """
         try:
-            specie, date, strain, contig_gene = gene_id.split('.')
-            contig_gene = contig_gene[1:]  # remove the first letter b/i
+            norm_id = self._normalize_gene_id(gene_id)
         except ValueError:
             raise IntegronError("'{}' is not a valid Gembase protein identifier.".format(gene_id))
-        pattern = '{}\.{}\.{}\.\w?{}'.format(specie, date, strain, contig_gene)
-        seq_info = self._info.loc[self._info['seq_id'].str.contains(pattern, regex=True)]
-        if not seq_info.empty:
-            return SeqDesc(seq_info.seq_id.values[0],
-                           1 if seq_info.strand.values[0] == "D" else -1,
-                           seq_info.start.values[0],
-                           seq_info.end.values[0],
-                           )
-        else:
-            raise KeyError(gene_id)
+        try:
+            return self._descriptions[norm_id]
+        except KeyError:
+            raise KeyError(gene_id) from None
 
 
 class ProdigalDB(ProteinDB):
     """
     Creates proteins from Replicon/contig using prodigal and provide facilities to access them.
+    The descriptions of the proteins are parsed once when the db is created,
+    the sequences are indexed only when they are accessed.
     """
 
+    def __init__(self, replicon, cfg, prot_file=None):
+        """
+        :param replicon: The replicon used to create ProteinDB (protein files and extra information)
+        :type replicon: :class:`Bio.SeqRecord` object with a extra attribute path
+        :param cfg: The integron_finder configuration
+        :type cfg: :class:`integron_finder.config.Config` object
+        :param prot_file: The path to a protein file in fasta format
+                          which is the translation of the replicon
+        """
+        super().__init__(replicon, cfg, prot_file=prot_file)
+        self._descriptions = self._parse_descriptions()
+
 
     def _make_protfile(self):
         """
@@ -394,23 +523,75 @@ class ProdigalDB(ProteinDB):
                 prot=prot_file_path,
                 out=os.devnull,
             )
-            try:
-                _log.debug("run prodigal: {}".format(prodigal_cmd))
-                returncode = call(prodigal_cmd.split())
-            except Exception as err:
-                raise RuntimeError("{0} failed : {1}".format(prodigal_cmd, err))
-            if returncode != 0:
-                raise RuntimeError("{0} failed returncode = {1}".format(prodigal_cmd, returncode))
+            cached_run(self.cfg.cache, prodigal_cmd.split(), [self.replicon.path], [prot_file_path],
+                       lambda: self._run_prodigal(prodigal_cmd),
+                       version_option='-v')
 
         return prot_file_path
 
 
+    @staticmethod
+    def _run_prodigal(prodigal_cmd):
+        """
+        :param str prodigal_cmd: the prodigal command line
+        :raise RuntimeError: if prodigal cannot be executed or does not end successfully
+        """
+        try:
+            _log.debug("run prodigal: {}".format(prodigal_cmd))
+            returncode = call(prodigal_cmd.split())
+        except Exception as err:
+            raise RuntimeError("{0} failed : {1}".format(prodigal_cmd, err))
+        if returncode != 0:
+            raise RuntimeError("{0} failed returncode = {1}".format(prodigal_cmd, returncode))
+
+
+    def _make_db(self):
+        """
+        The index of the sequences is built the first time a sequence is accessed.
+
+        :return: None
+        """
+        return None
+
+
+    def _parse_descriptions(self):
+        """
+        Parse the headers of the prodigal protein file in one pass.
+        A prodigal header looks like: ::
+
+            >ACBA.007.P01_13_1 # 55 # 1014 # 1 # ID=1_1;partial=00;start_type=ATG;rbs_motif=None;rbs_spacer=None
+
+        :return: the description of each protein in the order of the file,
+                 the value is None when the header is not a valid prodigal header.
+        :rtype: dict {str: :class:`SeqDesc` namedtuple object}
+        :raise ValueError: if there is duplicate sequence identifiers
+        """
+        descriptions = {}
+        with open(self._prot_file) as prot_file:
+            for line in prot_file:
+                if not line.startswith('>'):
+                    continue
+                title = line[1:].rstrip()
+                # the same identifier as Bio.SeqIO
+                seq_id = title.split(None, 1)[0] if title else ''
+                if seq_id in descriptions:
+                    raise ValueError("Duplicate key '{}'".format(seq_id))
+                try:
+                    id_, start, stop, strand, *_ = title.split(" # ")
+                    descriptions[seq_id] = SeqDesc(id_, int(strand), int(start), int(stop))
+                except ValueError:
+                    descriptions[seq_id] = None
+        return descriptions
+
+
     def __getitem__(self, prot_seq_id):
         """
         :param str prot_seq_id: the id of a protein sequence
         :return: The Sequence corresponding to the prot_seq_id.
         :rtype: :class:`Bio.SeqRecord` object
         """
+        if self._prot_db is None:
+            self._prot_db = super()._make_db()
         return self._prot_db[prot_seq_id]
 
 
@@ -418,8 +599,8 @@ class ProdigalDB(ProteinDB):
         """
         :return: a generator which iterate on the protein seq_id which constitute the contig.
         :rtype: generator
-                """
-        return (seq_id for seq_id in self._prot_db)
+        """
+        return (seq_id for seq_id in self._descriptions)
 
 
     def get_description(self, gene_id):
@@ -430,12 +611,7 @@ class ProdigalDB(ProteinDB):
         :raise IntegronError: when gene_id is not a valid Gembase gene identifier
         :raise KeyError: if gene_id is not found in ProdigalDB instance
         """
-        seq = self[gene_id]
-        try:
-            id_, start, stop, strand, *_ = seq.description.split(" # ")
-        except ValueError:
+        desc = self._descriptions[gene_id]
+        if desc is None:
             raise IntegronError("'{}' is not a valid Prodigal protein identifier.".format(gene_id))
-        start = int(start)
-        stop = int(stop)
-        strand = int(strand)
-        return SeqDesc(id_, strand, start, stop)
+        return desc
@@ -34,8 +34,11 @@ integron_finder is a program that looks for integron in DNA sequences.
 import os
 import sys
 import argparse
+import copy
 import distutils.spawn
 import shutil
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 
 import pandas as pd
 pd.options.mode.chained_assignment = 'raise'
@@ -49,16 +52,19 @@ from Bio import SeqIO
 
 from integron_finder import IntegronError, logger_set_level
 from integron_finder import utils
+from integron_finder import timing
 from integron_finder import results
 from integron_finder.topology import Topology
 from integron_finder.config import Config
-from integron_finder.hmm import scan_hmm_bank
-from integron_finder.integrase import find_integrase
+from integron_finder.hmm import scan_hmm_bank, read_hmm
+from integron_finder.integrase import find_integrase, find_integrase_batch
 from integron_finder.attc import find_attc_max
-from integron_finder.infernal import find_attc
-from integron_finder.integron import find_integron
+from integron_finder.infernal import find_attc, read_infernal
+from integron_finder.hits import save_hits, load_hits, write_table, read_table, filter_attc, filter_attc_max
+from integron_finder.integron import find_integron, MotifsIndex
 from integron_finder.annotation import func_annot, add_feature
 from integron_finder.prot_db import GembaseDB, ProdigalDB
+from integron_finder.journal import RunJournal
 
 
 def parse_args(args):
@@ -83,6 +89,12 @@ def parse_args(args):
                         type=int,
                         help='Number of CPUs used by INFERNAL and HMMER')
 
+    parser.add_argument('--jobs',
+                        default=1,
+                        type=int,
+                        help='Number of replicons analysed in parallel. '
+                             'The CPUs set by --cpu are shared between the jobs (default: 1)')
+
     parser.add_argument('-dt', '--distance-thresh',
                         dest='distance_threshold',
                         default=4000,
@@ -109,6 +121,75 @@ def parse_args(args):
                         default=distutils.spawn.find_executable("hmmsearch"),
                         help='Complete path to hmmsearch if not in PATH. eg: /usr/local/bin/hmmsearch')
 
+    parser.add_argument('--hmm-domtblout',
+                        action='store_true',
+                        default=False,
+                        help='hmmsearch reports the hits in domain tabular format (--domtblout) '
+                             'instead of the full text output which is slower to parse. '
+                             'The text output is kept only with --keep-tmp.')
+
+    parser.add_argument('--combined-integrase-search',
+                        action='store_true',
+                        default=False,
+                        help='Search the integrase and the phage integrase profiles with one hmmsearch run '
+                             'per replicon instead of two.')
+
+    parser.add_argument('--cmsearch-stdin',
+                        action='store_true',
+                        default=False,
+                        help='With --local-max, send the sequences to cmsearch through a pipe and write '
+                             'the cmsearch outputs in the system temporary directory (TMPDIR) '
+                             'instead of the results tmp dir. Useful if the results are on a network filesystem.')
+
+    parser.add_argument('--local-max-merge-windows',
+                        action='store_true',
+                        default=False,
+                        help='With --local-max, merge the overlapping regions searched by cmsearch --max '
+                             'so each base is searched once. Faster, but an attC site which crosses '
+                             'the border of a region is not reported truncated for this region, '
+                             'so the results can slightly differ.')
+
+    parser.add_argument('--batch-integrase-search',
+                        action='store_true',
+                        default=False,
+                        help='Translate all replicons first then search the integrases in all proteins '
+                             'with one hmmsearch run, instead of one run per replicon. '
+                             'Useful for inputs with a lot of small replicons (draft genomes, metagenomes).')
+
+    parser.add_argument('--resume',
+                        action='store_true',
+                        default=False,
+                        help='Skip the replicons already analysed by a previous run with the same parameters '
+                             'which has been interrupted (they are recorded in integron_finder.journal '
+                             'in the results directory), then merge the results of all replicons.')
+
+    parser.add_argument('--timings',
+                        action='store_true',
+                        default=False,
+                        help='Record the wall time, CPU time, process peak memory and bytes written by each stage '
+                             'of the analysis of each replicon in timings.tsv, and their summary in timings.json '
+                             '(in the results directory).')
+
+    parser.add_argument('--phase',
+                        choices=['all', 'search', 'reanalyze'],
+                        default='all',
+                        help="'search': search the integrases and the attC sites, find the integrons and keep "
+                             "the hits in the tmp directories. 'reanalyze': find the integrons from the hits kept "
+                             "by a previous 'search' run with new thresholds (--evalue-attc, --max-attc-size, "
+                             "--min-attc-size, --distance-thresh, --calin-threshold, --union-integrases) "
+                             "without running prodigal, hmmsearch or cmsearch. (default: all)")
+
+    parser.add_argument('--cache-dir',
+                        help='Directory where the outputs of cmsearch, hmmsearch and prodigal are cached, '
+                             'so they are not computed again for the same sequences, models and options, '
+                             'in this run or the next ones. The directory can be shared by several runs.')
+
+    parser.add_argument('--cache-max-size',
+                        default=2048,
+                        type=float,
+                        help='The maximum size of the cache in MB, when it is reached '
+                             'the least recently used results are removed. 0 for no limit (default: 2048)')
+
     parser.add_argument('--prodigal',
                         default=distutils.spawn.find_executable("prodigal"),
                         help='Complete path to prodigal if not in PATH. eg: /usr/local/bin/prodigal')
@@ -229,12 +310,232 @@ def parse_args(args):
                                )
 
     parsed_args = parser.parse_args(args)
+    if parsed_args.jobs < 1:
+        parser.error("argument --jobs: must be greater than 0")
+    if parsed_args.cache_max_size < 0:
+        parser.error("argument --cache-max-size: must be greater or equal to 0")
 
     # eagle_eyes is just an alias to local_max in whole program use local_max
     parsed_args.local_max = parsed_args.local_max or parsed_args.eagle_eyes
     return Config(parsed_args)
 
 
+def get_protein_db(replicon, config):
+    """
+    Write the replicon in its temporary directory and build the corresponding protein database.
+
+    :param replicon: the replicon to translate.
+    :type replicon: a :class:`Bio.SeqRecord` object.
+    :param config: The configuration
+    :type config: a :class:`integron_finder.config.Config` object.
+    :return: The protein database of the replicon,
+             the replicon get a new attribute *path*, the path of the replicon fasta file.
+    :rtype: a :class:`integron_finder.prot_db.ProteinDB` object.
+    """
+    result_tmp_dir = config.tmp_dir(replicon.id)
+    try:
+        os.mkdir(result_tmp_dir)
+    except OSError:
+        pass
+    tmp_replicon_path = os.path.join(result_tmp_dir, replicon.id + '.fst')
+    SeqIO.write(replicon, tmp_replicon_path, "fasta")
+    # create attr path
+    # used to generate protein file with prodigal
+    replicon.path = tmp_replicon_path
+
+    with timing.stage('proteins'):
+        if config.gembase_path:
+            protein_db = GembaseDB(replicon, config, gembase_path=config.gembase_path)
+        elif config.gembase:
+            protein_db = GembaseDB(replicon, config)
+        else:
+            protein_db = ProdigalDB(replicon, config)
+    return protein_db
+
+
+def translate_replicon(replicon, config):
+    """
+    Translate the replicon, used to search the integrases of all replicons in one step
+    (see :func:`integron_finder.integrase.find_integrase_batch`).
+
+    :param replicon: the replicon to translate.
+    :type replicon: a :class:`Bio.SeqRecord` object.
+    :param config: The configuration
+    :type config: a :class:`integron_finder.config.Config` object.
+    :return: the replicon id, the path to its protein file and its temporary directory
+    :rtype: tuple (str, str, str)
+    """
+    protein_db = get_protein_db(replicon, config)
+    return replicon.id, protein_db.protfile, config.tmp_dir(replicon.id)
+
+
+def search_integrons(replicon, protein_db, config):
+    """
+    Search the integrases and the attC sites (with local_max if needed) in the replicon
+    and find the integrons. With the *search* phase the hits are also stored
+    (see :func:`save_search_hits`).
+
+    :param replicon: the replicon to analyse.
+    :type replicon: a :class:`Bio.SeqRecord` object.
+    :param protein_db: the protein database of the replicon
+    :type protein_db: a :class:`integron_finder.prot_db.ProteinDB` object.
+    :param config: The configuration
+    :type config: a :class:`integron_finder.config.Config` object.
+    :return: the integrons found
+    :rtype: list of :class:`integron_finder.integron.Integron` objects
+    """
+    result_tmp_dir = config.tmp_dir(replicon.id)
+    tmp_replicon_path = replicon.path
+
+    ##################
+    # Default search #
+    ##################
+    intI_file = os.path.join(result_tmp_dir, replicon.id + "_intI.res")
+    phageI_file = os.path.join(result_tmp_dir, replicon.id + "_phage_int.res")
+    attC_default_file = os.path.join(result_tmp_dir, replicon.id + "_attc_table.res")
+
+    if not config.no_proteins:
+        if not os.path.isfile(intI_file) or not os.path.isfile(phageI_file):
+            with timing.stage('integrase'):
+                find_integrase(replicon.id, protein_db.protfile, result_tmp_dir, config)
+    _log.info("Starting Default search ... :")
+    if not os.path.isfile(attC_default_file):
+        # find attc with cmsearch
+        with timing.stage('attc'):
+            find_attc(tmp_replicon_path, replicon.name, config.cmsearch, result_tmp_dir, config.model_attc_path,
+                      incE=config.evalue_attc,
+                      cpu=config.cpu,
+                      cache=config.cache)
+
+    _log.info("Default search done... : ")
+    with timing.stage('find_integron'):
+        integrons = find_integron(replicon, protein_db, attC_default_file, intI_file, phageI_file, config)
+
+    #########################
+    # Search with local_max #
+    #########################
+    if config.local_max:
+        _log.info("Starting search with local_max...:")
+        integron_max_path = os.path.join(result_tmp_dir, "integron_max")
+        if not os.path.isdir(integron_max_path):
+            circular = True if replicon.topology == 'circ' else False
+            with timing.stage('local_max'):
+                integron_max = find_attc_max(integrons, replicon, config.distance_threshold,
+                                             config.model_attc_path,
+                                             max_attc_size=config.max_attc_size,
+                                             min_attc_size=config.min_attc_size,
+                                             circular=circular, out_dir=result_tmp_dir,
+                                             cpu=config.cpu,
+                                             evalue_attc=config.evalue_attc,
+                                             cmsearch_stdin=config.cmsearch_stdin,
+                                             merge_windows=config.local_max_merge_windows,
+                                             cache=config.cache)
+                write_table(integron_max_path, integron_max)
+            _log.info("Search with local_max done... :")
+
+        else:
+            integron_max = read_table(integron_max_path)
+            integron_max = integron_max[(integron_max.evalue < config.evalue_attc) &
+                                        (abs(integron_max.pos_end - integron_max.pos_beg) < config.max_attc_size) &
+                                        (config.min_attc_size < abs(integron_max.pos_end - integron_max.pos_beg))]
+            _log.info("Search with local_max was already done, continue... :")
+
+        with timing.stage('find_integron_max'):
+            integrons = find_integron(replicon, protein_db, integron_max, intI_file, phageI_file, config)
+    else:
+        integron_max = None
+
+    if config.phase == 'search':
+        with timing.stage('save_hits'):
+            save_search_hits(replicon, protein_db, config.hits_path(replicon.id),
+                             attC_default_file, intI_file, phageI_file, integron_max, config)
+    return integrons
+
+
+def save_search_hits(replicon, protein_db, hits_path, attc_file, intI_file, phageI_file, integron_max, config):
+    """
+    Store the hits found by the search phase, so the integrons can be computed again
+    with other thresholds by :func:`reanalyze_hits` without running any external tool.
+
+    * the attC sites found by the default search are not filtered (cmsearch is run with -E 10)
+    * the integrase hits are stored as they are used by :func:`integron_finder.integron.find_integron`
+    * the attC sites found with local_max are stored as they are used by
+      :func:`integron_finder.integron.find_integron`, so they are filtered with the search phase thresholds.
+
+    :param replicon: the replicon analysed.
+    :type replicon: a :class:`Bio.SeqRecord` object.
+    :param protein_db: the protein database of the replicon
+    :type protein_db: a :class:`integron_finder.prot_db.ProteinDB` object.
+    :param str hits_path: the path of the file to write
+    :param str attc_file: the cmsearch output of the default search (--tblout)
+    :param str intI_file: the output of hmmsearch with the integrase model
+    :param str phageI_file: the output of hmmsearch with the phage model
+    :param integron_max: the attC sites found with local_max, None if local_max was not used
+    :type integron_max: :class:`pandas.DataFrame` object
+    :param config: The configuration
+    :type config: a :class:`integron_finder.config.Config` object.
+    """
+    tables = {'attc': read_infernal(attc_file, replicon.id, config.model_len,
+                                    evalue=float('inf'), size_max_attc=float('inf'), size_min_attc=-1)}
+    if not config.no_proteins:
+        tables['intI'] = read_hmm(replicon.id, protein_db, intI_file, config)
+        tables['phageI'] = read_hmm(replicon.id, protein_db, phageI_file, config)
+    if integron_max is not None:
+        tables['attc_max'] = integron_max
+    save_hits(hits_path, tables,
+              model_len=config.model_len,
+              evalue_attc=config.evalue_attc,
+              max_attc_size=config.max_attc_size,
+              min_attc_size=config.min_attc_size)
+
+
+def reanalyze_hits(replicon, protein_db, hits_path, config):
+    """
+    Find the integrons from the hits stored by a previous run with the *search* phase,
+    with the thresholds of the current configuration (--evalue-attc, --max-attc-size, --min-attc-size,
+    --distance-thresh, --calin-threshold, --union-integrases, ...).
+
+    With --local-max the attC sites found with local_max are used, they have been filtered
+    with the search phase thresholds and found in the windows around the integrons of the search phase.
+
+    :param replicon: the replicon to analyse.
+    :type replicon: a :class:`Bio.SeqRecord` object.
+    :param protein_db: the protein database of the replicon
+    :type protein_db: a :class:`integron_finder.prot_db.ProteinDB` object.
+    :param str hits_path: the path of the file written by :func:`save_search_hits`
+    :param config: The configuration
+    :type config: a :class:`integron_finder.config.Config` object.
+    :return: the integrons found
+    :rtype: list of :class:`integron_finder.integron.Integron` objects
+    :raise IntegronError: if the hits needed by the current configuration are not stored
+    """
+    tables, meta = load_hits(hits_path)
+    if config.local_max:
+        if 'attc_max' not in tables:
+            raise IntegronError("The hits of replicon {} were searched without --local-max".format(replicon.id))
+        if (config.evalue_attc > meta['evalue_attc'] or
+                config.max_attc_size > meta['max_attc_size'] or
+                config.min_attc_size < meta['min_attc_size']):
+            _log.warning("The local_max attC sites of replicon {} were filtered with --evalue-attc {} "
+                         "--max-attc-size {} --min-attc-size {}, "
+                         "less stringent thresholds are not applied to them".format(replicon.id,
+                                                                                   meta['evalue_attc'],
+                                                                                   meta['max_attc_size'],
+                                                                                   meta['min_attc_size']))
+        attc = filter_attc_max(tables['attc_max'],
+                               evalue=config.evalue_attc,
+                               size_max_attc=config.max_attc_size,
+                               size_min_attc=config.min_attc_size)
+    else:
+        attc = filter_attc(tables['attc'], meta['model_len'],
+                           evalue=config.evalue_attc,
+                           size_max_attc=config.max_attc_size,
+                           size_min_attc=config.min_attc_size)
+    if not config.no_proteins and 'intI' not in tables:
+        raise IntegronError("The hits of replicon {} were searched with --no-proteins".format(replicon.id))
+    return find_integron(replicon, protein_db, attc, tables.get('intI'), tables.get('phageI'), config)
+
+
 def find_integron_in_one_replicon(replicon, config):
     """
     scan replicon for integron.
@@ -264,15 +565,6 @@ def find_integron_in_one_replicon(replicon, config):
     :rtype: tuple (str integron_file, str summary_file) or (str integron_file, None)
     """
     result_tmp_dir = config.tmp_dir(replicon.id)
-    try:
-        os.mkdir(result_tmp_dir)
-    except OSError:
-        pass
-    tmp_replicon_path = os.path.join(result_tmp_dir, replicon.id + '.fst')
-    SeqIO.write(replicon, tmp_replicon_path, "fasta")
-    # create attr path
-    # used to generate protein file with prodigal
-    replicon.path = tmp_replicon_path
 
     # func_annot_path is the canonical path for Functional_annotation
     # path_func_annot is the path provide on the command line
@@ -295,84 +587,52 @@ def find_integron_in_one_replicon(replicon, config):
     if is_func_annot and not fa_hmm:
         _log.warning("No hmm profiles for functional annotation detected, skip functional annotation step.")
 
-    if config.gembase_path:
-        protein_db = GembaseDB(replicon, config, gembase_path=config.gembase_path)
-    elif config.gembase:
-        protein_db = GembaseDB(replicon, config)
-    else:
-        protein_db = ProdigalDB(replicon, config)
-
-    ##################
-    # Default search #
-    ##################
-    intI_file = os.path.join(result_tmp_dir, replicon.id + "_intI.res")
-    phageI_file = os.path.join(result_tmp_dir, replicon.id + "_phage_int.res")
-    attC_default_file = os.path.join(result_tmp_dir, replicon.id + "_attc_table.res")
+    hits_path = config.hits_path(replicon.id)
+    if config.phase == 'reanalyze' and not os.path.exists(hits_path):
+        # check it before building the protein db which could run prodigal
+        raise IntegronError("No hits stored for replicon {} ({} does not exist), "
+                            "run integron_finder with '--phase search' first".format(replicon.id, hits_path))
+    protein_db = get_protein_db(replicon, config)
 
     try:
-        if not config.no_proteins:
-            if not os.path.isfile(intI_file) or not os.path.isfile(phageI_file):
-                find_integrase(replicon.id, protein_db.protfile, result_tmp_dir, config)
-        _log.info("Starting Default search ... :")
-        if not os.path.isfile(attC_default_file):
-            # find attc with cmsearch
-            find_attc(tmp_replicon_path, replicon.name, config.cmsearch, result_tmp_dir, config.model_attc_path,
-                      incE=config.evalue_attc,
-                      cpu=config.cpu)
-
-        _log.info("Default search done... : ")
-        integrons = find_integron(replicon, protein_db, attC_default_file, intI_file, phageI_file, config)
-
-        #########################
-        # Search with local_max #
-        #########################
-        if config.local_max:
-            _log.info("Starting search with local_max...:")
-            if not os.path.isfile(os.path.join(result_tmp_dir, "integron_max.pickle")):
-                circular = True if replicon.topology == 'circ' else False
-                integron_max = find_attc_max(integrons, replicon, config.distance_threshold,
-                                             config.model_attc_path,
-                                             max_attc_size=config.max_attc_size,
-                                             min_attc_size=config.min_attc_size,
-                                             circular=circular, out_dir=result_tmp_dir,
-                                             cpu=config.cpu,
-                                             evalue_attc=config.evalue_attc)
-                integron_max.to_pickle(os.path.join(result_tmp_dir, "integron_max.pickle"))
-                _log.info("Search with local_max done... :")
-
-            else:
-                integron_max = pd.read_pickle(os.path.join(result_tmp_dir, "integron_max.pickle"))
-                integron_max = integron_max[(integron_max.evalue < config.evalue_attc) &
-                                            (abs(integron_max.pos_end - integron_max.pos_beg) < config.max_attc_size) &
-                                            (config.min_attc_size < abs(integron_max.pos_end - integron_max.pos_beg))]
-                _log.info("Search with local_max was already done, continue... :")
-
-            integrons = find_integron(replicon, protein_db, integron_max, intI_file, phageI_file, config)
+        if config.phase == 'reanalyze':
+            _log.info("Reanalysing the hits stored in {} ... :".format(hits_path))
+            with timing.stage('reanalyze'):
+                integrons = reanalyze_hits(replicon, protein_db, hits_path, config)
+        else:
+            integrons = search_integrons(replicon, protein_db, config)
 
         ##########################
         # Add promoters and attI #
         ##########################
-        for integron in integrons:
-            integron_type = integron.type()
-            if integron_type != "In0":  # complete & CALIN
-                if not config.no_proteins:
-                    _log.info("Adding proteins ... :")
-                    integron.add_proteins(protein_db)
-
+        with timing.stage('integron_features'):
             if config.promoter_attI:
-                _log.info("Adding promoters and attI ... :")
-                if integron_type == "complete":
-                    integron.add_promoter()
-                    integron.add_attI()
-                elif integron_type == "In0":
-                    integron.add_attI()
-                    integron.add_promoter()
+                # the windows of all the integrons of the replicon are scanned once
+                motifs_index = MotifsIndex(replicon.seq, config.model_dir,
+                                           [window for integron in integrons if integron.type() != "CALIN"
+                                            for window in integron.motifs_windows()])
+            for integron in integrons:
+                integron_type = integron.type()
+                if integron_type != "In0":  # complete & CALIN
+                    if not config.no_proteins:
+                        _log.info("Adding proteins ... :")
+                        integron.add_proteins(protein_db)
+
+                if config.promoter_attI:
+                    _log.info("Adding promoters and attI ... :")
+                    if integron_type == "complete":
+                        integron.add_promoter(motifs_index=motifs_index)
+                        integron.add_attI(motifs_index=motifs_index)
+                    elif integron_type == "In0":
+                        integron.add_attI(motifs_index=motifs_index)
+                        integron.add_promoter(motifs_index=motifs_index)
         #########################
         # Functional annotation #
         #########################
         if is_func_annot and fa_hmm:
             _log.info("Starting functional annotation ...:")
-            func_annot(integrons, replicon, protein_db, fa_hmm, config, result_tmp_dir)
+            with timing.stage('func_annot'):
+                func_annot(integrons, replicon, protein_db, fa_hmm, config, result_tmp_dir)
 
         #######################
         # Writing out results #
@@ -380,28 +640,31 @@ def find_integron_in_one_replicon(replicon, config):
         _log.info("Writing out results for replicon {}".format(replicon.id))
 
         if config.pdf:
-            for j, integron in enumerate(integrons, 1):
-                if integron.type() == "complete":
-                    integron.draw_integron(file=os.path.join(config.result_dir, "{}_{}.pdf".format(replicon.id, j)))
+            with timing.stage('pdf'):
+                for j, integron in enumerate(integrons, 1):
+                    if integron.type() == "complete":
+                        integron.draw_integron(file=os.path.join(config.result_dir,
+                                                                 "{}_{}.pdf".format(replicon.id, j)))
 
         base_outfile = os.path.join(config.result_dir, replicon.id)
         integron_file = base_outfile + ".integrons"
         _log.debug("Writing integron_file {}".format(integron_file))
         summary_file = base_outfile + ".summary"
-        if integrons:
-            integrons_report = results.integrons_report(integrons)
-            integrons_report.to_csv(integron_file, sep="\t", index=False, na_rep="NA")
-            summary = results.summary(integrons_report)
-            if config.gbk:
-                add_feature(replicon, integrons_report, protein_db, config.distance_threshold)
-                SeqIO.write(replicon, os.path.join(config.result_dir, replicon.id + ".gbk"), "genbank")
-        else:
-            with open(integron_file, "w") as out_f:
-                out_f.write("# No Integron found\n")
-            summary = pd.DataFrame([[replicon.id, 0, 0, 0]],
-                                   columns=['ID_replicon', 'CALIN', 'complete', 'In0'])
-            summary = summary.set_index(['ID_replicon'])
-        summary.to_csv(summary_file, sep="\t", na_rep="NA")
+        with timing.stage('write_results'):
+            if integrons:
+                integrons_report = results.integrons_report(integrons)
+                integrons_report.to_csv(integron_file, sep="\t", index=False, na_rep="NA")
+                summary = results.summary(integrons_report)
+                if config.gbk:
+                    add_feature(replicon, integrons_report, protein_db, config.distance_threshold)
+                    SeqIO.write(replicon, os.path.join(config.result_dir, replicon.id + ".gbk"), "genbank")
+            else:
+                with open(integron_file, "w") as out_f:
+                    out_f.write("# No Integron found\n")
+                summary = pd.DataFrame([[replicon.id, 0, 0, 0]],
+                                       columns=['ID_replicon', 'CALIN', 'complete', 'In0'])
+                summary = summary.set_index(['ID_replicon'])
+            summary.to_csv(summary_file, sep="\t", na_rep="NA")
 
     except integron_finder.EmptyFileError as err:
         _log.warning('############ Skip replicon {} ############'.format(replicon.name))
@@ -411,7 +674,8 @@ def find_integron_in_one_replicon(replicon, config):
     # clean temporary files #
     #########################
 
-    if not config.keep_tmp:
+    if not config.keep_tmp and config.phase == 'all':
+        # the search and reanalyze phases need the hits and the proteins stored in the tmp dir
         try:
             shutil.rmtree(result_tmp_dir)
         except Exception as err:
@@ -420,6 +684,72 @@ def find_integron_in_one_replicon(replicon, config):
     return integron_file, summary_file
 
 
+def analyse_replicon(replicon, config, journal):
+    """
+    Analyse a replicon (see :func:`find_integron_in_one_replicon`)
+    then record it in the journal of the run.
+
+    :param replicon: the replicon to analyse.
+    :type replicon: a :class:`Bio.SeqRecord` object.
+    :param config: The configuration
+    :type config: a :class:`integron_finder.config.Config` object.
+    :param journal: the journal of the run
+    :type journal: a :class:`integron_finder.journal.RunJournal` object.
+    :return: the replicon id, the path to the integron file and to the summary file
+    :rtype: tuple (str replicon_id, str integron_file, str summary_file)
+    """
+    with timing.replicon(replicon.id):
+        integron_file, summary_file = find_integron_in_one_replicon(replicon, config)
+    journal.record(replicon.id, integron_file, summary_file)
+    return replicon.id, integron_file, summary_file
+
+
+def jobs_config(config, jobs):
+    """
+    Build the configuration used by each job when several replicons are analysed in parallel.
+    The cpus set by the user are shared between the jobs, each job gets at least one cpu
+    for the external tools (hmmsearch, cmsearch).
+
+    :param config: The configuration of the run
+    :type config: a :class:`integron_finder.config.Config` object.
+    :param int jobs: The number of replicons analysed in parallel
+    :return: a copy of the configuration with the cpu option set to the job share
+    :rtype: a :class:`integron_finder.config.Config` object.
+    """
+    job_config = copy.deepcopy(config)
+    job_config._args.cpu = max(1, config.cpu // jobs)
+    return job_config
+
+
+def ordered_map(executor, func, items, max_pending, *args):
+    """
+    Apply func to each item in the executor, as :meth:`concurrent.futures.Executor.map` does,
+    but submit the items as the results are consumed instead of all at once.
+    So the replicons of a large multi fasta file are not all pickled and queued up front.
+
+    :param executor: the executor which run the calls
+    :type executor: :class:`concurrent.futures.Executor` object
+    :param func: the function to call on each item
+    :param items: the items to process
+    :type items: iterable
+    :param int max_pending: the maximum number of items submitted and not yet consumed
+    :param args: the other arguments passed to func after the item
+    :return: the results of func, in the order of the items
+    :rtype: generator
+    """
+    pending = deque()
+    try:
+        for item in items:
+            if len(pending) >= max_pending:
+                yield pending.popleft().result()
+            pending.append(executor.submit(func, item, *args))
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        for future in pending:
+            future.cancel()
+
+
 def header(args):
     """
 
@@ -532,19 +862,22 @@ def main(args=None, loglevel=None):
     #######################################
     # do last config check before running #
     #######################################
-    if config.cmsearch is None:
+    if config.phase == 'reanalyze':
+        # no external tool is used
+        pass
+    elif config.cmsearch is None:
         msg = """cannot find 'cmsearch' in PATH.
 Please install infernal package or setup 'cmsearch' binary path with --cmsearch option"""
         _log.critical(msg)
         raise RuntimeError(msg)
 
-    if config.hmmsearch is None:
+    elif config.hmmsearch is None:
         msg = """cannot find 'hmmsearch' in PATH.
 Please install hmmer package or setup 'hmmsearch' binary path with --hmmsearch option"""
         _log.critical(msg)
         raise RuntimeError(msg)
 
-    if config.prodigal is None:
+    elif config.prodigal is None:
         msg = """cannot find 'prodigal' in PATH.
 Please install prodigal package or setup 'prodigal' binary path with --prodigal option"""
         _log.critical(msg)
@@ -591,22 +924,85 @@ Please install prodigal package or setup 'prodigal' binary path with --prodigal
         sequences_db_len = len(sequences_db)
         all_integrons = []
         all_summaries = []
-        for rep_no, replicon in enumerate(sequences_db, 1):
-            # if replicon contains illegal characters
-            # or replicon is too short < 50 bp
-            # then replicon is None
-            if replicon is not None:
-                _log.info("############ Processing replicon {} ({}/{}) ############\n".format(replicon.id,
-                                                                                              rep_no,
-                                                                                              sequences_db_len))
-                integron_res, summary = find_integron_in_one_replicon(replicon, config)
-                if integron_res:
-                    all_integrons.append(integron_res)
-                if summary:
-                    all_summaries.append(summary)
-            else:
-                _log.warning("############ Skipping replicon {}/{} ############".format(rep_no,
-                                                                                        sequences_db_len))
+
+        journal = RunJournal(config.journal_path, config.fingerprint)
+        done = journal.done() if config.resume else {}
+        if done:
+            _log.info("Resume the run, {} replicons are already analysed".format(len(done)))
+        else:
+            journal.start()
+        # when the run is resumed the timings of the replicons already analysed are kept
+        timing.start(config.timings_path, new=not done)
+        # the replicons ids in the order of the input file
+        replicons_order = []
+
+        def replicons():
+            for rep_no, replicon in enumerate(sequences_db, 1):
+                # if replicon contains illegal characters
+                # or replicon is too short < 50 bp
+                # then replicon is None
+                if replicon is not None and replicon.id in done:
+                    replicons_order.append(replicon.id)
+                    _log.info("############ Replicon {} ({}/{}) already analysed ############".format(
+                        replicon.id, rep_no, sequences_db_len))
+                elif replicon is not None:
+                    replicons_order.append(replicon.id)
+                    _log.info("############ Processing replicon {} ({}/{}) ############\n".format(replicon.id,
+                                                                                                  rep_no,
+                                                                                                  sequences_db_len))
+                    yield replicon
+                else:
+                    _log.warning("############ Skipping replicon {}/{} ############".format(rep_no,
+                                                                                            sequences_db_len))
+
+        jobs = min(config.jobs, sequences_db_len)
+        if config.batch_integrase_search and not config.no_proteins and config.phase != 'reanalyze':
+            _log.info("Searching integrases in all replicons ... :")
+            with utils.FastaIterator(config.input_seq_path,
+                                     dist_threshold=config.distance_threshold) as replicons_to_translate:
+                replicons_to_translate = (replicon for replicon in replicons_to_translate
+                                          if replicon is not None and replicon.id not in done)
+                if jobs > 1:
+                    with ProcessPoolExecutor(max_workers=jobs,
+                                             initializer=timing.start,
+                                             initargs=(config.timings_path, False)) as executor:
+                        translated = list(ordered_map(executor, translate_replicon,
+                                                      replicons_to_translate, jobs * 2,
+                                                      jobs_config(config, jobs)))
+                else:
+                    translated = [translate_replicon(replicon, config) for replicon in replicons_to_translate]
+            with timing.stage('batch_integrase'):
+                find_integrase_batch(translated, config.batch_tmp_dir, config)
+
+        if jobs > 1:
+            # the results are collected in the order of the replicons in the input file
+            # whatever the order the jobs complete, so the merged results are deterministic
+            with ProcessPoolExecutor(max_workers=jobs,
+                                     initializer=timing.start,
+                                     initargs=(config.timings_path, False)) as executor:
+                replicons_res = list(ordered_map(executor, analyse_replicon,
+                                                 replicons(), jobs * 2,
+                                                 jobs_config(config, jobs), journal))
+        else:
+            replicons_res = (analyse_replicon(replicon, config, journal) for replicon in replicons())
+
+        results_by_replicon = dict(done)
+        for replicon_id, integron_res, summary in replicons_res:
+            results_by_replicon[replicon_id] = (integron_res, summary)
+        for replicon_id in replicons_order:
+            integron_res, summary = results_by_replicon[replicon_id]
+            if integron_res:
+                all_integrons.append(integron_res)
+            if summary:
+                all_summaries.append(summary)
+
+    if not config.keep_tmp and os.path.exists(config.model_integrases):
+        # the concatenation of integrase models used by --combined-integrase-search
+        os.unlink(config.model_integrases)
+    if not config.keep_tmp and os.path.exists(config.batch_tmp_dir):
+        # the proteins of all replicons and the hmm results used by --batch-integrase-search
+        shutil.rmtree(config.batch_tmp_dir)
+
     if not config.split_results:
         _log.info("Merging integrons results.\n")
         agg_integrons = results.merge_results(*all_integrons)
@@ -632,6 +1028,9 @@ Please install prodigal package or setup 'prodigal' binary path with --prodigal
                 # in special case where the merged file has the same name that a replicon result file
                 os.unlink(_file)
 
+    if config.timings:
+        timing.write_summary(config.timings_summary_path, config.timings_path)
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,263 @@
+# -*- coding: utf-8 -*-
+
+####################################################################################
+# Integron_Finder - Integron Finder aims at detecting integrons in DNA sequences   #
+# by finding particular features of the integron:                                  #
+#   - the attC sites                                                               #
+#   - the integrase                                                                #
+#   - and when possible attI site and promoters.                                   #
+#                                                                                  #
+# Authors: Jean Cury, Bertrand Neron, Eduardo PC Rocha                             #
+# Copyright (c) 2015 - 2018  Institut Pasteur, Paris and CNRS.                     #
+# See the COPYRIGHT file for details                                               #
+#                                                                                  #
+# integron_finder is free software: you can redistribute it and/or modify          #
+# it under the terms of the GNU General Public License as published by             #
+# the Free Software Foundation, either version 3 of the License, or                #
+# (at your option) any later version.                                              #
+#                                                                                  #
+# integron_finder is distributed in the hope that it will be useful,               #
+# but WITHOUT ANY WARRANTY; without even the implied warranty of                   #
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the                    #
+# GNU General Public License for more details.                                     #
+#                                                                                  #
+# You should have received a copy of the GNU General Public License                #
+# along with this program (COPYING file).                                          #
+# If not, see <http://www.gnu.org/licenses/>.                                      #
+####################################################################################
+
+
+import os
+import sys
+import json
+import time
+import resource
+import threading
+from contextlib import contextmanager
+
+import colorlog
+import pandas as pd
+
+_log = colorlog.getLogger(__name__)
+
+COLUMNS = ['replicon', 'stage', 'wall_time', 'cpu_time', 'process_peak_rss', 'bytes_written']
+"""The columns of the timings file"""
+
+NO_REPLICON = '-'
+"""The replicon of the stages which are not specific to one replicon"""
+
+# the state of the timings in this process
+# (each job analysing replicons in parallel has its own state and appends to the same file)
+_path = None
+_replicon = NO_REPLICON
+# the stages opened by the main thread, the stages opened by other threads are nested in them
+_main_stages = []
+_thread_stages = threading.local()
+
+
+def start(path, new=True):
+    """
+    Start to record the timings in this process.
+
+    :param str path: the path of the timings file, None to disable the timings
+    :param bool new: if True a new file is created, otherwise the timings are appended to the existing file
+    """
+    global _path
+    _path = path
+    if path is not None and (new or not os.path.exists(path)):
+        with open(path, 'w') as timings_file:
+            timings_file.write('\t'.join(COLUMNS) + '\n')
+
+
+def enabled():
+    """
+    :return: True if the timings are recorded in this process, False otherwise.
+    :rtype: bool
+    """
+    return _path is not None
+
+
+def _stages():
+    """
+    :return: the stages opened by the current thread
+    :rtype: list of str
+    """
+    if threading.current_thread() is threading.main_thread():
+        return _main_stages
+    try:
+        return _thread_stages.stages
+    except AttributeError:
+        # the threads are started by the main thread, so their stages are nested in its current stage
+        _thread_stages.stages = list(_main_stages)
+        return _thread_stages.stages
+
+
+def _process_peak_rss():
+    """
+    :return: the peak resident set size of this process and of its terminated children (in bytes).
+    :rtype: int
+    """
+    peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+               resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    # ru_maxrss is in kilobytes on linux and in bytes on macOS
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def _cpu_time():
+    """
+    :return: the CPU time (user + system) used by this process and by its terminated children.
+    :rtype: float
+    """
+    cpu = 0.
+    for who in (resource.RUSAGE_SELF, resource.RUSAGE_CHILDREN):
+        usage = resource.getrusage(who)
+        cpu += usage.ru_utime + usage.ru_stime
+    return cpu
+
+
+def _written():
+    """
+    :return: the number of bytes written by this process (0 if it is not available on this system).
+    :rtype: int
+    """
+    try:
+        with open('/proc/self/io') as io:
+            for line in io:
+                if line.startswith('wchar:'):
+                    return int(line.split()[1])
+    except (OSError, ValueError):
+        pass
+    return 0
+
+
+def _record(*row):
+    """
+    Append a row to the timings file, with one write call in append mode,
+    so the rows written by several processes are not mixed.
+    """
+    line = '\t'.join(str(value) for value in row) + '\n'
+    fd = os.open(_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT)
+    try:
+        os.write(fd, line.encode())
+    finally:
+        os.close(fd)
+
+
+@contextmanager
+def _measure(stage_name, outputs=()):
+    """
+    Measure the resources used in this context and record them as the stage *stage_name*
+    of the current replicon.
+
+    :param str stage_name: the full name of the stage
+    :param outputs: the paths of the files written by a tool run in this context
+    :type outputs: list of str
+    """
+    wall = time.perf_counter()
+    cpu = _cpu_time()
+    written = _written()
+    try:
+        yield
+    finally:
+        wall = time.perf_counter() - wall
+        cpu = _cpu_time() - cpu
+        written = _written() - written
+        written += sum(os.path.getsize(path) for path in outputs if os.path.exists(path))
+        _record(_replicon, stage_name, "{:.3f}".format(wall), "{:.3f}".format(cpu), _process_peak_rss(), written)
+
+
+@contextmanager
+def stage(name, outputs=()):
+    """
+    Record the resources used by a stage of the analysis of the current replicon::
+
+        with timing.stage('local_max'):
+            ...
+
+    The stages can be nested, a nested stage is named after the stages which contain it,
+    for instance *local_max/cmsearch*.
+
+    * the wall time and the CPU time (of integron_finder and of the tools it has run) are in seconds,
+      the stages running at the same time in several threads share their CPU time.
+    * the process peak RSS is the high-water mark of the memory used by integron_finder or by one of the tools
+      it has run so far (in bytes), it is not reset between the stages,
+      so a stage reports the peak of the largest stage run before it.
+    * the bytes written are the bytes written by integron_finder plus the size of the outputs of the stage.
+
+    When the timings are not recorded (see :func:`start`) the stage does nothing.
+
+    :param str name: the name of the stage
+    :param outputs: the paths of the files written by a tool run in this stage
+    :type outputs: list of str
+    """
+    if _path is None:
+        yield
+        return
+    stages = _stages()
+    stages.append(name)
+    try:
+        with _measure('/'.join(stages), outputs=outputs):
+            yield
+    finally:
+        stages.pop()
+
+
+@contextmanager
+def replicon(replicon_id):
+    """
+    Set the replicon of the stages recorded in this context, the whole analysis of the replicon
+    is recorded as the stage *total*.
+
+    :param str replicon_id: the id of the replicon analysed
+    """
+    global _replicon
+    if _path is None:
+        yield
+        return
+    _replicon = replicon_id
+    try:
+        with _measure('total'):
+            yield
+    finally:
+        _replicon = NO_REPLICON
+
+
+def read_timings(path):
+    """
+    :param str path: the path of a timings file
+    :return: the timings recorded
+    :rtype: :class:`pandas.DataFrame` object
+    """
+    return pd.read_csv(path, sep='\t', dtype={'replicon': str, 'stage': str})
+
+
+def summary(timings):
+    """
+    Aggregate the timings per stage and per replicon.
+
+    :param timings: the timings recorded (see :func:`read_timings`)
+    :type timings: :class:`pandas.DataFrame` object
+    :return: the timings per stage (sorted by decreasing wall time) and the total of each replicon
+    :rtype: tuple of 2 :class:`pandas.DataFrame` objects
+    """
+    aggregation = {'wall_time': 'sum', 'cpu_time': 'sum', 'process_peak_rss': 'max', 'bytes_written': 'sum'}
+    by_stage = timings.groupby('stage').agg(dict(aggregation, replicon='count'))
+    by_stage = by_stage.rename(columns={'replicon': 'calls'})
+    by_stage = by_stage[['calls'] + list(aggregation)].sort_values('wall_time', ascending=False)
+    by_replicon = timings[timings.stage == 'total'].set_index('replicon')[list(aggregation)]
+    return by_stage, by_replicon
+
+
+def write_summary(path, timings_path):
+    """
+    Write the summary of the timings in json format and log it.
+
+    :param str path: the path of the json file to write
+    :param str timings_path: the path of the timings file
+    """
+    by_stage, by_replicon = summary(read_timings(timings_path))
+    with open(path, 'w') as json_file:
+        json.dump({'stages': json.loads(by_stage.to_json(orient='index')),
+                   'replicons': json.loads(by_replicon.to_json(orient='index'))},
+                  json_file, indent=2)
+    _log.info("Time spent in each stage (see {}):\n{}".format(timings_path, by_stage.to_string()))
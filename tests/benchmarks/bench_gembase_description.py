@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+
+####################################################################################
+# Integron_Finder - Integron Finder aims at detecting integrons in DNA sequences   #
+# by finding particular features of the integron:                                  #
+#   - the attC sites                                                               #
+#   - the integrase                                                                #
+#   - and when possible attI site and promoters.                                   #
+#                                                                                  #
+# Authors: Jean Cury, Bertrand Neron, Eduardo PC Rocha                             #
+# Copyright (c) 2015 - 2018  Institut Pasteur, Paris and CNRS.                     #
+# See the COPYRIGHT file for details                                               #
+#                                                                                  #
+# integron_finder is free software: you can redistribute it and/or modify          #
+# it under the terms of the GNU General Public License as published by             #
+# the Free Software Foundation, either version 3 of the License, or                #
+# (at your option) any later version.                                              #
+#                                                                                  #
+# integron_finder is distributed in the hope that it will be useful,               #
+# but WITHOUT ANY WARRANTY; without even the implied warranty of                   #
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the                    #
+# GNU General Public License for more details.                                     #
+#                                                                                  #
+# You should have received a copy of the GNU General Public License                #
+# along with this program (COPYING file).                                          #
+# If not, see <http://www.gnu.org/licenses/>.                                      #
+####################################################################################
+
+"""
+Micro-benchmark of :meth:`integron_finder.prot_db.GembaseDB.get_description`.
+
+Generate a synthetic Gembase Draft genome (LSTINFO, Proteins, Replicons)
+and compare the lookup of all genes against the previous implementation (regex on the LSTINFO table).
+
+usage: python tests/benchmarks/bench_gembase_description.py [nb_genes]
+"""
+
+import os
+import sys
+import random
+import shutil
+import tempfile
+import time
+import argparse
+
+from integron_finder.config import Config
+from integron_finder.utils import read_multi_prot_fasta
+from integron_finder.prot_db import GembaseDB, SeqDesc
+
+
+def legacy_get_description(info, gene_id):
+    """
+    The GembaseDB.get_description implementation before the description dictionary.
+    """
+    specie, date, strain, contig_gene = gene_id.split('.')
+    contig_gene = contig_gene[1:]  # remove the first letter b/i
+    pattern = r'{}\.{}\.{}\.\w?{}'.format(specie, date, strain, contig_gene)
+    seq_info = info.loc[info['seq_id'].str.contains(pattern, regex=True)]
+    if not seq_info.empty:
+        return SeqDesc(seq_info.seq_id.values[0],
+                       1 if seq_info.strand.values[0] == "D" else -1,
+                       seq_info.start.values[0],
+                       seq_info.end.values[0],
+                       )
+    else:
+        raise KeyError(gene_id)
+
+
+def make_draft_gembase(gembase_dir, nb_genes, seq_name='BENC.0001.00001', contig_len=500000, seed=0):
+    """
+    Write a Gembase Draft with one contig holding *nb_genes* genes.
+
+    :return: the path of the replicon file
+    """
+    rnd = random.Random(seed)
+    for sub_dir in ('LSTINFO', 'Proteins', 'Replicons'):
+        os.makedirs(os.path.join(gembase_dir, sub_dir))
+    contig_id = '{}.0001'.format(seq_name)
+    step = contig_len // nb_genes
+    with open(os.path.join(gembase_dir, 'LSTINFO', seq_name + '.lst'), 'w') as lst, \
+            open(os.path.join(gembase_dir, 'Proteins', seq_name + '.prt'), 'w') as prt:
+        for num in range(1, nb_genes + 1):
+            start = (num - 1) * step + 1
+            end = start + step - 10
+            border = 'b' if num in (1, nb_genes) else 'i'
+            seq_id = '{}.{}0001_{:05d}'.format(seq_name, border, num)
+            lst.write('{}\t{}\t{}\tCDS\t{}\tgene{}\t| a synthetic protein\n'.format(
+                start, end, rnd.choice('DC'), seq_id, num))
+            prt.write('>{} a synthetic protein\nM{}\n'.format(seq_id, 'A' * 60))
+    replicon_path = os.path.join(gembase_dir, 'Replicons', seq_name + '.fna')
+    with open(replicon_path, 'w') as fna:
+        fna.write('>{}\n'.format(contig_id))
+        seq = ''.join(rnd.choice('ACGT') for _ in range(contig_len))
+        for i in range(0, contig_len, 60):
+            fna.write(seq[i:i + 60] + '\n')
+    return replicon_path
+
+
+if __name__ == '__main__':
+    nb_genes = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        replicon_path = make_draft_gembase(os.path.join(tmp_dir, 'gembase'), nb_genes)
+        args = argparse.Namespace()
+        args.gembase = True
+        args.outdir = tmp_dir
+        args.replicon = replicon_path
+        cfg = Config(args)
+        replicon = next(read_multi_prot_fasta(replicon_path))
+        replicon.path = replicon_path
+
+        start = time.perf_counter()
+        db = GembaseDB(replicon, cfg)
+        init_time = time.perf_counter() - start
+        gene_ids = list(db)
+
+        start = time.perf_counter()
+        legacy = [legacy_get_description(db._info, gene_id) for gene_id in gene_ids]
+        legacy_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        new = [db.get_description(gene_id) for gene_id in gene_ids]
+        new_time = time.perf_counter() - start
+    finally:
+        shutil.rmtree(tmp_dir)
+
+    assert legacy == new
+    print("genes: {}".format(len(gene_ids)))
+    print("GembaseDB init:         {:8.3f} s".format(init_time))
+    print("legacy get_description: {:8.3f} s {:12.0f} lookups/s".format(legacy_time, len(gene_ids) / legacy_time))
+    print("get_description:        {:8.3f} s {:12.0f} lookups/s".format(new_time, len(gene_ids) / new_time))
+    print("speedup: x{:.0f}".format(legacy_time / new_time))
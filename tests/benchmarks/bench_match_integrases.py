@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+
+####################################################################################
+# Integron_Finder - Integron Finder aims at detecting integrons in DNA sequences   #
+# by finding particular features of the integron:                                  #
+#   - the attC sites                                                               #
+#   - the integrase                                                                #
+#   - and when possible attI site and promoters.                                   #
+#                                                                                  #
+# Authors: Jean Cury, Bertrand Neron, Eduardo PC Rocha                             #
+# Copyright (c) 2015 - 2018  Institut Pasteur, Paris and CNRS.                     #
+# See the COPYRIGHT file for details                                               #
+#                                                                                  #
+# integron_finder is free software: you can redistribute it and/or modify          #
+# it under the terms of the GNU General Public License as published by             #
+# the Free Software Foundation, either version 3 of the License, or                #
+# (at your option) any later version.                                              #
+#                                                                                  #
+# integron_finder is distributed in the hope that it will be useful,               #
+# but WITHOUT ANY WARRANTY; without even the implied warranty of                   #
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the                    #
+# GNU General Public License for more details.                                     #
+#                                                                                  #
+# You should have received a copy of the GNU General Public License                #
+# along with this program (COPYING file).                                          #
+# If not, see <http://www.gnu.org/licenses/>.                                      #
+####################################################################################
+
+"""
+Micro-benchmark of :func:`integron_finder.integron.match_integrases_arrays`.
+
+Generate a synthetic replicon with thousands of integrases and attC arrays and compare
+the time to match the integrases to the arrays against the previous implementation of find_integron
+(distances to all remaining arrays computed for each integrase, from the list of arrays DataFrames).
+
+usage: python tests/benchmarks/bench_match_integrases.py [nb_integrases] [nb_arrays]
+"""
+
+import sys
+import random
+import time
+
+import numpy as np
+import pandas as pd
+
+from integron_finder.integron import match_integrases_arrays
+
+
+def legacy_match(int_beg, int_end, attc_ac, replicon_size, circular, distance_threshold):
+    """
+    The matching of the integrases and the arrays done in find_integron before match_integrases_arrays.
+    """
+    attc_ac = list(enumerate(attc_ac))
+    matches = []
+    for i in range(len(int_beg)):
+        if not attc_ac:
+            matches.append(-1)
+            continue
+        attc_left = np.array([i_attc.pos_beg.values[0] for _, i_attc in attc_ac])
+        attc_right = np.array([i_attc.pos_end.values[-1] for _, i_attc in attc_ac])
+        if circular:
+            distances = np.array([(attc_left - int_end[i]), (int_beg[i] - attc_right)]) % replicon_size
+        else:
+            distances = np.array([abs(attc_left - int_end[i]), abs(int_beg[i] - attc_right)])
+        side, idx_attc = np.where(distances == distances.min())
+        idx_attc = idx_attc[0]
+        side = side[0]
+        if distances[side, idx_attc] < distance_threshold:
+            matches.append(attc_ac.pop(idx_attc)[0])
+        else:
+            matches.append(-1)
+    return matches
+
+
+def make_replicon(nb_integrases, nb_arrays, seed=0):
+    """
+    :return: the size of a synthetic replicon, the positions of its integrases and its arrays of attC sites
+    """
+    rnd = random.Random(seed)
+    replicon_size = (nb_integrases + nb_arrays) * 5000
+    int_beg = np.array(sorted(rnd.randrange(replicon_size) for _ in range(nb_integrases)))
+    int_end = int_beg + 1000
+    attc_ac = []
+    for left in sorted(rnd.randrange(replicon_size) for _ in range(nb_arrays)):
+        attc_nb = rnd.randint(1, 10)
+        pos_beg = left + np.arange(attc_nb) * 500
+        attc_ac.append(pd.DataFrame({'pos_beg': pos_beg, 'pos_end': pos_beg + 100}))
+    return replicon_size, int_beg, int_end, attc_ac
+
+
+def bench(func, repeat=3):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        res = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, res
+
+
+if __name__ == '__main__':
+    nb_integrases = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    nb_arrays = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    replicon_size, int_beg, int_end, attc_ac = make_replicon(nb_integrases, nb_arrays)
+    for circular in (False, True):
+        legacy_time, legacy_res = bench(lambda: legacy_match(int_beg, int_end, attc_ac,
+                                                             replicon_size, circular, 4000), repeat=1)
+
+        def new_match():
+            attc_left = np.array([i_attc.pos_beg.values[0] for i_attc in attc_ac])
+            attc_right = np.array([i_attc.pos_end.values[-1] for i_attc in attc_ac])
+            return match_integrases_arrays(int_beg, int_end, attc_left, attc_right, replicon_size, circular, 4000)
+
+        new_time, new_res = bench(new_match)
+        assert new_res.tolist() == legacy_res
+        print("{} replicon, integrases: {} arrays: {} matched: {}".format('circular' if circular else 'linear',
+                                                                        nb_integrases, nb_arrays,
+                                                                        sum(m >= 0 for m in legacy_res)))
+        print("legacy matching:         {:8.3f} s".format(legacy_time))
+        print("match_integrases_arrays: {:8.3f} s".format(new_time))
+        print("speedup: x{:.1f}".format(legacy_time / new_time))
@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+
+####################################################################################
+# Integron_Finder - Integron Finder aims at detecting integrons in DNA sequences   #
+# by finding particular features of the integron:                                  #
+#   - the attC sites                                                               #
+#   - the integrase                                                                #
+#   - and when possible attI site and promoters.                                   #
+#                                                                                  #
+# Authors: Jean Cury, Bertrand Neron, Eduardo PC Rocha                             #
+# Copyright (c) 2015 - 2018  Institut Pasteur, Paris and CNRS.                     #
+# See the COPYRIGHT file for details                                               #
+#                                                                                  #
+# integron_finder is free software: you can redistribute it and/or modify          #
+# it under the terms of the GNU General Public License as published by             #
+# the Free Software Foundation, either version 3 of the License, or                #
+# (at your option) any later version.                                              #
+#                                                                                  #
+# integron_finder is distributed in the hope that it will be useful,               #
+# but WITHOUT ANY WARRANTY; without even the implied warranty of                   #
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the                    #
+# GNU General Public License for more details.                                     #
+#                                                                                  #
+# You should have received a copy of the GNU General Public License                #
+# along with this program (COPYING file).                                          #
+# If not, see <http://www.gnu.org/licenses/>.                                      #
+####################################################################################
+
+"""
+Micro-benchmark of :func:`integron_finder.infernal.read_infernal`.
+
+Generate a synthetic cmsearch --tblout file and compare the rows/second of the
+current parser against the previous implementation (pandas python engine and row-wise apply).
+
+usage: python tests/benchmarks/bench_read_infernal.py [nb_rows]
+"""
+
+import os
+import sys
+import random
+import tempfile
+import time
+
+import pandas as pd
+import pandas.util.testing as pdt
+
+from integron_finder import infernal
+
+
+def legacy_read_infernal(infile, replicon_id, len_model_attc,
+                         evalue=1, size_max_attc=200, size_min_attc=40):
+    """
+    The read_infernal implementation before the single pass tblout parser.
+    """
+    try:
+        _ = pd.read_csv(infile, comment="#", sep="\t")
+    except Exception:
+        return pd.DataFrame(columns=["Accession_number", "cm_attC", "cm_debut",
+                                     "cm_fin", "pos_beg", "pos_end", "sens", "evalue"])
+
+    df = pd.read_csv(infile, sep=r"\s+", engine="python",  header=None,
+                     skipfooter=10, skiprows=2, usecols=[2, 5, 6, 7, 8, 9, 15])
+    df.columns = ["cm_attC", "cm_debut", "cm_fin", "pos_beg_tmp", "pos_end_tmp", "sens", "evalue"]
+    df["Accession_number"] = replicon_id
+    df = df[df.evalue < evalue]
+    df = df[(abs(df.pos_end_tmp - df.pos_beg_tmp) < size_max_attc) &
+            (size_min_attc < abs(df.pos_end_tmp - df.pos_beg_tmp))]
+    if not df.empty:
+        df.sort_values(['pos_end_tmp', 'evalue'], inplace=True)
+        df.index = list(range(0, len(df)))
+        idx = (df.pos_beg_tmp > df.pos_end_tmp)
+        df.loc[idx, "pos_beg"] = df.loc[idx].apply(lambda x: x["pos_end_tmp"] - (len_model_attc - x["cm_fin"]), axis=1)
+        df.loc[idx, "pos_end"] = df.loc[idx].apply(lambda x: x["pos_beg_tmp"] + (x["cm_debut"] - 1), axis=1)
+
+        df.loc[~idx, "pos_end"] = df.loc[~idx].apply(lambda x: x["pos_end_tmp"] + (len_model_attc - x["cm_fin"]), axis=1)
+        df.loc[~idx, "pos_beg"] = df.loc[~idx].apply(lambda x: x["pos_beg_tmp"] - (x["cm_debut"] - 1), axis=1)
+
+        return df[["Accession_number", "cm_attC", "cm_debut", "cm_fin", "pos_beg", "pos_end", "sens", "evalue"]]
+    else:
+        return pd.DataFrame(columns=["Accession_number", "cm_attC", "cm_debut",
+                                     "cm_fin", "pos_beg", "pos_end", "sens", "evalue"])
+
+
+def make_tblout(path, nb_rows, seed=0):
+    """
+    Write a synthetic cmsearch tblout with *nb_rows* hits.
+    Positions are all distinct, so the sort order does not depend on sort stability.
+    """
+    rnd = random.Random(seed)
+    positions = rnd.sample(range(1, nb_rows * 100), nb_rows)
+    with open(path, 'w') as tblout:
+        tblout.write("#target name         accession query name           accession mdl mdl from   mdl to "
+                     "seq from   seq to strand trunc pass   gc  bias  score   E-value inc description of target\n")
+        tblout.write("#------------------- --------- -------------------- --------- --- -------- -------- "
+                     "-------- -------- ------ ----- ---- ---- ----- ------ --------- --- ---------------------\n")
+        for pos in positions:
+            size = rnd.randint(30, 220)
+            cm_debut = rnd.randint(1, 5)
+            cm_fin = rnd.randint(42, 47)
+            if rnd.random() < 0.5:
+                seq_from, seq_to, strand = pos, pos + size, '+'
+            else:
+                seq_from, seq_to, strand = pos + size, pos, '-'
+            evalue = 10 ** rnd.uniform(-12, 1)
+            tblout.write("bench_replicon       -         attC_4               -          cm {:>8} {:>8} {:>8} {:>8} "
+                         "{:>6}    no    1 0.55   0.0   20.0 {:>9.2g} !   a synthetic replicon description\n".format(
+                          cm_debut, cm_fin, seq_from, seq_to, strand, evalue))
+        tblout.write("#\n"
+                     "# Program:         cmsearch\n"
+                     "# Version:         1.1.2 (July 2016)\n"
+                     "# Pipeline mode:   SEARCH\n"
+                     "# Query file:      attc_4.cm\n"
+                     "# Target file:     bench_replicon.fst\n"
+                     "# Option settings: cmsearch --cpu 1 --tblout bench_replicon_attc_table.res -E 10\n"
+                     "# Current dir:     /tmp\n"
+                     "# Date:            Thu Jan  1 00:00:00 1970\n"
+                     "# [ok]\n")
+
+
+def bench(func, path, repeat=3):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        df = func(path, 'bench_replicon', 47, evalue=10)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, df
+
+
+if __name__ == '__main__':
+    nb_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    tmp_dir = tempfile.mkdtemp()
+    path = os.path.join(tmp_dir, 'bench_replicon_attc_table.res')
+    try:
+        make_tblout(path, nb_rows)
+        legacy_time, legacy_df = bench(legacy_read_infernal, path)
+        new_time, new_df = bench(infernal.read_infernal, path)
+    finally:
+        os.unlink(path)
+        os.rmdir(tmp_dir)
+
+    # the legacy implementation produce float positions when both strands are present
+    int_cols = ["pos_beg", "pos_end"]
+    legacy_df[int_cols] = legacy_df[int_cols].astype(int)
+    pdt.assert_frame_equal(legacy_df, new_df)
+    print("rows: {}".format(nb_rows))
+    print("legacy read_infernal: {:8.3f} s {:12.0f} rows/s".format(legacy_time, nb_rows / legacy_time))
+    print("read_infernal:        {:8.3f} s {:12.0f} rows/s".format(new_time, nb_rows / new_time))
+    print("speedup: x{:.1f}".format(legacy_time / new_time))
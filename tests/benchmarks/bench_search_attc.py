@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+
+####################################################################################
+# Integron_Finder - Integron Finder aims at detecting integrons in DNA sequences   #
+# by finding particular features of the integron:                                  #
+#   - the attC sites                                                               #
+#   - the integrase                                                                #
+#   - and when possible attI site and promoters.                                   #
+#                                                                                  #
+# Authors: Jean Cury, Bertrand Neron, Eduardo PC Rocha                             #
+# Copyright (c) 2015 - 2018  Institut Pasteur, Paris and CNRS.                     #
+# See the COPYRIGHT file for details                                               #
+#                                                                                  #
+# integron_finder is free software: you can redistribute it and/or modify          #
+# it under the terms of the GNU General Public License as published by             #
+# the Free Software Foundation, either version 3 of the License, or                #
+# (at your option) any later version.                                              #
+#                                                                                  #
+# integron_finder is distributed in the hope that it will be useful,               #
+# but WITHOUT ANY WARRANTY; without even the implied warranty of                   #
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the                    #
+# GNU General Public License for more details.                                     #
+#                                                                                  #
+# You should have received a copy of the GNU General Public License                #
+# along with this program (COPYING file).                                          #
+# If not, see <http://www.gnu.org/licenses/>.                                      #
+####################################################################################
+
+
+"""
+Micro-benchmark of :func:`integron_finder.attc.cluster_attc`.
+
+Generate a synthetic table of attC hits and compare the time to cluster them in arrays
+(and to get the boundaries of the arrays as find_integron does) against the previous implementation
+of search_attc, which split the DataFrame of each strand and built one DataFrame per array.
+
+usage: python tests/benchmarks/bench_search_attc.py [nb_attc]
+"""
+
+import sys
+import random
+import time
+
+import numpy as np
+import pandas as pd
+
+from integron_finder.attc import cluster_attc
+
+
+def legacy_search_attc(attc_df, keep_palindromes, dist_threshold, replicon_size):
+    """
+    search_attc before cluster_attc.
+    """
+    ok = False
+    position_bkp_minus = []
+    position_bkp_plus = []
+    attc_plus = attc_df[attc_df.sens == "+"].copy()
+    attc_minus = attc_df[attc_df.sens == "-"].copy()
+    if not keep_palindromes:
+        attc_df = attc_df.sort_values(["pos_beg", "evalue"]).drop_duplicates(subset=["pos_beg"]).copy()
+        attc_plus = attc_df[attc_df.sens == "+"].copy()
+        attc_minus = attc_df[attc_df.sens == "-"].copy()
+    if (attc_plus.pos_beg.diff() > dist_threshold).any() or (attc_minus.pos_beg.diff() > dist_threshold).any():
+        if not attc_plus.empty:
+            bkp_plus = attc_plus[attc_plus.pos_beg.diff() > dist_threshold].index
+            position_bkp_plus = [attc_plus.index.get_loc(i) for i in bkp_plus]
+        if not attc_minus.empty:
+            bkp_minus = attc_minus[(attc_minus.pos_beg.diff() > dist_threshold)].index
+            position_bkp_minus = [attc_minus.index.get_loc(i) for i in bkp_minus]
+        ok = True
+    if not attc_plus.empty and not attc_minus.empty:
+        ok = True
+    if not ok:
+        return [] if attc_df.empty else [attc_df]
+    arrays = []
+    for attc_strand, position_bkp in ((attc_plus, position_bkp_plus), (attc_minus, position_bkp_minus)):
+        if attc_strand.empty:
+            continue
+        array_strand = np.split(attc_strand.values, position_bkp)
+        first_pos_beg = array_strand[0][0][4]
+        last_pos_beg = array_strand[-1][-1][4]
+        if len(array_strand) > 1 and (first_pos_beg - last_pos_beg) % replicon_size < dist_threshold:
+            array_strand[0] = np.concatenate((array_strand[-1], array_strand[0]))
+            del array_strand[-1]
+        arrays.extend(array_strand)
+    attc_array = [pd.DataFrame(i, columns=["Accession_number", "cm_attC", "cm_debut",
+                                           "cm_fin", "pos_beg", "pos_end", "sens", "evalue"]) for i in arrays]
+    intcols = ["cm_debut", "cm_fin", "pos_beg", "pos_end"]
+    for a in attc_array:
+        a[intcols] = a[intcols].astype(int)
+        a["evalue"] = a["evalue"].astype(float)
+    return attc_array
+
+
+def make_attc(nb_attc, seed=0):
+    """
+    :return: the size of a synthetic replicon and a table of attC hits, sorted along the start site.
+    """
+    rnd = random.Random(seed)
+    replicon_size = nb_attc * 1000
+    pos_beg = sorted(rnd.randrange(replicon_size) for _ in range(nb_attc))
+    attc_df = pd.DataFrame({"Accession_number": "foo",
+                            "cm_attC": "attc_4",
+                            "cm_debut": 1,
+                            "cm_fin": 47,
+                            "pos_beg": pos_beg,
+                            "pos_end": [beg + rnd.randint(40, 200) for beg in pos_beg],
+                            "sens": [rnd.choice("+-") for _ in pos_beg],
+                            "evalue": [rnd.choice((1e-9, 1e-5, 1e-3)) for _ in pos_beg]},
+                           columns=["Accession_number", "cm_attC", "cm_debut", "cm_fin",
+                                    "pos_beg", "pos_end", "sens", "evalue"])
+    return replicon_size, attc_df
+
+
+def bench(func, repeat=3):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        res = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, res
+
+
+if __name__ == '__main__':
+    nb_attc = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    replicon_size, attc_df = make_attc(nb_attc)
+    for keep_palindromes in (True, False):
+        def legacy():
+            attc_ac = legacy_search_attc(attc_df, keep_palindromes, 4000, replicon_size)
+            attc_left = np.array([i_attc.pos_beg.values[0] for i_attc in attc_ac])
+            attc_right = np.array([i_attc.pos_end.values[-1] for i_attc in attc_ac])
+            return attc_ac, attc_left, attc_right
+
+        def new():
+            attc_ac = cluster_attc(attc_df, keep_palindromes, 4000, replicon_size)
+            return attc_ac, attc_ac.left, attc_ac.right
+
+        legacy_time, (legacy_ac, legacy_left, legacy_right) = bench(legacy, repeat=1)
+        new_time, (new_ac, new_left, new_right) = bench(new)
+        assert len(new_ac) == len(legacy_ac)
+        assert new_left.tolist() == legacy_left.tolist() and new_right.tolist() == legacy_right.tolist()
+        print("keep palindromes: {} attC: {} arrays: {}".format(keep_palindromes, nb_attc, len(new_ac)))
+        print("legacy search_attc: {:8.3f} s".format(legacy_time))
+        print("cluster_attc:       {:8.3f} s".format(new_time))
+        print("speedup: x{:.1f}".format(legacy_time / new_time))
@@ -0,0 +1,19 @@
+#                                                                            --- full sequence --- -------------- this domain -------------   hmm coord   ali coord   env coord
+# target name        accession   tlen query name           accession   qlen   E-value  score  bias   #  of  c-Evalue  i-Evalue  score  bias  from    to  from    to  from    to  acc description of target
+#------------------- ---------- ----- -------------------- ---------- ----- --------- ------ ----- --- --- --------- --------- ------ ----- ----- ----- ----- ----- ----- ----- ---- ---------------------
+ACBA.007.P01_13_23   -            177 AAC3-I               RF0003       154  5.4e-110  355.1   0.6   1   1  2.7e-111  6.2e-110  354.9   0.6     1   154    24   177    24   177 1.00 # 19721 # 20254 # -1 # ID=1_23;partial=00;start_type=ATG;rbs_motif=GGAG/GAGG;rbs_spacer=5-10bp;gc_cont=0.536
+ACBA.007.P01_13_23   -            177 ANT2                 RF0026       249     5e-09   26.3   0.1   1   1   3.2e-10   7.5e-09   25.7   0.1    52    72     1    21     1    43 0.92 # 19721 # 20254 # -1 # ID=1_23;partial=00;start_type=ATG;rbs_motif=GGAG/GAGG;rbs_spacer=5-10bp;gc_cont=0.536
+ACBA.007.P01_13_21   -            259 ANT3                 RF0027       263  6.6e-168  547.1   1.0   1   1  3.2e-169  7.4e-168  547.0   1.0     5   263     1   259     1   259 1.00 # 17886 # 18665 # -1 # ID=1_21;partial=00;start_type=GTG;rbs_motif=GGAG/GAGG;rbs_spacer=5-10bp;gc_cont=0.532
+ACBA.007.P01_13_21   -            259 ANT9                 RF0030       260   5.5e-61  196.6   0.0   1   1   2.6e-62     6e-61  196.4   0.0     8   258     4   256     1   258 0.96 # 17886 # 18665 # -1 # ID=1_21;partial=00;start_type=GTG;rbs_motif=GGAG/GAGG;rbs_spacer=5-10bp;gc_cont=0.532
+ACBA.007.P01_13_20   -            115 emrE                 RF0066       110   3.8e-31   98.5   9.4   1   1     2e-32   4.5e-31   98.3   9.4     2    99     2    99     1   105 0.96 # 17375 # 17722 # -1 # ID=1_20;partial=00;start_type=ATG;rbs_motif=GGAG/GAGG;rbs_spacer=5-10bp;gc_cont=0.497
+ACBA.007.P01_13_21   -            259 ANT                  RF0166       265  6.3e-112  363.7   0.1   1   1  3.1e-113    7e-112  363.5   0.1     4   265     1   259     1   259 0.99 # 17886 # 18665 # -1 # ID=1_21;partial=00;start_type=GTG;rbs_motif=GGAG/GAGG;rbs_spacer=5-10bp;gc_cont=0.532
+#
+# Program:         hmmsearch
+# Version:         3.1b2 (February 2015)
+# Pipeline mode:   SEARCH
+# Query file:      /usr/local/share/integron_finder/data/Functional_annotation/Resfams.hmm
+# Target file:     ACBA.007.P01_13_subseqprot.tmp
+# Option settings: hmmsearch --domtblout ACBA.007.P01_13_Resfams_fa.res -o /dev/null -Z 23 --cpu 1 Resfams.hmm ACBA.007.P01_13_subseqprot.tmp 
+# Current dir:     /tmp
+# Date:            Mon Mar 12 11:02:49 2018
+# [ok]
@@ -50,6 +50,7 @@ except ImportError as err:
 from integron_finder import integrase
 from integron_finder import config
 from integron_finder.scripts.finder import main
+from integron_finder.infernal import read_tblout
 import integron_finder.scripts.finder as finder
 
 _prodigal_call = integrase.call
@@ -169,6 +170,31 @@ class TestAcba(IntegronTest):
         iso_summary.set_index(['ID_replicon'], inplace=True)
         pdt.assert_frame_equal(summary_2nd_contig, iso_summary)
 
+    def test_acba_jobs_eq_sequential(self):
+        """
+        test if we find the same results if we run IF in sequential or with several jobs
+        ACBA.0917.00019 contains 2 contigs 0001 and 0002.
+        the merged .integrons and .summary files should be identical
+        """
+        replicon_filename = 'ACBA.0917.00019'
+        replicon_path = self.find_data(os.path.join('Gembase', 'Replicons', replicon_filename + '.fna'))
+        result_files = {}
+        for jobs in (1, 2):
+            out_dir = os.path.join(self.out_dir, 'jobs_{}'.format(jobs))
+            cmd = "integron_finder --outdir {out_dir} --jobs {jobs} {replicon}".format(out_dir=out_dir,
+                                                                                       jobs=jobs,
+                                                                                       replicon=replicon_path)
+            with self.catch_io(out=True, err=True):
+                main(cmd.split()[1:], loglevel='WARNING')
+            test_result_dir = os.path.join(out_dir, 'Results_Integron_Finder_{}'.format(replicon_filename))
+            result_files[jobs] = [os.path.join(test_result_dir, replicon_filename + ext)
+                                  for ext in ('.integrons', '.summary')]
+
+        self.assertIntegronResultEqual(result_files[1][0], result_files[2][0])
+        seq_summary = pd.read_csv(result_files[1][1], sep="\t", comment='#')
+        jobs_summary = pd.read_csv(result_files[2][1], sep="\t", comment='#')
+        pdt.assert_frame_equal(seq_summary, jobs_summary)
+
     def test_acba_simple_gembase(self):
         """
         ACBA.0917.00019 contains 2 contigs 0001 and 0002.
@@ -393,12 +419,18 @@ class TestAcba(IntegronTest):
         output_filename = os.path.join('tmp_{}'.format(replicon_id), '{}_13825_1014_subseq_attc_table.res'.format(replicon_id))
         expected_result_path = self.find_data(os.path.join('Results_Integron_Finder_{}.local_max'.format(replicon_filename),
                                                            output_filename))
+        # the output of each window is named after the strand searched
+        # and the hits are renamed after the window (see infernal._split_tblout)
+        output_filename = os.path.join('tmp_{}'.format(replicon_id),
+                                       '{}_13825_1014_bottom_subseq_attc_table.res'.format(replicon_id))
         test_result_path = os.path.join(result_dir, output_filename)
-        with open(expected_result_path) as expected_result_file, open(test_result_path) as test_result_file:
-            for expected_line, result_line in zip(expected_result_file, test_result_file):
-                if result_line.startswith('# Program: '):
-                    break
-                self.assertEqual(expected_line, result_line)
+        expected_hits = read_tblout(expected_result_path)
+        test_hits = read_tblout(test_result_path)
+        del expected_hits['target_name']
+        del test_hits['target_name']
+        self.assertListEqual(sorted(expected_hits), sorted(test_hits))
+        for column in expected_hits:
+            self.assertListEqual(expected_hits[column].tolist(), test_hits[column].tolist())
 
 
     def test_no_integron(self):
@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+
+####################################################################################
+# Integron_Finder - Integron Finder aims at detecting integrons in DNA sequences   #
+# by finding particular features of the integron:                                  #
+#   - the attC sites                                                               #
+#   - the integrase                                                                #
+#   - and when possible attI site and promoters.                                   #
+#                                                                                  #
+# Authors: Jean Cury, Bertrand Neron, Eduardo PC Rocha                             #
+# Copyright (c) 2015 - 2018  Institut Pasteur, Paris and CNRS                      #
+# See the COPYRIGHT file for details                                               #
+#                                                                                  #
+# integron_finder is free software: you can redistribute it and/or modify          #
+# it under the terms of the GNU General Public License as published by             #
+# the Free Software Foundation, either version 3 of the License, or                #
+# (at your option) any later version.                                              #
+#                                                                                  #
+# integron_finder is distributed in the hope that it will be useful,               #
+# but WITHOUT ANY WARRANTY; without even the implied warranty of                   #
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the                    #
+# GNU General Public License for more details.                                     #
+#                                                                                  #
+# You should have received a copy of the GNU General Public License                #
+# along with this program (COPYING file).                                          #
+# If not, see <http://www.gnu.org/licenses/>.                                      #
+####################################################################################
+
+import os
+import time
+import tempfile
+import shutil
+
+try:
+    from tests import IntegronTest
+except ImportError as err:
+    msg = "Cannot import integron_finder: {0!s}".format(err)
+    raise ImportError(msg)
+
+from integron_finder import cache
+from integron_finder import infernal
+
+_call_ori = infernal.call
+
+
+class TestCache(IntegronTest):
+
+    def setUp(self):
+        self.tmp_dir = os.path.join(tempfile.gettempdir(), 'tmp_test_integron_finder')
+        if os.path.exists(self.tmp_dir) and os.path.isdir(self.tmp_dir):
+            shutil.rmtree(self.tmp_dir)
+        os.makedirs(self.tmp_dir)
+        self.cache_dir = os.path.join(self.tmp_dir, 'cache')
+
+    def tearDown(self):
+        try:
+            shutil.rmtree(self.tmp_dir)
+        except:
+            pass
+        infernal.call = _call_ori
+
+    def write(self, name, content):
+        path = os.path.join(self.tmp_dir, name)
+        with open(path, 'w') as f:
+            f.write(content)
+        return path
+
+    def read(self, path):
+        with open(path) as f:
+            return f.read()
+
+    def test_command_key(self):
+        seq = self.write('seq.fst', '>foo\nACGT\n')
+        seq_copy = self.write('seq_copy.fst', '>foo\nACGT\n')
+        other_seq = self.write('other_seq.fst', '>foo\nACGG\n')
+        key = cache.command_key(['cmsearch', '--cpu', '2', '-A', 'a.res', seq],
+                                inputs=[seq], outputs=['a.res'], version='1.1')
+        # the file names and the number of cpu do not matter
+        self.assertEqual(key,
+                         cache.command_key(['/usr/bin/cmsearch', '--cpu', '4', '-A', 'b.res', seq_copy],
+                                           inputs=[seq_copy], outputs=['b.res'], version='1.1'))
+        # the inputs content, the version and the options matter
+        self.assertNotEqual(key,
+                            cache.command_key(['cmsearch', '--cpu', '2', '-A', 'a.res', other_seq],
+                                              inputs=[other_seq], outputs=['a.res'], version='1.1'))
+        self.assertNotEqual(key,
+                            cache.command_key(['cmsearch', '--cpu', '2', '-A', 'a.res', seq],
+                                              inputs=[seq], outputs=['a.res'], version='1.2'))
+        self.assertNotEqual(key,
+                            cache.command_key(['cmsearch', '--cpu', '2', '--max', '-A', 'a.res', seq],
+                                              inputs=[seq], outputs=['a.res'], version='1.1'))
+        self.assertNotEqual(cache.command_key(['cmsearch', '-'], stdin=b'>foo\nACGT\n'),
+                            cache.command_key(['cmsearch', '-'], stdin=b'>foo\nACGG\n'))
+
+    def test_get_put(self):
+        results_cache = cache.ResultsCache(self.cache_dir)
+        out_1 = self.write('out_1', 'foo')
+        out_2 = self.write('out_2', 'bar')
+        self.assertFalse(results_cache.get('abcd', [out_1, out_2]))
+        results_cache.put('abcd', [out_1, out_2])
+        self.assertTrue(os.path.isdir(os.path.join(self.cache_dir, 'ab', 'abcd')))
+        copy_1 = os.path.join(self.tmp_dir, 'copy_1')
+        copy_2 = os.path.join(self.tmp_dir, 'copy_2')
+        self.assertTrue(results_cache.get('abcd', [copy_1, copy_2]))
+        self.assertEqual(self.read(copy_1), 'foo')
+        self.assertEqual(self.read(copy_2), 'bar')
+        # an entry with missing outputs is not used
+        self.assertFalse(results_cache.get('abcd', [copy_1, copy_2, os.path.join(self.tmp_dir, 'copy_3')]))
+
+    def test_evict(self):
+        results_cache = cache.ResultsCache(self.cache_dir, max_size=10)
+        out = self.write('out', 'foo')
+        for key in ('aaaa', 'bbbb', 'cccc'):
+            results_cache.put(key, [out])
+        now = time.time()
+        for age, key in ((30, 'aaaa'), (20, 'bbbb'), (10, 'cccc')):
+            path = os.path.join(self.cache_dir, key[:2], key)
+            os.utime(path, (now - age, now - age))
+        # aaaa is used so bbbb is now the least recently used entry
+        self.assertTrue(results_cache.get('aaaa', [os.path.join(self.tmp_dir, 'copy')]))
+        results_cache.put('dddd', [out])
+        self.assertEqual(sorted(os.path.basename(path) for _, _, path in results_cache.entries()),
+                         ['aaaa', 'cccc', 'dddd'])
+
+    def test_cached_run(self):
+        seq = self.write('seq.fst', '>foo\nACGT\n')
+        runs = []
+
+        def run(out):
+            runs.append(out)
+            with open(out, 'w') as f:
+                f.write('hit')
+
+        out_1 = os.path.join(self.tmp_dir, 'out_1')
+        cache.cached_run(None, ['tool', '-o', out_1, seq], [seq], [out_1], lambda: run(out_1))
+        cache.cached_run(None, ['tool', '-o', out_1, seq], [seq], [out_1], lambda: run(out_1))
+        self.assertEqual(runs, [out_1, out_1])
+
+        results_cache = cache.ResultsCache(self.cache_dir)
+        runs = []
+        out_2 = os.path.join(self.tmp_dir, 'out_2')
+        cache.cached_run(results_cache, ['tool', '-o', out_1, seq], [seq], [out_1], lambda: run(out_1))
+        cache.cached_run(results_cache, ['tool', '-o', out_2, seq], [seq], [out_2], lambda: run(out_2))
+        self.assertEqual(runs, [out_1])
+        self.assertEqual(self.read(out_2), 'hit')
+
+    def test_find_attc(self):
+        replicon_path = self.find_data(os.path.join('Replicons', 'acba.007.p01.13.fst'))
+        model_attc = self.find_data(os.path.join('Models', 'attc_4.cm'))
+        runs = []
+
+        def fake_call(cmd, stdout=None):
+            runs.append(cmd)
+            for opt in ('-A', '--tblout'):
+                with open(cmd[cmd.index(opt) + 1], 'w') as out:
+                    out.write(opt)
+            return 0
+
+        infernal.call = fake_call
+        results_cache = cache.ResultsCache(self.cache_dir)
+        for run_nb, cpu in ((1, 1), (2, 4)):
+            out_dir = os.path.join(self.tmp_dir, 'run_{}'.format(run_nb))
+            os.makedirs(out_dir)
+            infernal.find_attc(replicon_path, 'acba.007.p01.13', 'cmsearch', out_dir, model_attc,
+                               cpu=cpu, cache=results_cache)
+            self.assertEqual(self.read(os.path.join(out_dir, 'acba.007.p01.13_attc.res')), '-A')
+            self.assertEqual(self.read(os.path.join(out_dir, 'acba.007.p01.13_attc_table.res')), '--tblout')
+        self.assertEqual(len(runs), 1)
@@ -28,6 +28,7 @@
 
 import argparse
 import os
+import pickle
 
 try:
     from tests import IntegronTest
@@ -53,6 +54,14 @@ class TestConfig(IntegronTest):
             self.assertEqual(cf.foobar, 'foobar')
         self.assertEqual(str(ctx.exception), "config object has no attribute 'foobar'")
 
+    def test_pickle(self):
+        self.args.replicon = 'foo'
+        self.args.cpu = 2
+        cf = config.Config(self.args)
+        cf_unpickled = pickle.loads(pickle.dumps(cf))
+        self.assertEqual(cf_unpickled.input_seq_path, cf.input_seq_path)
+        self.assertEqual(cf_unpickled.cpu, 2)
+
     def test_replicon_path(self):
         self.args.replicon = '../foo'
         cf = config.Config(self.args)
@@ -104,6 +113,60 @@ class TestConfig(IntegronTest):
         cf = config.Config(self.args)
         self.assertIsNone(cf.default_topology)
 
+    def test_phase(self):
+        cf = config.Config(self.args)
+        self.assertEqual(cf.phase, 'all')
+        self.args.phase = 'reanalyze'
+        self.args.replicon = 'foo.fst'
+        self.args.outdir = 'outdir'
+        cf = config.Config(self.args)
+        self.assertEqual(cf.phase, 'reanalyze')
+        self.assertEqual(cf.hits_path('bar'), os.path.join(cf.tmp_dir('bar'), 'bar_hits'))
+
+    def test_resume(self):
+        cf = config.Config(self.args)
+        self.assertFalse(cf.resume)
+        self.args.resume = True
+        self.args.replicon = 'foo.fst'
+        self.args.outdir = 'outdir'
+        cf = config.Config(self.args)
+        self.assertTrue(cf.resume)
+        self.assertEqual(cf.journal_path, os.path.join(cf.result_dir, 'integron_finder.journal'))
+
+    def test_timings(self):
+        self.args.replicon = 'foo.fst'
+        self.args.outdir = 'outdir'
+        cf = config.Config(self.args)
+        self.assertFalse(cf.timings)
+        self.assertIsNone(cf.timings_path)
+        self.args.timings = True
+        cf = config.Config(self.args)
+        self.assertEqual(cf.timings_path, os.path.join(cf.result_dir, 'timings.tsv'))
+        self.assertEqual(cf.timings_summary_path, os.path.join(cf.result_dir, 'timings.json'))
+
+    def test_local_max_merge_windows(self):
+        cf = config.Config(self.args)
+        self.assertFalse(cf.local_max_merge_windows)
+        self.args.local_max_merge_windows = True
+        cf = config.Config(self.args)
+        self.assertTrue(cf.local_max_merge_windows)
+
+    def test_cache(self):
+        cf = config.Config(self.args)
+        self.assertIsNone(cf.cache_dir)
+        self.assertIsNone(cf.cache_max_size)
+        self.assertIsNone(cf.cache)
+        self.args.cache_dir = 'cache'
+        self.args.cache_max_size = 2
+        cf = config.Config(self.args)
+        self.assertEqual(cf.cache_dir, os.path.abspath('cache'))
+        self.assertEqual(cf.cache_max_size, 2 * 1024 * 1024)
+        self.assertEqual(cf.cache.cache_dir, os.path.abspath('cache'))
+        self.assertEqual(cf.cache.max_size, 2 * 1024 * 1024)
+        self.args.cache_max_size = 0
+        cf = config.Config(self.args)
+        self.assertIsNone(cf.cache.max_size)
+
     def test_model_dir(self):
         cf = config.Config(self.args)
         cf._prefix_data = 'foo'
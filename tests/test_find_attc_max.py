@@ -51,6 +51,7 @@ from integron_finder.integron import Integron
 from integron_finder.config import Config
 from integron_finder.utils import FastaIterator
 from integron_finder.topology import Topology
+from integron_finder import attc
 from integron_finder.attc import find_attc_max
 from integron_finder.prot_db import ProdigalDB
 
@@ -297,3 +298,71 @@ class TestFindAttCMax(IntegronTest):
         exp = pd.DataFrame(columns=self.max_cols)
         exp = exp.astype(dtype=self.max_dtype)
         pdt.assert_frame_equal(max_final, exp)
+
+
+    def test_find_attc_max_calin_overlap(self):
+        # a complete integron, a CALIN overlapping the attC sites found around it and a distant CALIN
+        integrase = pd.DataFrame({'pos_beg': 1545830,
+                                  'pos_end': 1546807,
+                                  'strand': -1,
+                                  'evalue': 1.100000e-21,
+                                  'type_elt': 'protein',
+                                  'annotation': 'intI',
+                                  'model': 'intersection_tyr_intI',
+                                  'distance_2attC': np.nan
+                                  },
+                                 index=['OBAL001.B.00005.C001_141'],
+                                 columns=self.columns)
+        self.integron.integrase = integrase.astype(dtype=self.dtype)
+        self.integron.attC = pd.DataFrame({'pos_beg': [1547800], 'pos_end': [1547859], 'strand': [1],
+                                           'evalue': [0.00049], 'type_elt': ['attC'], 'annotation': ['attC'],
+                                           'model': ['attc_4'], 'distance_2attC': [np.nan]},
+                                          index=['attc_001'],
+                                          columns=self.columns).astype(dtype=self.dtype)
+        calins = []
+        for pos_beg in (1546818, 421689):
+            calin = Integron(self.replicon, self.cfg)
+            calin.attC = pd.DataFrame({'pos_beg': [pos_beg], 'pos_end': [pos_beg + 46], 'strand': [1],
+                                       'evalue': [0.13], 'type_elt': ['attC'], 'annotation': ['attC'],
+                                       'model': ['attc_4'], 'distance_2attC': [np.nan]},
+                                      index=['attc_001'],
+                                      columns=self.columns).astype(dtype=self.dtype)
+            calins.append(calin)
+
+        complete_window = (1546807, 1551859, 'top')
+        calin_windows = [(1542818, 1550864, 'top'), (417689, 425735, 'top')]
+        hits = {window: window[0] + 11 for window in (complete_window, calin_windows[1])}
+        searched = []
+
+        def fake_local_max_windows(replicon, windows, model_attc_path, **kwargs):
+            dfs_max = []
+            for window in windows:
+                searched.append(window)
+                df_max = pd.DataFrame(columns=self.max_cols).astype(dtype=self.max_dtype)
+                if window in hits:
+                    df_max = pd.DataFrame([[replicon.id, 'attC_4', 1, 47, hits[window], hits[window] + 46, '+', 1e-3]],
+                                          columns=self.max_cols).astype(dtype=self.max_dtype)
+                dfs_max.append(df_max)
+            return dfs_max
+
+        local_max_windows_ori = attc.local_max_windows
+        merge_window_stores_ori = attc.merge_window_stores
+        attc.local_max_windows = fake_local_max_windows
+        attc.merge_window_stores = lambda replicon_id, windows, out_dir: searched_windows.extend(windows)
+        searched_windows = []
+        try:
+            max_final = find_attc_max([self.integron] + calins, self.replicon,
+                                      self.cfg.distance_threshold, self.cfg.model_attc_path,
+                                      self.cfg.max_attc_size, self.cfg.min_attc_size,
+                                      circular=False,
+                                      out_dir=self.tmp_dir)
+        finally:
+            attc.local_max_windows = local_max_windows_ori
+            attc.merge_window_stores = merge_window_stores_ori
+
+        # the overlapping CALIN is not searched
+        self.assertIn(complete_window, searched)
+        self.assertIn(calin_windows[1], searched)
+        self.assertNotIn(calin_windows[0], searched)
+        self.assertNotIn(calin_windows[0], searched_windows)
+        self.assertListEqual(max_final.pos_beg.tolist(), [1546818, 417700])
@@ -33,6 +33,8 @@ import argparse
 import re
 import distutils.spawn
 
+import pandas.util.testing as pdt
+
 try:
     from tests import IntegronTest
 except ImportError as err:
@@ -43,6 +45,8 @@ from integron_finder.utils import FastaIterator
 from integron_finder.topology import Topology
 from integron_finder.config import Config
 from integron_finder import integrase
+from integron_finder.hmm import read_hmm, hmm_names
+from integron_finder.prot_db import ProdigalDB
 from integron_finder import EmptyFileError
 
 _call_ori = integrase.call
@@ -103,6 +107,200 @@ class TestFindIntegrase(IntegronTest):
             self.assertTrue(os.path.exists(res))
 
 
+    def test_find_integrase_domtblout(self):
+        cmds = []
+
+        def fake_call(cmd, *args, **kwargs):
+            cmds.append(cmd)
+            return 0
+
+        integrase.call = fake_call
+        self.args.hmmsearch = 'hmmsearch'
+        self.args.hmm_domtblout = True
+        self.args.keep_tmp = False
+        cfg = Config(self.args)
+        cfg._prefix_data = os.path.join(os.path.dirname(__file__), 'data')
+
+        replicon_id = 'ACBA.007.P01_13'
+        prot_file = os.path.join(self.tmp_dir, replicon_id + ".prt")
+        shutil.copyfile(self.find_data(os.path.join('Proteins', replicon_id + ".prt")), prot_file)
+
+        integrase.find_integrase(replicon_id, prot_file, self.tmp_dir, cfg)
+        self.assertEqual(len(cmds), 2)
+        for cmd, suffix, model in zip(cmds, ('_intI', '_phage_int'), (cfg.model_integrase, cfg.model_phage_int)):
+            self.assertListEqual(cmd,
+                                 [cfg.hmmsearch, "--cpu", "1",
+                                  "--tblout", os.path.join(self.tmp_dir, replicon_id + suffix + "_table.res"),
+                                  "--domtblout", os.path.join(self.tmp_dir, replicon_id + suffix + ".res"),
+                                  "-o", os.devnull,
+                                  model, prot_file])
+
+
+    def test_integrase_models(self):
+        self.args.replicon = self.find_data(os.path.join('Replicons', 'acba.007.p01.13.fst'))
+        self.args.outdir = self.tmp_dir
+        cfg = Config(self.args)
+        models_path = integrase.integrase_models(cfg)
+        self.assertEqual(models_path, cfg.model_integrases)
+        self.assertEqual(hmm_names(models_path), hmm_names(cfg.model_integrase) + hmm_names(cfg.model_phage_int))
+        with open(cfg.model_integrase) as intI, open(cfg.model_phage_int) as phage, open(models_path) as models:
+            self.assertEqual(models.read(), intI.read() + phage.read())
+
+
+    def test_find_integrase_combined(self):
+        replicon_name = 'acba.007.p01.13'
+        replicon_id = 'ACBA.007.P01_13'
+        exp_dir = self.find_data(os.path.join('Results_Integron_Finder_{}'.format(replicon_name),
+                                              'tmp_{}'.format(replicon_id)))
+
+        def read_lines(suffix):
+            with open(os.path.join(exp_dir, replicon_id + suffix)) as res:
+                return res.readlines()
+
+        # build the output of hmmsearch run with both profiles from the output of each run
+        intI_text, phage_text = read_lines('_intI.res'), read_lines('_phage_int.res')
+        intI_query = [i for i, l in enumerate(intI_text) if l.startswith('Query:')][0]
+        phage_query = [i for i, l in enumerate(phage_text) if l.startswith('Query:')][0]
+        combined_text = intI_text[:-1] + phage_text[phage_query:]
+        intI_table, phage_table = read_lines('_intI_table.res'), read_lines('_phage_int_table.res')
+        combined_table = [l for l in intI_table if l.startswith('#')][:3] + \
+                         [l for l in intI_table + phage_table if not l.startswith('#')] + \
+                         [l for l in intI_table if l.startswith('#')][3:]
+        cmds = []
+
+        def fake_call(cmd, *args, **kwargs):
+            cmds.append(cmd)
+            with open(cmd[cmd.index('-o') + 1], 'w') as out:
+                out.writelines(combined_text)
+            with open(cmd[cmd.index('--tblout') + 1], 'w') as out:
+                out.writelines(combined_table)
+            return 0
+
+        integrase.call = fake_call
+        self.args.hmmsearch = 'hmmsearch'
+        self.args.combined_integrase_search = True
+        self.args.replicon = self.find_data(os.path.join('Replicons', replicon_name + '.fst'))
+        self.args.outdir = self.tmp_dir
+        self.args.gembase = False
+        cfg = Config(self.args)
+        out_dir = cfg.tmp_dir(replicon_id)
+        os.makedirs(out_dir)
+        prot_file = os.path.join(out_dir, replicon_id + ".prt")
+        shutil.copyfile(self.find_data(os.path.join('Proteins', replicon_id + ".prt")), prot_file)
+
+        integrase.find_integrase(replicon_id, prot_file, out_dir, cfg)
+        self.assertEqual(len(cmds), 1)
+        self.assertEqual(cmds[0][-2:], [cfg.model_integrases, prot_file])
+
+        with FastaIterator(self.args.replicon) as sequences_db:
+            sequences_db.topologies = Topology('lin')
+            replicon = next(sequences_db)
+        prot_db = ProdigalDB(replicon, cfg, prot_file=prot_file)
+        for suffix in ('_intI', '_phage_int'):
+            exp = read_hmm(replicon_id, prot_db, os.path.join(exp_dir, replicon_id + suffix + '.res'), cfg)
+            got = read_hmm(replicon_id, prot_db, os.path.join(out_dir, replicon_id + suffix + '.res'), cfg)
+            pdt.assert_frame_equal(exp, got)
+            with open(os.path.join(out_dir, replicon_id + suffix + '_table.res')) as table:
+                got_hits = [l for l in table if not l.startswith('#')]
+            exp_hits = [l for l in read_lines(suffix + '_table.res') if not l.startswith('#')]
+            self.assertListEqual(got_hits, exp_hits)
+
+        # the results exist, hmmsearch is not run again
+        integrase.find_integrase(replicon_id, prot_file, out_dir, cfg)
+        self.assertEqual(len(cmds), 1)
+
+
+    def test_find_integrase_batch(self):
+        self.args.keep_tmp = False
+        self.args.hmmsearch = 'hmmsearch'
+        self.args.replicon = self.find_data(os.path.join('Replicons', 'acba.007.p01.13.fst'))
+        self.args.outdir = self.tmp_dir
+        self.args.gembase = False
+        cfg = Config(self.args)
+        intI_query = hmm_names(cfg.model_integrase)[0]
+        phage_query = hmm_names(cfg.model_phage_int)[0]
+
+        replicons = []
+        for replicon_id in ('ACBA.007.P01_13', 'empty', 'ESCO001.B.00018.P002'):
+            out_dir = cfg.tmp_dir(replicon_id)
+            os.makedirs(out_dir)
+            prot_file = os.path.join(out_dir, replicon_id + ".prt")
+            if replicon_id == 'empty':
+                open(prot_file, 'w').close()
+            else:
+                shutil.copyfile(self.find_data(os.path.join('Proteins', replicon_id + ".prt")), prot_file)
+            replicons.append((replicon_id, prot_file, out_dir))
+
+        def dom_line(target, query, seq_pvalue, dom_pvalue):
+            # hmmsearch is run with -Z 1 --domZ 1 so the E-values are P-values
+            return ' '.join([target, '-', '300', query, '-', '100', seq_pvalue, '50.0', '0.1', '1', '1',
+                             dom_pvalue, dom_pvalue, '50.0', '0.1', '1', '100', '1', '100', '1', '100', '0.9',
+                             'description of target']) + '\n'
+
+        domtblout = {
+            cfg.model_integrase: [dom_line('ACBA.007.P01_13_1', intI_query, '1e-05', '1e-05'),
+                                  # E-value 0.1 * 156 > 10 not reported
+                                  dom_line('ESCO001.B.00018.P002_1', intI_query, '0.1', '0.1'),
+                                  dom_line('ESCO001.B.00018.P002_2', intI_query, '1e-05', '1e-05')],
+            cfg.model_phage_int: [dom_line('ACBA.007.P01_13_2', phage_query, '0.0001', '0.0001'),
+                                  # domain conditional E-value 20 * 1 > 10 not reported
+                                  dom_line('ACBA.007.P01_13_2', phage_query, '0.0001', '20')]
+        }
+        cmds = []
+
+        def fake_call(cmd, *args, **kwargs):
+            cmds.append(cmd)
+            with open(cmd[cmd.index('--domtblout') + 1], 'w') as out:
+                out.write('#                                                                            '
+                          '--- full sequence --- -------------- this domain -------------\n')
+                out.writelines(domtblout[cmd[-2]])
+            return 0
+
+        integrase.call = fake_call
+        batch_dir = os.path.join(self.tmp_dir, 'batch')
+        integrase.find_integrase_batch(replicons, batch_dir, cfg)
+        self.assertEqual(len(cmds), 2)
+        for cmd, model in zip(cmds, (cfg.model_integrase, cfg.model_phage_int)):
+            self.assertEqual(cmd[cmd.index('-Z') + 1], '1')
+            self.assertEqual(cmd[cmd.index('--domZ') + 1], '1')
+            self.assertEqual(cmd[-2:], [model, os.path.join(batch_dir, 'proteins.prt')])
+        with open(os.path.join(batch_dir, 'proteins.prt')) as all_prots:
+            self.assertEqual(len([l for l in all_prots if l.startswith('>')]), 23 + 156)
+
+        def hits(replicon_id, suffix):
+            with open(os.path.join(cfg.tmp_dir(replicon_id), replicon_id + suffix)) as res:
+                return [l.split() for l in res if not l.startswith('#')]
+
+        # E-value = P-value * number of proteins of the replicon
+        # c-Evalue = P-value * number of hits reported for the replicon
+        acba_intI = hits('ACBA.007.P01_13', '_intI.res')
+        self.assertEqual(len(acba_intI), 1)
+        self.assertEqual([acba_intI[0][i] for i in (0, 6, 11, 12)],
+                         ['ACBA.007.P01_13_1', '0.00023', '1e-05', '0.00023'])
+        acba_phage = hits('ACBA.007.P01_13', '_phage_int.res')
+        self.assertEqual(len(acba_phage), 1)
+        self.assertEqual([acba_phage[0][i] for i in (0, 6, 11, 12)],
+                         ['ACBA.007.P01_13_2', '0.0023', '0.0001', '0.0023'])
+        esco_intI = hits('ESCO001.B.00018.P002', '_intI.res')
+        self.assertEqual([h[0] for h in esco_intI], ['ESCO001.B.00018.P002_2'])
+        self.assertEqual(esco_intI[0][12], '0.0016')
+        self.assertListEqual(hits('ESCO001.B.00018.P002', '_phage_int.res'), [])
+        # the replicon without protein is left to find_integrase
+        self.assertFalse(os.path.exists(os.path.join(cfg.tmp_dir('empty'), 'empty_intI.res')))
+
+        with FastaIterator(self.args.replicon) as sequences_db:
+            sequences_db.topologies = Topology('lin')
+            replicon = next(sequences_db)
+        prot_db = ProdigalDB(replicon, cfg, prot_file=replicons[0][1])
+        intI = read_hmm(replicon.id, prot_db, os.path.join(cfg.tmp_dir(replicon.id), replicon.id + '_intI.res'), cfg)
+        self.assertListEqual(list(intI.ID_prot), ['ACBA.007.P01_13_1'])
+        self.assertAlmostEqual(intI.evalue[0], 0.00023)
+
+        # the results exist, hmmsearch is not run again
+        integrase.find_integrase_batch(replicons, batch_dir, cfg)
+        self.assertEqual(len(cmds), 2)
+
+
     def test_find_integrase_no_gembase_with_protfile(self):
         try:
             cfg = Config(self.args)
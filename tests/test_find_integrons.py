@@ -27,6 +27,7 @@
 ####################################################################################
 
 import os
+import random
 import tempfile
 import shutil
 import argparse
@@ -46,7 +47,7 @@ except ImportError as err:
     msg = "Cannot import integron_finder: {0!s}".format(err)
     raise ImportError(msg)
 
-from integron_finder.integron import find_integron
+from integron_finder.integron import find_integron, match_integrases_arrays
 from integron_finder.config import Config
 from integron_finder.utils import FastaIterator
 from integron_finder.topology import Topology
@@ -667,3 +668,72 @@ class TestFindIntegons(IntegronTest):
             pdt.assert_frame_equal(integron.promoter, empty)
             pdt.assert_frame_equal(integron.attI, empty)
             pdt.assert_frame_equal(integron.proteins, empty)
+
+
+def legacy_match_integrases_arrays(int_beg, int_end, attc_left, attc_right, replicon_size, circular,
+                                   distance_threshold):
+    """
+    The matching of the integrases and the arrays done in find_integron before match_integrases_arrays:
+    the distances to all remaining arrays are computed for each integrase.
+    """
+    matches = []
+    remaining = list(range(len(attc_left)))
+    for i in range(len(int_beg)):
+        if not remaining:
+            matches.append(-1)
+            continue
+        left = attc_left[remaining]
+        right = attc_right[remaining]
+        if circular:
+            distances = np.array([(left - int_end[i]), (int_beg[i] - right)]) % replicon_size
+        else:
+            distances = np.array([abs(left - int_end[i]), abs(int_beg[i] - right)])
+        side, idx_attc = np.where(distances == distances.min())
+        idx_attc = idx_attc[0]
+        side = side[0]
+        if distances[side, idx_attc] < distance_threshold:
+            matches.append(remaining.pop(idx_attc))
+        else:
+            matches.append(-1)
+    return matches
+
+
+class TestMatchIntegrasesArrays(IntegronTest):
+
+    def test_match(self):
+        attc_left = np.array([100, 5000, 9000])
+        attc_right = np.array([1000, 6000, 9500])
+        # the first integrase is between the 2 first arrays, the nearest is on its right
+        # the second integrase is at the same distance of the 2 first arrays, the first is already matched
+        # the third integrase is far from all arrays
+        int_beg = np.array([1500, 4500, 20000])
+        int_end = np.array([2500, 4000, 21000])
+        self.assertListEqual(match_integrases_arrays(int_beg, int_end, attc_left, attc_right, 30000,
+                                                     False, 4000).tolist(),
+                             [0, 1, -1])
+        # on a circular replicon the third integrase is close to the first array through the origin
+        self.assertListEqual(match_integrases_arrays(int_beg[::-1], int_end[::-1], attc_left, attc_right, 21500,
+                                                     True, 4000).tolist(),
+                             [0, 1, -1])
+        self.assertListEqual(match_integrases_arrays(int_beg, int_end, attc_left[:0], attc_right[:0], 30000,
+                                                     False, 4000).tolist(),
+                             [-1, -1, -1])
+
+    def test_random(self):
+        rnd = random.Random(24)
+        for _ in range(2000):
+            replicon_size = rnd.randint(50, 2000)
+            # small positions to get a lot of ties
+            arrays_nb = rnd.randint(0, 15)
+            attc_left = np.array([rnd.randrange(0, replicon_size, 10) for _ in range(arrays_nb)], dtype=int)
+            attc_right = np.array([left + rnd.randrange(0, 300, 10) for left in attc_left], dtype=int)
+            integrases_nb = rnd.randint(1, 15)
+            int_beg = np.array([rnd.randrange(0, replicon_size, 10) for _ in range(integrases_nb)], dtype=int)
+            int_end = np.array([beg + rnd.randrange(10, 100, 10) for beg in int_beg], dtype=int)
+            circular = rnd.random() < 0.5
+            threshold = rnd.choice([50, 200, 4000])
+            self.assertListEqual(
+                match_integrases_arrays(int_beg, int_end, attc_left, attc_right, replicon_size,
+                                        circular, threshold).tolist(),
+                legacy_match_integrases_arrays(int_beg, int_end, attc_left, attc_right, replicon_size,
+                                               circular, threshold))
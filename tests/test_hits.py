@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+
+####################################################################################
+# Integron_Finder - Integron Finder aims at detecting integrons in DNA sequences   #
+# by finding particular features of the integron:                                  #
+#   - the attC sites                                                               #
+#   - the integrase                                                                #
+#   - and when possible attI site and promoters.                                   #
+#                                                                                  #
+# Authors: Jean Cury, Bertrand Neron, Eduardo PC Rocha                             #
+# Copyright (c) 2015 - 2018  Institut Pasteur, Paris and CNRS                      #
+# See the COPYRIGHT file for details                                               #
+#                                                                                  #
+# integron_finder is free software: you can redistribute it and/or modify          #
+# it under the terms of the GNU General Public License as published by             #
+# the Free Software Foundation, either version 3 of the License, or                #
+# (at your option) any later version.                                              #
+#                                                                                  #
+# integron_finder is distributed in the hope that it will be useful,               #
+# but WITHOUT ANY WARRANTY; without even the implied warranty of                   #
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the                    #
+# GNU General Public License for more details.                                     #
+#                                                                                  #
+# You should have received a copy of the GNU General Public License                #
+# along with this program (COPYING file).                                          #
+# If not, see <http://www.gnu.org/licenses/>.                                      #
+####################################################################################
+
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+import pandas.util.testing as pdt
+
+try:
+    from tests import IntegronTest
+except ImportError as err:
+    msg = "Cannot import integron_finder: {0!s}".format(err)
+    raise ImportError(msg)
+
+from integron_finder import IntegronError
+from integron_finder import hits
+from integron_finder.infernal import read_infernal
+from integron_finder.utils import model_len
+from integron_finder.scripts.finder import main
+
+
+class TestHits(IntegronTest):
+
+    def setUp(self):
+        self.tmp_dir = os.path.join(tempfile.gettempdir(), 'tmp_test_integron_finder')
+        if os.path.exists(self.tmp_dir) and os.path.isdir(self.tmp_dir):
+            shutil.rmtree(self.tmp_dir)
+        os.makedirs(self.tmp_dir)
+        self.replicon_id = 'ACBA.007.P01_13'
+        self.attc_file = self.find_data(os.path.join('Results_Integron_Finder_acba.007.p01.13',
+                                                     'tmp_{}'.format(self.replicon_id),
+                                                     '{}_attc_table.res'.format(self.replicon_id)))
+        self.len_model_attc = model_len(self.find_data(os.path.join('Models', 'attc_4.cm')))
+
+    def tearDown(self):
+        try:
+            shutil.rmtree(self.tmp_dir)
+        except:
+            pass
+
+    def test_save_load(self):
+        attc = read_infernal(self.attc_file, self.replicon_id, self.len_model_attc)
+        empty = pd.DataFrame(columns=['foo', 'bar'])
+        hits_path = os.path.join(self.tmp_dir, 'hits')
+        hits.save_hits(hits_path, {'attc': attc, 'empty': empty}, model_len=47, evalue_attc=1.)
+        tables, meta = hits.load_hits(hits_path)
+        pdt.assert_frame_equal(tables['attc'], attc)
+        self.assertListEqual(list(tables['empty'].columns), ['foo', 'bar'])
+        self.assertTrue(tables['empty'].empty)
+        self.assertDictEqual(meta, {'model_len': 47, 'evalue_attc': 1.})
+        tables, meta = hits.load_hits(hits_path, tables=['empty'])
+        self.assertListEqual(list(tables), ['empty'])
+
+    def test_write_read_table(self):
+        attc = read_infernal(self.attc_file, self.replicon_id, self.len_model_attc)
+        store_path = os.path.join(self.tmp_dir, 'attc')
+        hits.write_table(store_path, attc, evalue_attc=1.)
+        schema = hits.read_schema(store_path)
+        self.assertEqual(schema['version'], hits.SCHEMA_VERSION)
+        self.assertEqual(schema['rows'], len(attc))
+        self.assertListEqual([col['name'] for col in schema['columns']], list(attc.columns))
+        self.assertDictEqual(schema['meta'], {'evalue_attc': 1.})
+        pdt.assert_frame_equal(hits.read_table(store_path), attc)
+        # overwrite a store
+        hits.write_table(store_path, attc.iloc[:2])
+        pdt.assert_frame_equal(hits.read_table(store_path), attc.iloc[:2])
+
+        # column projection
+        pdt.assert_frame_equal(hits.read_table(store_path, columns=['pos_end', 'evalue']),
+                               attc.iloc[:2][['pos_end', 'evalue']])
+        columns = hits.read_columns(store_path, columns=['pos_beg', 'cm_attC'])
+        self.assertListEqual(list(columns), ['pos_beg', 'cm_attC'])
+        self.assertIsInstance(columns['pos_beg'], np.memmap)
+        self.assertListEqual(columns['pos_beg'].tolist(), attc.pos_beg.tolist()[:2])
+        self.assertListEqual(columns['cm_attC'].tolist(), attc.cm_attC.tolist()[:2])
+        with self.assertRaises(KeyError):
+            hits.read_columns(store_path, columns=['foo'])
+
+    def test_read_schema_bad_version(self):
+        store_path = os.path.join(self.tmp_dir, 'attc')
+        hits.write_table(store_path, pd.DataFrame({'pos_beg': [1, 2]}))
+        schema_path = os.path.join(store_path, hits.SCHEMA_FILE)
+        with open(schema_path) as schema_file:
+            schema = schema_file.read()
+        with open(schema_path, 'w') as schema_file:
+            schema_file.write(schema.replace('"version": {}'.format(hits.SCHEMA_VERSION), '"version": 0'))
+        with self.assertRaises(IntegronError) as ctx:
+            hits.read_table(store_path)
+        self.assertEqual(str(ctx.exception),
+                         "{} is a table store version 0, expected a table store version {}".format(
+                             store_path, hits.SCHEMA_VERSION))
+        with self.assertRaises(IntegronError) as ctx:
+            hits.read_table(os.path.join(self.tmp_dir, 'foo'))
+        self.assertEqual(str(ctx.exception), "{} is not a hits store".format(os.path.join(self.tmp_dir, 'foo')))
+
+    def test_filter_attc(self):
+        all_attc = read_infernal(self.attc_file, self.replicon_id, self.len_model_attc,
+                                 evalue=float('inf'), size_max_attc=float('inf'), size_min_attc=-1)
+        for evalue, size_max, size_min in ((1., 200, 40), (10., 200, 40), (1e-6, 200, 40), (1., 70, 60)):
+            exp_attc = read_infernal(self.attc_file, self.replicon_id, self.len_model_attc,
+                                     evalue=evalue, size_max_attc=size_max, size_min_attc=size_min)
+            attc = hits.filter_attc(all_attc, self.len_model_attc,
+                                    evalue=evalue, size_max_attc=size_max, size_min_attc=size_min)
+            self.assertListEqual(attc.values.tolist(), exp_attc.values.tolist())
+
+    def test_filter_attc_max(self):
+        attc_max = pd.DataFrame({'pos_beg': [10, 100, 1000],
+                                 'pos_end': [70, 300, 1050],
+                                 'evalue': [1e-5, 1e-3, 0.5]})
+        self.assertListEqual(hits.filter_attc_max(attc_max).pos_beg.tolist(), [10, 1000])
+        self.assertListEqual(hits.filter_attc_max(attc_max, evalue=1e-4).pos_beg.tolist(), [10])
+        self.assertListEqual(hits.filter_attc_max(attc_max, size_max_attc=300, size_min_attc=55).pos_beg.tolist(),
+                             [10, 100])
+
+    def test_reanalyze(self):
+        replicon = self.find_data(os.path.join('Replicons', 'acba.007.p01.13.fst'))
+        result_dir = 'Results_Integron_Finder_acba.007.p01.13'
+        # the tools outputs are already in the tmp dirs, so no tool is run
+        tools = "--cmsearch /bin/false --hmmsearch /bin/false --prodigal /bin/false"
+        for run in ('search', 'all'):
+            shutil.copytree(self.find_data(os.path.join(result_dir, 'tmp_{}'.format(self.replicon_id))),
+                            os.path.join(self.tmp_dir, run, result_dir, 'tmp_{}'.format(self.replicon_id)))
+        search_dir = os.path.join(self.tmp_dir, 'search')
+        all_dir = os.path.join(self.tmp_dir, 'all')
+        with self.catch_io(out=True, err=True):
+            main("--outdir {} --phase search {} {}".format(search_dir, tools, replicon).split(),
+                 loglevel='WARNING')
+        self.assertTrue(os.path.exists(os.path.join(search_dir, result_dir, 'tmp_{}'.format(self.replicon_id),
+                                                    '{}_hits'.format(self.replicon_id))))
+
+        for params in ("--evalue-attc 1e-6", "--min-attc-size 60 --calin-threshold 1", "-dt 500"):
+            with self.catch_io(out=True, err=True):
+                main("--outdir {} --phase reanalyze {} {} {}".format(search_dir, params, tools, replicon).split(),
+                     loglevel='WARNING')
+                main("--outdir {} --keep-tmp {} {} {}".format(all_dir, params, tools, replicon).split(),
+                     loglevel='WARNING')
+            integrons = []
+            for out_dir in (search_dir, all_dir):
+                with open(os.path.join(out_dir, result_dir, 'acba.007.p01.13.integrons')) as integrons_file:
+                    # the first line is the command line
+                    integrons.append(integrons_file.readlines()[1:])
+            self.assertListEqual(*integrons)
+
+    def test_reanalyze_no_hits(self):
+        replicon = self.find_data(os.path.join('Replicons', 'acba.007.p01.13.fst'))
+        with self.assertRaises(IntegronError) as ctx:
+            with self.catch_io(out=True, err=True):
+                main("--outdir {} --phase reanalyze {}".format(self.tmp_dir, replicon).split(),
+                     loglevel='WARNING')
+        self.assertTrue(str(ctx.exception).startswith("No hits stored for replicon ACBA.007.P01_13"))
@@ -27,6 +27,7 @@
 ####################################################################################
 
 import os
+import random
 import argparse
 
 import pandas as pd
@@ -44,8 +45,10 @@ except ImportError as err:
 from integron_finder.config import Config
 from integron_finder.utils import FastaIterator
 from integron_finder.topology import Topology
-from integron_finder.integron import Integron
+from integron_finder.integron import Integron, intI_promoter_motifs, pc_promoter_motifs, attI_motifs, search_motifs, \
+    MotifsIndex
 from integron_finder.prot_db import ProdigalDB
+import integron_finder.integron
 
 class TestIntegron(IntegronTest):
 
@@ -165,6 +168,36 @@ class TestIntegron(IntegronTest):
         pdt.assert_frame_equal(attc, integron.attC)
 
 
+    def test_add_attc_after_set(self):
+        replicon = SeqRecord(Seq.Seq('A' * 1000), id='foo')
+        integron = Integron(replicon, self.cfg)
+        self.assertIsNone(integron.sizes_cassettes)
+
+        attC = pd.DataFrame({"pos_beg": [10],
+                             "pos_end": [100],
+                             "strand": [-1],
+                             "evalue": [1.1e-07],
+                             "type_elt": ["attC"],
+                             "annotation": ["attC"],
+                             "model": ["attc_4"],
+                             "distance_2attC": [np.nan]},
+                            columns=self.columns,
+                            index=['attc_001'])
+        attC = attC.astype(dtype=self.dtype)
+        integron.attC = attC
+        # the DataFrame can be modified in place between two add_attC
+        integron.attC.loc['attc_001', 'evalue'] = 1e-08
+        for pos in (200, 400, 950):
+            integron.add_attC(pos, pos + 90, -1, 1e-05, "attc_4")
+
+        self.assertListEqual(list(integron.attC.index), ['attc_00{}'.format(i) for i in range(1, 5)])
+        self.assertListEqual(list(integron.attC.pos_beg), [10, 200, 400, 950])
+        self.assertListEqual(list(integron.attC.evalue), [1e-08, 1e-05, 1e-05, 1e-05])
+        np.testing.assert_array_equal(integron.attC.distance_2attC.values, [np.nan, 100, 110, 460])
+        np.testing.assert_array_equal(integron.sizes_cassettes, [np.nan, 100, 110, 460])
+        self.assertEqual(integron.attC.pos_beg.dtype, np.int64)
+
+
     def test_type(self):
         replicon = SeqRecord(Seq.Seq(''), id='foo')
         no_integrase = Integron(replicon, self.cfg)
@@ -205,6 +238,100 @@ class TestIntegron(IntegronTest):
         self.assertEqual(one_integrase_one_attC.type(), "complete")
 
 
+    def test_motifs(self):
+        model_dir = os.path.join(os.path.dirname(__file__), '..', 'data', 'Models')
+        for motifs_getter, args, names in [(intI_promoter_motifs, (), ['P_intI1']),
+                                           (pc_promoter_motifs, (model_dir,), ['Pc_int1'] * 3 + ['Pc_int3']),
+                                           (attI_motifs, (), ['attI1', 'attI2', 'attI3'])]:
+            motifs = motifs_getter(*args)
+            # the motifs are built once and shared
+            self.assertIs(motifs_getter(*args), motifs)
+            self.assertListEqual([m.name for m, _ in motifs], names)
+            for m, m_rc in motifs:
+                self.assertEqual(m_rc.name, m.name)
+                self.assertListEqual([str(i) for i in m_rc.instances],
+                                     [str(i) for i in m.instances.reverse_complement()])
+
+    def test_search_motifs(self):
+        model_dir = os.path.join(os.path.dirname(__file__), '..', 'data', 'Models')
+        rnd = random.Random(13)
+        for motifs in (intI_promoter_motifs(), pc_promoter_motifs(model_dir), attI_motifs()):
+            instances = [str(i) for m, m_rc in motifs for i in list(m.instances) + list(m_rc.instances)]
+            for _ in range(20):
+                # a random sequence with some motifs instances
+                seq = []
+                for _ in range(10):
+                    seq.append(''.join(rnd.choice('ACGT') for _ in range(rnd.randint(0, 60))))
+                    seq.append(rnd.choice(instances))
+                seq = Seq.Seq(''.join(seq))
+                hits = search_motifs(motifs, seq)
+                for m_idx, (m, m_rc) in enumerate(motifs):
+                    for orientation, mo in enumerate((m, m_rc)):
+                        self.assertListEqual(hits.get((m_idx, orientation), []),
+                                             [pos for pos, _ in mo.instances.search(seq)])
+
+    def test_motifs_index(self):
+        model_dir = os.path.join(os.path.dirname(__file__), '..', 'data', 'Models')
+        all_motifs = (intI_promoter_motifs(), pc_promoter_motifs(model_dir), attI_motifs())
+        instances = [str(i) for motifs in all_motifs for m, m_rc in motifs
+                     for i in list(m.instances) + list(m_rc.instances)]
+        rnd = random.Random(7)
+        for _ in range(10):
+            seq = []
+            for _ in range(30):
+                seq.append(''.join(rnd.choice('ACGTN') for _ in range(rnd.randint(0, 200))))
+                seq.append(rnd.choice(instances))
+            # a motif overlapping the origin
+            instance = rnd.choice(instances)
+            cut = rnd.randint(1, len(instance) - 1)
+            seq = Seq.Seq(instance[cut:] + ''.join(seq) + instance[:cut])
+            index = MotifsIndex(seq, model_dir)
+            size = len(seq)
+            for _ in range(30):
+                start = rnd.randint(-600, size + 600)
+                stop = rnd.randint(-600, size + 600)
+                for motifs in all_motifs:
+                    # the positions are the same as the positions in the slices
+                    self.assertDictEqual(index.search(motifs, start, stop),
+                                         search_motifs(motifs, seq[start:stop]))
+                    self.assertDictEqual(index.search_across_origin(motifs, start, stop),
+                                         search_motifs(motifs, seq[start:size] + seq[:stop]))
+
+    def test_motifs_index_windows(self):
+        model_dir = os.path.join(os.path.dirname(__file__), '..', 'data', 'Models')
+        all_motifs = (intI_promoter_motifs(), pc_promoter_motifs(model_dir), attI_motifs())
+        instances = [str(i) for motifs in all_motifs for m, m_rc in motifs
+                     for i in list(m.instances) + list(m_rc.instances)]
+        rnd = random.Random(11)
+        seq = []
+        for _ in range(200):
+            seq.append(''.join(rnd.choice('ACGT') for _ in range(rnd.randint(0, 200))))
+            seq.append(rnd.choice(instances))
+        seq = Seq.Seq(''.join(seq))
+        size = len(seq)
+        windows = [(100, 1500, False), (1000, 2000, False), (size - 700, 400, True), (5000, 4000, False)]
+
+        scanned = []
+        find_all = integron_finder.integron.find_all
+
+        def find_all_spy(text, patterns):
+            scanned.append(len(text))
+            return find_all(text, patterns)
+
+        integron_finder.integron.find_all = find_all_spy
+        try:
+            index = MotifsIndex(seq, model_dir, windows)
+        finally:
+            integron_finder.integron.find_all = find_all
+        # only the union of the windows is scanned
+        self.assertListEqual(sorted(scanned), [1100, 1900])
+
+        # the windows which have not been scanned are searched
+        for start, stop, across_origin in windows + [(3000, 4000, False), (size - 100, 800, True)]:
+            for motifs in all_motifs:
+                expected = search_motifs(motifs, seq[start:] + seq[:stop] if across_origin else seq[start:stop])
+                self.assertDictEqual(index.search_window(motifs, (start, stop, across_origin)), expected)
+
     def test_add_promoter(self):
         replicon_name = 'saen.040.p01.10'
         replicon_path = self.find_data(os.path.join('Replicons', replicon_name + '.fst'))
@@ -271,6 +398,14 @@ class TestIntegron(IntegronTest):
 
         pdt.assert_frame_equal(exp_promoters, integron.promoter)
 
+        # the same promoters are found with the motifs of the windows of the integrons of the replicon
+        motifs_index = MotifsIndex(replicon.seq, self.cfg.model_dir, integron.motifs_windows())
+        integron = Integron(replicon, self.cfg)
+        integron.attC = attC
+        integron.integrase = integrase
+        integron.add_promoter(motifs_index=motifs_index)
+        pdt.assert_frame_equal(exp_promoters, integron.promoter)
+
         #############################################
         # test promoter with attC without integrase #
         #############################################
@@ -353,6 +488,14 @@ class TestIntegron(IntegronTest):
 
         pdt.assert_frame_equal(exp_attI, integron.attI)
 
+        # the same attI are found with the motifs of the windows of the integrons of the replicon
+        motifs_index = MotifsIndex(replicon.seq, self.cfg.model_dir, integron.motifs_windows())
+        integron = Integron(replicon, self.cfg)
+        integron.attC = attC
+        integron.integrase = integrase
+        integron.add_attI(motifs_index=motifs_index)
+        pdt.assert_frame_equal(exp_attI, integron.attI)
+
         #############################################
         # test promoter with attC without integrase #
         #############################################
@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+
+####################################################################################
+# Integron_Finder - Integron Finder aims at detecting integrons in DNA sequences   #
+# by finding particular features of the integron:                                  #
+#   - the attC sites                                                               #
+#   - the integrase                                                                #
+#   - and when possible attI site and promoters.                                   #
+#                                                                                  #
+# Authors: Jean Cury, Bertrand Neron, Eduardo PC Rocha                             #
+# Copyright (c) 2015 - 2018  Institut Pasteur, Paris and CNRS                      #
+# See the COPYRIGHT file for details                                               #
+#                                                                                  #
+# integron_finder is free software: you can redistribute it and/or modify          #
+# it under the terms of the GNU General Public License as published by             #
+# the Free Software Foundation, either version 3 of the License, or                #
+# (at your option) any later version.                                              #
+#                                                                                  #
+# integron_finder is distributed in the hope that it will be useful,               #
+# but WITHOUT ANY WARRANTY; without even the implied warranty of                   #
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the                    #
+# GNU General Public License for more details.                                     #
+#                                                                                  #
+# You should have received a copy of the GNU General Public License                #
+# along with this program (COPYING file).                                          #
+# If not, see <http://www.gnu.org/licenses/>.                                      #
+####################################################################################
+
+import os
+import json
+import shutil
+import tempfile
+import argparse
+
+try:
+    from tests import IntegronTest
+except ImportError as err:
+    msg = "Cannot import integron_finder: {0!s}".format(err)
+    raise ImportError(msg)
+
+from integron_finder.journal import RunJournal
+from integron_finder.config import Config
+from integron_finder.scripts.finder import main
+
+
+class TestRunJournal(IntegronTest):
+
+    def setUp(self):
+        self.tmp_dir = os.path.join(tempfile.gettempdir(), 'tmp_test_integron_finder')
+        if os.path.exists(self.tmp_dir) and os.path.isdir(self.tmp_dir):
+            shutil.rmtree(self.tmp_dir)
+        os.makedirs(self.tmp_dir)
+        self.journal_path = os.path.join(self.tmp_dir, 'integron_finder.journal')
+
+    def tearDown(self):
+        try:
+            shutil.rmtree(self.tmp_dir)
+        except:
+            pass
+
+    def touch(self, name):
+        path = os.path.join(self.tmp_dir, name)
+        open(path, 'w').close()
+        return path
+
+    def test_record_done(self):
+        journal = RunJournal(self.journal_path, 'abc')
+        self.assertDictEqual(journal.done(), {})
+        journal.start()
+        foo = (self.touch('foo.integrons'), self.touch('foo.summary'))
+        bar = (self.touch('bar.integrons'), self.touch('bar.summary'))
+        journal.record('foo', *foo)
+        journal.record('bar', *bar)
+        # a skipped replicon has no results
+        journal.record('baz', '', '')
+        self.assertDictEqual(RunJournal(self.journal_path, 'abc').done(),
+                             {'foo': foo, 'bar': bar, 'baz': ('', '')})
+        # the results of bar have been removed
+        os.unlink(bar[1])
+        # the run has been killed while writing a line
+        with open(self.journal_path, 'a') as journal_file:
+            journal_file.write('{"replicon": "qux", "integ')
+        self.assertDictEqual(RunJournal(self.journal_path, 'abc').done(),
+                             {'foo': foo, 'baz': ('', '')})
+        # the parameters have changed
+        with self.catch_log():
+            self.assertDictEqual(RunJournal(self.journal_path, 'def').done(), {})
+        # start a new journal
+        journal.start()
+        self.assertDictEqual(journal.done(), {})
+
+    def test_fingerprint(self):
+        replicon = self.find_data(os.path.join('Replicons', 'acba.007.p01.13.fst'))
+        args = argparse.Namespace(replicon=replicon, outdir='foo', cpu=1, evalue_attc=1.)
+        fingerprint = Config(args).fingerprint
+        # the resources used do not change the fingerprint
+        args = argparse.Namespace(replicon=replicon, outdir='bar', cpu=4, evalue_attc=1.)
+        self.assertEqual(Config(args).fingerprint, fingerprint)
+        args = argparse.Namespace(replicon=replicon, outdir='foo', cpu=1, evalue_attc=0.1)
+        self.assertNotEqual(Config(args).fingerprint, fingerprint)
+
+    def test_fingerprint_phase(self):
+        replicon = self.find_data(os.path.join('Replicons', 'acba.007.p01.13.fst'))
+        fingerprints = {Config(argparse.Namespace(replicon=replicon, outdir='foo', cpu=1, phase=phase)).fingerprint
+                        for phase in ('all', 'search', 'reanalyze')}
+        # a run of a phase cannot be resumed with another phase
+        self.assertEqual(len(fingerprints), 3)
+
+    def test_fingerprint_content(self):
+        replicon = os.path.join(self.tmp_dir, 'replicon.fst')
+        with open(replicon, 'w') as fasta:
+            fasta.write(">foo\nACGT\n")
+        args = argparse.Namespace(replicon=replicon, outdir='foo', cpu=1)
+        fingerprint = Config(args).fingerprint
+        # the input is edited in place and keeps the same size
+        mtime_ns = os.stat(replicon).st_mtime_ns
+        with open(replicon, 'w') as fasta:
+            fasta.write(">foo\nTGCA\n")
+        # the file system time resolution can be coarser than the 2 writes
+        os.utime(replicon, ns=(mtime_ns + 10 ** 9, mtime_ns + 10 ** 9))
+        self.assertNotEqual(Config(args).fingerprint, fingerprint)
+
+    def test_resume(self):
+        replicon = self.find_data(os.path.join('Replicons', 'acba.007.p01.13.fst'))
+        result_dir = os.path.join(self.tmp_dir, 'Results_Integron_Finder_acba.007.p01.13')
+        os.makedirs(result_dir)
+        # the tools outputs are already in the tmp dir, so no tool is run
+        tmp_dir = 'tmp_ACBA.007.P01_13'
+        shutil.copytree(self.find_data(os.path.join('Results_Integron_Finder_acba.007.p01.13', tmp_dir)),
+                        os.path.join(result_dir, tmp_dir))
+        cmd = "--outdir {} --keep-tmp --split-results --cmsearch /bin/false --hmmsearch /bin/false " \
+              "--prodigal /bin/false {}".format(self.tmp_dir, replicon)
+        with self.catch_io(out=True, err=True):
+            main(cmd.split(), loglevel='WARNING')
+        integrons_file = os.path.join(result_dir, 'ACBA.007.P01_13.integrons')
+        summary_file = os.path.join(result_dir, 'ACBA.007.P01_13.summary')
+        journal_path = os.path.join(result_dir, 'integron_finder.journal')
+        with open(journal_path) as journal_file:
+            entries = [json.loads(line) for line in journal_file]
+        self.assertDictEqual(entries[1], {'replicon': 'ACBA.007.P01_13',
+                                          'integrons': integrons_file,
+                                          'summary': summary_file})
+
+        # the replicon is not analysed again
+        shutil.rmtree(os.path.join(result_dir, tmp_dir))
+        os.unlink(integrons_file)
+        with open(integrons_file, 'w') as integrons:
+            integrons.write('# already analysed\n')
+        with self.catch_io(out=True, err=True):
+            main(cmd.split() + ['--resume'], loglevel='WARNING')
+        with open(integrons_file) as integrons:
+            self.assertEqual(integrons.read(), '# already analysed\n')
+
+        # with other parameters the replicon is analysed again
+        # so the tools would be run
+        with self.assertRaises(RuntimeError):
+            with self.catch_io(out=True, err=True):
+                main(cmd.split() + ['--resume', '--evalue-attc', '0.1'], loglevel='WARNING')
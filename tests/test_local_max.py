@@ -30,9 +30,14 @@ import os
 import tempfile
 import shutil
 import re
+import argparse
+import unittest
+import threading
+import time
 
 import pandas as pd
 import pandas.util.testing as pdt
+from Bio import SeqIO
 
 # # display warning only for non installed integron_finder
 # from Bio import BiopythonExperimentalWarning
@@ -51,6 +56,7 @@ from integron_finder import infernal
 
 _call_ori = infernal.call
 _read_infernal_ori = infernal.read_infernal
+_run_ori = infernal.run
 
 from tests import which
 
@@ -99,6 +105,8 @@ def read_infernal_mock(tmp_dir):
 
     def fake_read_infernal(tblout_path, replicon_name, len_model_attc,
                            evalue=None, size_max_attc=None, size_min_attc=None):
+        # the results do not depend on the strand searched
+        tblout_path = re.sub('_(top|bottom|both)_subseq_attc_table.res$', '_subseq_attc_table.res', tblout_path)
         args = (tblout_path, replicon_name, len_model_attc, evalue, size_max_attc, size_min_attc)
         return _cache[args]
     return fake_read_infernal
@@ -139,6 +147,7 @@ class TestLocalMax(IntegronTest):
     def tearDown(self):
         infernal.call = _call_ori
         infernal.read_infernal = _read_infernal_ori
+        infernal.run = _run_ori
         try:
             shutil.rmtree(self.tmp_dir)
         except:
@@ -274,3 +283,282 @@ class TestLocalMax(IntegronTest):
                                    out_dir=self.out_dir, cpu_nb=self.cpu_nb
                                    )
         self.assertTrue(str(ctx.exception).endswith("failed returncode = {}".format(infernal.call(None))))
+
+
+    @staticmethod
+    def fake_cmsearch(cmds):
+        def fake_cmsearch(cmd, stdout=None):
+            # report a hit from 11 to 57 on each searched strand of each window
+            cmds.append(cmd)
+            tblout_path = cmd[cmd.index('--tblout') + 1]
+            strands = {'--toponly': ['+'], '--bottomonly': ['-']}.get(cmd[3], ['+', '-'])
+            with open(tblout_path, 'w') as tblout:
+                tblout.write("#target name  accession query name  accession mdl mdl from   mdl to seq from   seq to "
+                             "strand trunc pass   gc  bias  score   E-value inc description of target\n")
+                for window in SeqIO.parse(cmd[-1], 'fasta'):
+                    for strand in strands:
+                        seq_from, seq_to = (11, 57) if strand == '+' else (57, 11)
+                        tblout.write("{} - attC_4 - cm 1 47 {} {} {} no 1 0.41 0.0 7.3 0.0031 ? -\n".format(
+                            window.id, seq_from, seq_to, strand))
+            return 0
+        return fake_cmsearch
+
+
+    def test_local_max_windows(self):
+        infernal.read_infernal = _read_infernal_ori
+        replicon_size = len(self.replicon)
+        cmds = []
+        infernal.call = self.fake_cmsearch(cmds)
+        windows = [(942899, 947099, 'top'),
+                   (930689, 934889, 'bottom'),
+                   (replicon_size - 5, 100, 'top'),  # the window overlaps the origin
+                   (942899, 947099, 'top'),
+                   (945000, 949000, 'top')]  # merged with the first window
+        received = infernal.local_max_windows(self.replicon, windows,
+                                              self.model_attc_path,
+                                              evalue_attc=self.evalue_attc,
+                                              max_attc_size=self.max_attc_size, min_attc_size=self.min_attc_size,
+                                              out_dir=self.out_dir, cpu_nb=self.cpu_nb, merge=True)
+        # one cmsearch run per strand
+        self.assertEqual(len(cmds), 2)
+        for cmd in cmds:
+            self.assertEqual(float(cmd[cmd.index('-Z') + 1]), replicon_size / 1000000.)
+        self.assertEqual(len(received), len(windows))
+
+        def hit(pos_beg, pos_end, strand):
+            return pd.DataFrame([['LIAN.001.C02_10', 'attC_4', 1, 47, pos_beg, pos_end, strand, 0.0031]],
+                                columns=['Accession_number', 'cm_attC', 'cm_debut', 'cm_fin', 'pos_beg',
+                                         'pos_end', 'sens', 'evalue'])
+
+        pdt.assert_frame_equal(received[0], hit(942899 + 11, 942899 + 57, '+'))
+        pdt.assert_frame_equal(received[1], hit(930689 + 11, 930689 + 57, '-'))
+        pdt.assert_frame_equal(received[2], hit(11 - 5, 57 - 5, '+'))
+        pdt.assert_frame_equal(received[3], received[0])
+        # the hit is not included in the last window
+        self.assertTrue(received[4].empty)
+        top_seqs = list(SeqIO.parse(os.path.join(self.out_dir, 'LIAN.001.C02_10_run_942899_949000_top_subseq.fst'),
+                                    'fasta'))
+        self.assertListEqual([seq.id for seq in top_seqs],
+                             ['LIAN.001.C02_10_942899_949000',
+                              'LIAN.001.C02_10_{}_100'.format(replicon_size - 5)])
+
+        # the result of the search of each window is the same as with local_max
+        single = infernal.local_max(self.replicon, 930689, 934889, self.model_attc_path,
+                                    strand_search='bottom',
+                                    evalue_attc=self.evalue_attc,
+                                    max_attc_size=self.max_attc_size, min_attc_size=self.min_attc_size,
+                                    out_dir=self.out_dir, cpu_nb=self.cpu_nb)
+        pdt.assert_frame_equal(single, received[1])
+
+
+    def test_local_max_windows_border_hit(self):
+        infernal.read_infernal = _read_infernal_ori
+        # a hit from 943270 to 943395 on the replicon, across the border of the 2 windows
+        hit_beg, hit_end = 943270, 943395
+        windows = [(942899, 943330, 'top'), (943300, 947099, 'top')]
+        cmds = []
+
+        def fake_cmsearch(cmd, stdout=None):
+            # report the part of the hit included in each searched subsequence (1-based), as a truncated hit
+            cmds.append(cmd)
+            tblout_path = cmd[cmd.index('--tblout') + 1]
+            with open(tblout_path, 'w') as tblout:
+                for window in SeqIO.parse(cmd[-1], 'fasta'):
+                    window_beg, window_end = [int(pos) for pos in window.id.rsplit('_', 2)[1:]]
+                    if window_beg < hit_end and hit_beg < window_end:
+                        tblout.write("{} - attC_4 - cm 1 47 {} {} + no 1 0.41 0.0 7.3 0.0031 ? -\n".format(
+                            window.id, max(hit_beg, window_beg + 1) - window_beg, min(hit_end, window_end) - window_beg))
+            return 0
+
+        infernal.call = fake_cmsearch
+        results = {}
+        for merge in (False, True):
+            out_dir = os.path.join(self.out_dir, 'merge_{}'.format(merge))
+            os.mkdir(out_dir)
+            results[merge] = infernal.local_max_windows(self.replicon, windows, self.model_attc_path,
+                                                        out_dir=out_dir, cpu_nb=1, merge=merge)
+        # without merge, each window is searched alone as local_max does
+        for window, df_max in zip(windows, results[False]):
+            out_dir = os.path.join(self.out_dir, '{}_{}'.format(*window[:2]))
+            os.mkdir(out_dir)
+            single = infernal.local_max(self.replicon, window[0], window[1], self.model_attc_path,
+                                        strand_search=window[2], out_dir=out_dir, cpu_nb=1)
+            pdt.assert_frame_equal(single, df_max)
+        self.assertListEqual(results[False][0].pos_beg.tolist(), [hit_beg])
+        self.assertListEqual(results[False][0].pos_end.tolist(), [943330])
+        self.assertListEqual(results[False][1].pos_beg.tolist(), [943301])
+        # the merged window contains the whole hit which is included in none of the windows
+        for df_max in results[True]:
+            self.assertTrue(df_max.empty)
+
+
+    def test_local_max_windows_size(self):
+        infernal.read_infernal = _read_infernal_ori
+        window = (942899, 947099, 'top')
+
+        def fake_cmsearch(cmd, stdout=None):
+            tblout_path = cmd[cmd.index('--tblout') + 1]
+            window_id = next(SeqIO.parse(cmd[-1], 'fasta')).id
+            with open(tblout_path, 'w') as tblout:
+                # the hit is too short (34 bp) but its positions extended to the whole model are not (43 bp)
+                tblout.write("{} - attC_4 - cm 10 47 101 135 + no 1 0.41 0.0 7.3 0.0031 ? -\n".format(window_id))
+                tblout.write("{} - attC_4 - cm 1 47 501 600 + no 1 0.41 0.0 7.3 0.0031 ? -\n".format(window_id))
+            return 0
+
+        infernal.call = fake_cmsearch
+        # the hits are filtered on their size, then on their positions, as for the stored results
+        for _ in range(2):
+            df_max = infernal.local_max_windows(self.replicon, [window], self.model_attc_path,
+                                                max_attc_size=self.max_attc_size, min_attc_size=self.min_attc_size,
+                                                out_dir=self.out_dir, cpu_nb=1)[0]
+            self.assertListEqual(df_max.pos_beg.tolist(), [943400])
+            self.assertListEqual(df_max.pos_end.tolist(), [943499])
+        stored = infernal.read_window_store(infernal.window_store_path(self.replicon.id, window, self.out_dir))
+        self.assertListEqual(stored.pos_beg.tolist(), [943400])
+
+
+    @unittest.skipIf(not which('cmsearch'), "cmsearch not found")
+    def test_local_max_windows_border_hit_cmsearch(self):
+        infernal.read_infernal = _read_infernal_ori
+        infernal.call = self.call
+        # the attC site from 943270 to 943395 is across the border of the 2 windows
+        windows = [(942899, 943330, 'top'), (943300, 947099, 'top')]
+        received = infernal.local_max_windows(self.replicon, windows, self.model_attc_path,
+                                              cmsearch_bin=self.cmsearch,
+                                              out_dir=self.out_dir, cpu_nb=1)
+        for window, df_max in zip(windows, received):
+            out_dir = os.path.join(self.out_dir, '{}_{}'.format(*window[:2]))
+            os.mkdir(out_dir)
+            single = infernal.local_max(self.replicon, window[0], window[1], self.model_attc_path,
+                                        strand_search=window[2], cmsearch_bin=self.cmsearch,
+                                        out_dir=out_dir, cpu_nb=1)
+            pdt.assert_frame_equal(single.reset_index(drop=True), df_max.reset_index(drop=True))
+
+
+    def test_merge_windows(self):
+        self.assertListEqual(infernal.merge_windows([(10, 20), (15, 30), (40, 50)], 100),
+                             [(10, 30, [(10, 20), (15, 30)]), (40, 50, [(40, 50)])])
+        # included window
+        self.assertListEqual(infernal.merge_windows([(10, 50), (20, 30)], 100),
+                             [(10, 50, [(10, 50), (20, 30)])])
+        # windows overlapping the origin
+        self.assertListEqual(infernal.merge_windows([(90, 10), (5, 20), (50, 60)], 100),
+                             [(50, 60, [(50, 60)]), (90, 20, [(90, 10), (5, 20)])])
+        self.assertListEqual(infernal.merge_windows([(5, 20), (80, 100), (95, 8)], 100),
+                             [(80, 20, [(80, 100), (95, 8), (5, 20)])])
+        # the merged windows never cover the whole replicon
+        self.assertListEqual(infernal.merge_windows([(0, 60), (50, 100)], 100),
+                             [(0, 60, [(0, 60)]), (50, 100, [(50, 100)])])
+
+
+    def test_local_max_windows_parallel(self):
+        infernal.read_infernal = _read_infernal_ori
+        windows = [(10000 * i, 10000 * i + 4200, 'top' if i % 3 else 'bottom') for i in range(1, 10)]
+        cmds = []
+        infernal.call = self.fake_cmsearch(cmds)
+        serial = infernal.local_max_windows(self.replicon, windows, self.model_attc_path,
+                                            out_dir=self.out_dir, cpu_nb=1)
+        self.assertEqual(len(cmds), 2)
+        cmds.clear()
+        # an other directory, otherwise the stored results would be used
+        parallel_dir = os.path.join(self.out_dir, 'parallel')
+        os.mkdir(parallel_dir)
+        parallel = infernal.local_max_windows(self.replicon, windows, self.model_attc_path,
+                                              out_dir=parallel_dir, cpu_nb=4)
+        # the windows of each strand are split in 2 runs of 1 cpu
+        self.assertEqual(len(cmds), 4)
+        for cmd in cmds:
+            self.assertEqual(cmd[cmd.index('--cpu') + 1], '1')
+        self.assertEqual(len(parallel), len(windows))
+        for s_df, p_df in zip(serial, parallel):
+            self.assertEqual(len(p_df), 1)
+            pdt.assert_frame_equal(s_df, p_df)
+
+
+    def test_local_max_windows_cpu(self):
+        infernal.read_infernal = _read_infernal_ori
+        # one window per strand option, so one run per strand option
+        windows = [(10000, 14200, 'top'), (20000, 24200, 'bottom'), (30000, 34200, 'both')]
+        fake_cmsearch = self.fake_cmsearch([])
+        lock = threading.Lock()
+        running = [0]
+        max_running = [0]
+
+        def counting_cmsearch(cmd, stdout=None):
+            with lock:
+                running[0] += 1
+                max_running[0] = max(max_running[0], running[0])
+            time.sleep(0.05)
+            returncode = fake_cmsearch(cmd, stdout=stdout)
+            with lock:
+                running[0] -= 1
+            return returncode
+
+        infernal.call = counting_cmsearch
+        for cpu_nb, exp_max_running in ((1, 1), (2, 2), (4, 3)):
+            out_dir = os.path.join(self.out_dir, 'cpu_{}'.format(cpu_nb))
+            os.mkdir(out_dir)
+            max_running[0] = 0
+            infernal.local_max_windows(self.replicon, windows, self.model_attc_path,
+                                       out_dir=out_dir, cpu_nb=cpu_nb)
+            # never more cmsearch runs at the same time than cpus
+            self.assertEqual(max_running[0], exp_max_running)
+
+
+    def test_local_max_windows_resume(self):
+        infernal.read_infernal = _read_infernal_ori
+        windows = [(942899, 947099, 'top'), (930689, 934889, 'bottom'), (10000, 14200, 'both')]
+        cmds = []
+        infernal.call = self.fake_cmsearch(cmds)
+        first = infernal.local_max_windows(self.replicon, windows, self.model_attc_path,
+                                           out_dir=self.out_dir, cpu_nb=1)
+        self.assertEqual(len(cmds), 3)
+        for window in windows:
+            self.assertTrue(os.path.exists(infernal.window_store_path(self.replicon.id, window, self.out_dir)))
+
+        # the stored windows are not searched again
+        cmds.clear()
+        second = infernal.local_max_windows(self.replicon, windows + [(20000, 24200, 'top')], self.model_attc_path,
+                                            out_dir=self.out_dir, cpu_nb=1)
+        self.assertEqual(len(cmds), 1)
+        self.assertEqual(len(second), 4)
+        for first_df, second_df in zip(first, second):
+            pdt.assert_frame_equal(first_df.reset_index(drop=True), second_df.reset_index(drop=True))
+
+        # the merged results do not depend on the previous runs
+        for _ in range(2):
+            table_end = infernal.merge_window_stores(self.replicon.id, windows, self.out_dir)
+            with open(table_end) as table_end_file:
+                # the 'both' window has one hit on each strand
+                self.assertEqual(len(table_end_file.readlines()), 4)
+
+
+    def test_local_max_windows_stdin(self):
+        infernal.read_infernal = _read_infernal_ori
+        windows = [(942899, 947099, 'top'), (930689, 934889, 'bottom')]
+        cmds = []
+        fake_cmsearch = self.fake_cmsearch(cmds)
+        tmp_dirs = []
+
+        def fake_run(cmd, input=None, stdout=None):
+            # write the sequences received on stdin in a file for fake_cmsearch
+            self.assertEqual(cmd[-1], '-')
+            tmp_dirs.append(os.path.dirname(cmd[cmd.index('--tblout') + 1]))
+            fasta_path = os.path.join(tmp_dirs[-1], 'stdin.fst')
+            with open(fasta_path, 'wb') as fasta:
+                fasta.write(input)
+            return argparse.Namespace(returncode=fake_cmsearch(cmd[:-1] + [fasta_path]))
+
+        infernal.run = fake_run
+        received = infernal.local_max_windows(self.replicon, windows, self.model_attc_path,
+                                              out_dir=self.out_dir, cpu_nb=1, stdin=True)
+        self.assertEqual(len(cmds), 2)
+        # the cmsearch outputs are not written in out_dir and are removed
+        for tmp_dir in tmp_dirs:
+            self.assertNotEqual(tmp_dir, self.out_dir)
+            self.assertFalse(os.path.exists(tmp_dir))
+        self.assertListEqual(sorted(os.listdir(self.out_dir)),
+                             sorted(os.path.basename(infernal.window_store_path(self.replicon.id, w, self.out_dir))
+                                    for w in windows))
+        self.assertEqual(list(received[0].pos_beg), [942899 + 11])
+        self.assertEqual(list(received[1].pos_beg), [930689 + 11])
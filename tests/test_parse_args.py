@@ -29,6 +29,7 @@
 import os
 import distutils
 import sys
+from concurrent.futures import ThreadPoolExecutor
 
 try:
     from tests import IntegronTest
@@ -36,7 +37,7 @@ except ImportError as err:
     msg = "Cannot import integron_finder: {0!s}".format(err)
     raise ImportError(msg)
 
-from integron_finder.scripts.finder import parse_args
+from integron_finder.scripts.finder import parse_args, jobs_config, ordered_map
 
 
 class TestParseArgs(IntegronTest):
@@ -81,6 +82,58 @@ class TestParseArgs(IntegronTest):
         cfg = parse_args(['--cpu', str(cpu), 'replicon'])
         self.assertEqual(cfg.cpu, cpu)
 
+    def test_jobs(self):
+        cfg = parse_args(['replicon'])
+        self.assertEqual(cfg.jobs, 1)
+        jobs = 4
+        cfg = parse_args(['--jobs', str(jobs), 'replicon'])
+        self.assertEqual(cfg.jobs, jobs)
+
+    def test_jobs_null(self):
+        real_exit = sys.exit
+
+        sys.exit = self.fake_exit
+        with self.catch_io(err=True):
+            try:
+                _ = parse_args(['--jobs', '0', 'replicon'])
+            except TypeError as err:
+                msg = sys.stderr.getvalue()
+                msg_end = 'error: argument --jobs: must be greater than 0\n'
+                self.assertTrue(msg.endswith(msg_end), "{} != {}".format(msg[len(msg) - len(msg_end):], msg_end))
+                # program exit with returncode = 2
+                self.assertEqual(str(err), '2')
+            finally:
+                sys.exit = real_exit
+
+    def test_jobs_config(self):
+        cfg = parse_args(['--cpu', '8', '--jobs', '3', 'replicon'])
+        job_cfg = jobs_config(cfg, cfg.jobs)
+        self.assertEqual(job_cfg.cpu, 2)
+        # the original config is not modified
+        self.assertEqual(cfg.cpu, 8)
+        cfg = parse_args(['--cpu', '2', '--jobs', '4', 'replicon'])
+        job_cfg = jobs_config(cfg, cfg.jobs)
+        self.assertEqual(job_cfg.cpu, 1)
+
+    def test_ordered_map(self):
+        submitted = []
+        consumed = []
+
+        def square(item, offset):
+            return item * item + offset
+
+        def items():
+            for item in range(10):
+                # at most 3 items are submitted and not consumed
+                self.assertLessEqual(len(submitted) - len(consumed), 3)
+                submitted.append(item)
+                yield item
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            for res in ordered_map(executor, square, items(), 3, 1):
+                consumed.append(res)
+        self.assertListEqual(consumed, [item * item + 1 for item in range(10)])
+
     def test_distance_threshold(self):
         cfg = parse_args(['replicon'])
         self.assertEqual(cfg.distance_threshold, 4000)
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+
+####################################################################################
+# Integron_Finder - Integron Finder aims at detecting integrons in DNA sequences   #
+# by finding particular features of the integron:                                  #
+#   - the attC sites                                                               #
+#   - the integrase                                                                #
+#   - and when possible attI site and promoters.                                   #
+#                                                                                  #
+# Authors: Jean Cury, Bertrand Neron, Eduardo PC Rocha                             #
+# Copyright (c) 2015 - 2018  Institut Pasteur, Paris and CNRS                      #
+# See the COPYRIGHT file for details                                               #
+#                                                                                  #
+# integron_finder is free software: you can redistribute it and/or modify          #
+# it under the terms of the GNU General Public License as published by             #
+# the Free Software Foundation, either version 3 of the License, or                #
+# (at your option) any later version.                                              #
+#                                                                                  #
+# integron_finder is distributed in the hope that it will be useful,               #
+# but WITHOUT ANY WARRANTY; without even the implied warranty of                   #
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the                    #
+# GNU General Public License for more details.                                     #
+#                                                                                  #
+# You should have received a copy of the GNU General Public License                #
+# along with this program (COPYING file).                                          #
+# If not, see <http://www.gnu.org/licenses/>.                                      #
+####################################################################################
+
+import random
+
+try:
+    from tests import IntegronTest
+except ImportError as err:
+    msg = "Cannot import integron_finder: {0!s}".format(err)
+    raise ImportError(msg)
+
+from integron_finder.pattern import find_all
+
+
+def naive_search(patterns, text):
+    hits = []
+    for pattern, key in patterns:
+        for pos in range(len(text) - len(pattern) + 1):
+            if text[pos:pos + len(pattern)] == pattern:
+                hits.append((pos, key))
+    return sorted(hits, key=lambda hit: (hit[0], str(hit[1])))
+
+
+class TestFindAll(IntegronTest):
+
+    def test_find_all(self):
+        hits = find_all('ACGTNACGTACGTacgtACG', ['ACG', 'CGTA', 'GTACG'])
+        self.assertListEqual(sorted(hits), ['ACG', 'CGTA', 'GTACG'])
+        # the comparison is case sensitive
+        self.assertListEqual(hits['ACG'].tolist(), [0, 5, 9, 17])
+        self.assertListEqual(hits['CGTA'].tolist(), [6])
+        self.assertListEqual(hits['GTACG'].tolist(), [7])
+        self.assertDictEqual(find_all('AC', []), {})
+        self.assertListEqual(find_all('AC', ['ACG'])['ACG'].tolist(), [])
+
+    def test_bad_pattern(self):
+        for pattern in ('', 'ACGN'):
+            with self.assertRaises(ValueError) as ctx:
+                find_all('ACGT', [pattern])
+            self.assertEqual(str(ctx.exception),
+                             "cannot search the pattern '{}', "
+                             "the patterns must contain only A, C, G and T".format(pattern))
+
+    def test_random(self):
+        rnd = random.Random(42)
+        for _ in range(100):
+            # long patterns are compared beyond the 32 first bases
+            patterns = [''.join(rnd.choice('ACGT') for _ in range(rnd.randint(1, 40)))
+                        for _ in range(rnd.randint(1, 8))]
+            patterns.append(patterns[0] * 2)
+            text = []
+            for _ in range(10):
+                text.append(''.join(rnd.choice('ACGTN') for _ in range(rnd.randint(0, 50))))
+                text.append(rnd.choice(patterns))
+            text = ''.join(text)
+            hits = find_all(text, patterns)
+            for pattern in patterns:
+                self.assertListEqual(hits[pattern].tolist(),
+                                     [pos for pos, _ in naive_search([(pattern, None)], text)])
@@ -345,6 +345,25 @@ class TestGemBase(IntegronTest):
         self.assertEqual(str(ctx.exception), "'FOO.BAR.00019.i0001_03924'")
 
 
+    def test_get_description_border_letter(self):
+        # the first letter of the gene number (b for border, i for inside) is not significant
+        seq_name = 'ACBA.0917.00019'
+        replicon_path = self.find_data(os.path.join('Gembase', 'Replicons', seq_name + '.fna'))
+        self.args.replicon = replicon_path
+        cfg = Config(self.args)
+        seq_db = read_multi_prot_fasta(replicon_path)
+        replicon = next(seq_db)
+        replicon.path = replicon_path
+        os.makedirs(cfg.tmp_dir(replicon.id))
+
+        db = GembaseDB(replicon, cfg)
+        exp_desc = SeqDesc('ACBA.0917.00019.b0001_00001', -1, 266, 1480)
+        self.assertEqual(db.get_description('ACBA.0917.00019.b0001_00001'), exp_desc)
+        self.assertEqual(db.get_description('ACBA.0917.00019.i0001_00001'), exp_desc)
+        for seq_id in db:
+            self.assertEqual(db.get_description(seq_id).id, seq_id)
+
+
 class TestProdigalDB(IntegronTest):
 
     def setUp(self):
@@ -527,3 +546,90 @@ class TestProdigalDB(IntegronTest):
                         'ACBA.007.P01_13_1':  SeqDesc('ACBA.007.P01_13_1', 1, 55, 1014)}
         for seq_id, desc in descriptions.items():
             self.assertEqual(desc, db.get_description(seq_id))
+
+
+    def test_proteins_in_window(self):
+        file_name = 'acba.007.p01.13'
+        prot_name = 'ACBA.007.P01_13.prt'
+        replicon_path = self.find_data(os.path.join('Replicons', file_name + '.fst'))
+        self.args.replicon = replicon_path
+        cfg = Config(self.args)
+        seq_db = read_multi_prot_fasta(replicon_path)
+        replicon = next(seq_db)
+        replicon.path = replicon_path
+
+        db = ProdigalDB(replicon, cfg, prot_file=self.find_data(os.path.join('Proteins', prot_name)))
+        replicon_size = len(replicon)
+
+        def brute_force(window_start, window_end):
+            size = (window_end - window_start) % replicon_size
+            selected = []
+            for seq_id in db:
+                desc = db.get_description(seq_id)
+                if (window_end - desc.stop) % replicon_size < size or \
+                        (desc.start - window_start) % replicon_size < size:
+                    selected.append(desc)
+            return selected
+
+        self.assertListEqual(db.proteins_in_window(17625, 19926),
+                             [db.get_description('ACBA.007.P01_13_{}'.format(i)) for i in range(20, 24)])
+        windows = [(17625, 19926),
+                   (-200, 1014),  # overlap the origin
+                   (replicon_size - 300, 2000),  # overlap the origin
+                   (1014, 55),  # all the replicon except [55, 1014]
+                   (55, 1014),  # bounds of ACBA.007.P01_13_1
+                   (3000, 3000),  # empty window
+                   (0, replicon_size - 1),
+                   ]
+        for window_start, window_end in windows:
+            self.assertListEqual(db.proteins_in_window(window_start, window_end),
+                                 brute_force(window_start, window_end))
+
+
+    def test_descriptions_from_prot_file(self):
+        file_name = 'acba.007.p01.13'
+        prot_name = 'ACBA.007.P01_13.prt'
+        replicon_path = self.find_data(os.path.join('Replicons', file_name + '.fst'))
+        self.args.replicon = replicon_path
+        cfg = Config(self.args)
+        seq_db = read_multi_prot_fasta(replicon_path)
+        replicon = next(seq_db)
+        replicon.path = replicon_path
+        prot_path = self.find_data(os.path.join('Proteins', prot_name))
+
+        db = ProdigalDB(replicon, cfg, prot_file=prot_path)
+        # the sequences are not indexed until they are needed
+        self.assertIsNone(db._prot_db)
+        descriptions = {'ACBA.007.P01_13_23': SeqDesc('ACBA.007.P01_13_23', -1, 19721, 20254),
+                        'ACBA.007.P01_13_1':  SeqDesc('ACBA.007.P01_13_1', 1, 55, 1014)}
+        for seq_id, desc in descriptions.items():
+            self.assertEqual(desc, db.get_description(seq_id))
+        self.assertIsNone(db._prot_db)
+
+        idx = SeqIO.index(prot_path, 'fasta', alphabet=Seq.IUPAC.extended_protein)
+        self.assertListEqual(list(idx), list(db))
+        self.assertEqual(str(db['ACBA.007.P01_13_1'].seq), str(idx['ACBA.007.P01_13_1'].seq))
+
+        with self.assertRaises(KeyError):
+            db.get_description('nimport_naoik')
+
+
+    def test_descriptions_bad_header(self):
+        file_name = 'acba.007.p01.13'
+        replicon_path = self.find_data(os.path.join('Replicons', file_name + '.fst'))
+        self.args.replicon = replicon_path
+        cfg = Config(self.args)
+        seq_db = read_multi_prot_fasta(replicon_path)
+        replicon = next(seq_db)
+        replicon.path = replicon_path
+        prot_path = os.path.join(self.tmp_dir, 'bad_header.prt')
+        with open(prot_path, 'w') as prot_file:
+            prot_file.write(">prot_1 # 55 # 1014 # 1 # ID=1_1;partial=00\nMKL\n")
+            prot_file.write(">prot_2 not a prodigal header\nMKL\n")
+
+        db = ProdigalDB(replicon, cfg, prot_file=prot_path)
+        self.assertListEqual(list(db), ['prot_1', 'prot_2'])
+        self.assertEqual(db.get_description('prot_1'), SeqDesc('prot_1', 1, 55, 1014))
+        with self.assertRaises(IntegronError) as ctx:
+            db.get_description('prot_2')
+        self.assertEqual(str(ctx.exception), "'prot_2' is not a valid Prodigal protein identifier.")
@@ -28,6 +28,8 @@
 
 import os
 import argparse
+import shutil
+import tempfile
 
 import pandas as pd
 import pandas.util.testing as pdt
@@ -39,7 +41,7 @@ except ImportError as err:
     raise ImportError(msg)
 
 from integron_finder.config import Config
-from integron_finder.hmm import read_hmm
+from integron_finder.hmm import read_hmm, hmm_sniffer, hmmsearch_output_options
 from integron_finder.prot_db import GembaseDB, ProdigalDB
 from integron_finder.utils import read_multi_prot_fasta
 
@@ -343,3 +345,158 @@ class TestReadHMM(IntegronTest):
         exp = exp[["Accession_number", "query_name", "ID_query", "ID_prot",
                    "strand", "pos_beg", "pos_end", "evalue"]]
         pdt.assert_frame_equal(df, exp)
+
+
+    def test_read_multi_queries(self):
+        """
+        Test reading hmm results of a bank of profiles (several queries with hits),
+        the rows of all queries are kept with an increasing index.
+        """
+        rep_name = "acba.007.p01.13"
+        replicon_id = 'ACBA.007.P01_13'
+
+        replicon_path = self.find_data(os.path.join('Replicons', rep_name + '.fst'))
+        prot_file = self.find_data(os.path.join('Proteins', replicon_id + '.prt'))
+
+        args = argparse.Namespace()
+        args.gembase = False
+        args.replicon = replicon_path
+        cfg = Config(args)
+
+        sequences_db = read_multi_prot_fasta(replicon_path)
+        replicon = next(sequences_db)
+        prot_db = ProdigalDB(replicon, cfg, prot_file=prot_file)
+
+        infile = self.find_data(os.path.join("Results_Integron_Finder_{}.local_max".format(rep_name),
+                                             "tmp_{}".format(replicon_id),
+                                             "{}_Resfams_fa.res".format(replicon_id)))
+        df = read_hmm(replicon_id, prot_db, infile, cfg, evalue=10, coverage=0)
+        exp = pd.DataFrame(data={"Accession_number": [replicon_id] * 6,
+                                 "query_name": ['AAC3-I', 'ANT2', 'ANT3', 'ANT9', 'emrE', 'ANT'],
+                                 "ID_query": ['RF0003', 'RF0026', 'RF0027', 'RF0030', 'RF0066', 'RF0166'],
+                                 "ID_prot": ['ACBA.007.P01_13_23', 'ACBA.007.P01_13_23', 'ACBA.007.P01_13_21',
+                                             'ACBA.007.P01_13_21', 'ACBA.007.P01_13_20', 'ACBA.007.P01_13_21'],
+                                 "strand": [-1] * 6,
+                                 "pos_beg": [19721, 19721, 17886, 17886, 17375, 17886],
+                                 "pos_end": [20254, 20254, 18665, 18665, 17722, 18665],
+                                 "evalue": [6.2e-110, 7.5e-09, 7.4e-168, 6e-61, 4.5e-31, 7e-112]},
+                           index=list(range(6)))
+        exp = exp[["Accession_number", "query_name", "ID_query", "ID_prot",
+                   "strand", "pos_beg", "pos_end", "evalue"]]
+        pdt.assert_frame_equal(df, exp)
+
+        # 2 queries with 3 hits each, the rows of the second query
+        # must not overwrite the rows of the first one
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            with open(self.find_data(os.path.join("fictive_results", "{}_intI.res".format(replicon_id)))) as res:
+                lines = res.readlines()
+            query_start = [i for i, l in enumerate(lines) if l.startswith('Query:')][0]
+            query_end = [i for i, l in enumerate(lines) if l.startswith('//')][0] + 1
+            query_2 = [l.replace('intI_Cterm', 'intI_Cterm_2') for l in lines[query_start:query_end]]
+            infile = os.path.join(tmp_dir, "{}_multi_queries.res".format(replicon_id))
+            with open(infile, 'w') as res:
+                res.writelines(lines[:query_end] + query_2 + lines[query_end:])
+            df = read_hmm(replicon_id, prot_db, infile, cfg, evalue=10, coverage=0)
+        finally:
+            shutil.rmtree(tmp_dir)
+        self.assertListEqual(list(df.index), list(range(6)))
+        self.assertListEqual(list(df.query_name), ['intI_Cterm'] * 3 + ['intI_Cterm_2'] * 3)
+        self.assertListEqual(list(df.ID_prot), ['ACBA.007.P01_13_1', 'ACBA.007.P01_13_2', 'ACBA.007.P01_13_3'] * 2)
+
+
+    def test_read_hmm_domtblout(self):
+        """
+        Test that the hits are the same if hmmsearch report them in text or domain tabular format
+        """
+        rep_name = "acba.007.p01.13"
+        replicon_id = 'ACBA.007.P01_13'
+
+        replicon_path = self.find_data(os.path.join('Replicons', rep_name + '.fst'))
+        prot_file = self.find_data(os.path.join('Proteins', replicon_id + '.prt'))
+
+        args = argparse.Namespace()
+        args.gembase = False
+        args.replicon = replicon_path
+        cfg = Config(args)
+
+        sequences_db = read_multi_prot_fasta(replicon_path)
+        replicon = next(sequences_db)
+        prot_db = ProdigalDB(replicon, cfg, prot_file=prot_file)
+
+        text_out = self.find_data(os.path.join("Results_Integron_Finder_{}.local_max".format(rep_name),
+                                               "tmp_{}".format(replicon_id),
+                                               "{}_Resfams_fa.res".format(replicon_id)))
+        domtbl_out = self.find_data(os.path.join("fictive_results", "{}_Resfams_fa-domtbl.res".format(replicon_id)))
+        self.assertEqual(hmm_sniffer(text_out), 'hmmer3-text')
+        self.assertEqual(hmm_sniffer(domtbl_out), 'hmmer3-domtab')
+
+        for evalue, coverage in ((1., 0.5), (10., 0.)):
+            exp = read_hmm(replicon_id, prot_db, text_out, cfg, evalue=evalue, coverage=coverage)
+            df = read_hmm(replicon_id, prot_db, domtbl_out, cfg, evalue=evalue, coverage=coverage)
+            pdt.assert_frame_equal(df, exp)
+
+
+    def test_read_hmm_domtblout_multi_domains(self):
+        """
+        Test that for a hit with several domains, the domain with the best i-evalue is kept
+        """
+        rep_name = "acba.007.p01.13"
+        replicon_id = 'ACBA.007.P01_13'
+
+        replicon_path = self.find_data(os.path.join('Replicons', rep_name + '.fst'))
+        prot_file = self.find_data(os.path.join('Proteins', replicon_id + '.prt'))
+
+        args = argparse.Namespace()
+        args.gembase = False
+        args.replicon = replicon_path
+        cfg = Config(args)
+
+        sequences_db = read_multi_prot_fasta(replicon_path)
+        replicon = next(sequences_db)
+        prot_db = ProdigalDB(replicon, cfg, prot_file=prot_file)
+
+        domtbl_src = self.find_data(os.path.join("fictive_results", "{}_Resfams_fa-domtbl.res".format(replicon_id)))
+        with open(domtbl_src) as domtbl:
+            header = [domtbl.readline() for _ in range(3)]
+        rows = ["ACBA.007.P01_13_1    -            319 intI_Cterm           -             59   1.1e-25   79.7   3.3   1   3"
+                "   8.4e-20   1.9e-18   78.9   3.3    10    30    20    40    19    41 0.96 -\n",
+                "ACBA.007.P01_13_1    -            319 intI_Cterm           -             59   1.1e-25   79.7   3.3   2   3"
+                "   8.4e-27   1.9e-25   78.9   3.3     2    58   198   254   197   255 0.96 -\n",
+                "ACBA.007.P01_13_1    -            319 intI_Cterm           -             59   1.1e-25   79.7   3.3   3   3"
+                "   8.4e-27   1.9e-25   78.9   3.3     1    20   300   319   300   319 0.96 -\n",
+                "ACBA.007.P01_13_2    -            319 intI_Cterm           -             59   1.1e-10   79.7   3.3   1   1"
+                "   8.4e-5    1e-3      78.9   3.3     2    58   198   254   197   255 0.96 -\n",
+                ]
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            infile = os.path.join(tmp_dir, "{}_intI.res".format(replicon_id))
+            with open(infile, 'w') as domtbl:
+                domtbl.writelines(header + rows + ["#\n", "# [ok]\n"])
+            df = read_hmm(rep_name, prot_db, infile, cfg)
+        finally:
+            shutil.rmtree(tmp_dir)
+        exp = pd.DataFrame(data={"Accession_number": [rep_name] * 2, "query_name": ["intI_Cterm"] * 2,
+                                 "ID_query": ["-"] * 2,
+                                 "ID_prot": ["ACBA.007.P01_13_1", "ACBA.007.P01_13_2"],
+                                 "strand": [1, -1],
+                                 "pos_beg": [55, 905], "pos_end": [1014, 1609],
+                                 "evalue": [1.9e-25, 1e-3]},
+                           index=[0, 1])
+        exp = exp[["Accession_number", "query_name", "ID_query", "ID_prot",
+                   "strand", "pos_beg", "pos_end", "evalue"]]
+        pdt.assert_frame_equal(df, exp)
+
+
+    def test_hmmsearch_output_options(self):
+        args = argparse.Namespace()
+        cfg = Config(args)
+        self.assertListEqual(hmmsearch_output_options('foo_intI.res', cfg), ['-o', 'foo_intI.res'])
+
+        args.hmm_domtblout = True
+        args.keep_tmp = False
+        self.assertListEqual(hmmsearch_output_options('foo_intI.res', cfg),
+                             ['--domtblout', 'foo_intI.res', '-o', os.devnull])
+        args.keep_tmp = True
+        self.assertListEqual(hmmsearch_output_options('foo_intI.res', cfg),
+                             ['--domtblout', 'foo_intI.res', '-o', 'foo_intI.out'])
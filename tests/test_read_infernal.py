@@ -28,6 +28,9 @@
 
 
 import os
+import shutil
+import tempfile
+import numpy as np
 import pandas as pd
 import pandas.util.testing as pdt
 
@@ -301,3 +304,74 @@ class TestReadInfernal(IntegronTest):
         expect[intcols] = expect[intcols].astype(int)
         pdt.assert_frame_equal(df, expect)
 
+
+
+class TestReadTblout(IntegronTest):
+
+    def setUp(self):
+        """
+        Define variables common to all tests
+        """
+        self.replicon_name = "acba.007.p01.13"
+        self.replicon_id = "ACBA.007.P01_13"
+        self.tmp_dir = os.path.join(tempfile.gettempdir(), 'tmp_test_integron_finder')
+        if os.path.exists(self.tmp_dir) and os.path.isdir(self.tmp_dir):
+            shutil.rmtree(self.tmp_dir)
+        os.makedirs(self.tmp_dir)
+
+
+    def tearDown(self):
+        try:
+            shutil.rmtree(self.tmp_dir)
+        except:
+            pass
+
+
+    def test_read_tblout(self):
+        """
+        Test that the tblout is parsed in typed columns, comments and footer are skipped.
+        """
+        filename = self.find_data(os.path.join("Results_Integron_Finder_{}".format(self.replicon_name),
+                                               "tmp_{}".format(self.replicon_id),
+                                               "{}_attc_table.res".format(self.replicon_id)))
+        hits = infernal.read_tblout(filename)
+        self.assertListEqual(sorted(hits.keys()),
+                             sorted(["target_name", "cm_attC", "cm_debut", "cm_fin",
+                                     "pos_beg_tmp", "pos_end_tmp", "sens", "evalue"]))
+        self.assertListEqual(list(hits["target_name"]), [self.replicon_id] * 3)
+        self.assertListEqual(list(hits["cm_attC"]), ["attC_4"] * 3)
+        self.assertListEqual(list(hits["cm_debut"]), [1, 1, 1])
+        self.assertListEqual(list(hits["cm_fin"]), [47, 47, 47])
+        self.assertListEqual(list(hits["pos_beg_tmp"]), [17884, 19726, 19149])
+        self.assertListEqual(list(hits["pos_end_tmp"]), [17825, 19618, 19080])
+        self.assertListEqual(list(hits["sens"]), ["-", "-", "-"])
+        self.assertListEqual(list(hits["evalue"]), [1e-9, 1.1e-7, 1e-4])
+        self.assertEqual(hits["pos_beg_tmp"].dtype, np.int64)
+        self.assertEqual(hits["evalue"].dtype, np.float64)
+
+
+    def test_read_tblout_nohit(self):
+        """
+        Test that a tblout without hit gives empty columns.
+        """
+        filename = self.find_data(os.path.join("fictive_results", "{}_attc_table-empty.res".format(self.replicon_id)))
+        hits = infernal.read_tblout(filename)
+        for col in hits.values():
+            self.assertEqual(len(col), 0)
+
+
+    def test_read_infernal_both_strands(self):
+        """
+        Test that positions are extended to the model length on both strands.
+        """
+        tblout = os.path.join(self.tmp_dir, "both_strands_attc_table.res")
+        with open(tblout, "w") as f:
+            f.write("#target name  accession query name accession mdl mdl from   mdl to seq from   seq to strand "
+                    "trunc pass   gc  bias  score   E-value inc description of target\n")
+            f.write("rep  -  attC_4  -  cm  3  45  1000  1060  +  no  1 0.55 0.0 46.4 1e-09 !  a description\n")
+            f.write("rep  -  attC_4  -  cm  2  40  2060  2000  -  no  1 0.55 0.0 46.4 1e-05 !  a description\n")
+            f.write("#\n# [ok]\n")
+        df = infernal.read_infernal(tblout, "rep", 47)
+        self.assertListEqual(list(df.pos_beg), [998, 1993])
+        self.assertListEqual(list(df.pos_end), [1062, 2061])
+        self.assertEqual(df.pos_beg.dtype, np.int64)
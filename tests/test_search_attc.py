@@ -27,7 +27,10 @@
 ####################################################################################
 
 import os
+import random
+import warnings
 
+import numpy as np
 import pandas as pd
 import pandas.util.testing as pdt
 
@@ -687,3 +690,111 @@ class TestSearchAttc(IntegronTest):
         pdt.assert_frame_equal(attc_res2, attc_array[0])
         pdt.assert_frame_equal(attc_res, attc_array[1])
         pdt.assert_frame_equal(attc_res3, attc_array[2])
+
+
+def legacy_search_attc(attc_df, keep_palindromes, dist_threshold, replicon_size):
+    """
+    search_attc before cluster_attc, the arrays are built by splitting the DataFrame of each strand.
+    """
+    ok = False
+    position_bkp_minus = []
+    position_bkp_plus = []
+    attc_plus = attc_df[attc_df.sens == "+"].copy()
+    attc_minus = attc_df[attc_df.sens == "-"].copy()
+    if not keep_palindromes:
+        attc_df = attc_df.sort_values(["pos_beg", "evalue"]).drop_duplicates(subset=["pos_beg"]).copy()
+        attc_plus = attc_df[attc_df.sens == "+"].copy()
+        attc_minus = attc_df[attc_df.sens == "-"].copy()
+    if (attc_plus.pos_beg.diff() > dist_threshold).any() or (attc_minus.pos_beg.diff() > dist_threshold).any():
+        if not attc_plus.empty:
+            bkp_plus = attc_plus[attc_plus.pos_beg.diff() > dist_threshold].index
+            position_bkp_plus = [attc_plus.index.get_loc(i) for i in bkp_plus]
+        if not attc_minus.empty:
+            bkp_minus = attc_minus[(attc_minus.pos_beg.diff() > dist_threshold)].index
+            position_bkp_minus = [attc_minus.index.get_loc(i) for i in bkp_minus]
+        ok = True
+    if not attc_plus.empty and not attc_minus.empty:
+        ok = True
+    if not ok:
+        return [] if attc_df.empty else [attc_df]
+    arrays = []
+    for attc_strand, position_bkp in ((attc_plus, position_bkp_plus), (attc_minus, position_bkp_minus)):
+        if attc_strand.empty:
+            continue
+        array_strand = np.split(attc_strand.values, position_bkp)
+        first_pos_beg = array_strand[0][0][4]
+        last_pos_beg = array_strand[-1][-1][4]
+        if len(array_strand) > 1 and (first_pos_beg - last_pos_beg) % replicon_size < dist_threshold:
+            array_strand[0] = np.concatenate((array_strand[-1], array_strand[0]))
+            del array_strand[-1]
+        arrays.extend(array_strand)
+    attc_array = [pd.DataFrame(i, columns=["Accession_number", "cm_attC", "cm_debut",
+                                           "cm_fin", "pos_beg", "pos_end", "sens", "evalue"]) for i in arrays]
+    intcols = ["cm_debut", "cm_fin", "pos_beg", "pos_end"]
+    for a in attc_array:
+        a[intcols] = a[intcols].astype(int)
+        a["evalue"] = a["evalue"].astype(float)
+    return attc_array
+
+
+class TestClusterAttc(IntegronTest):
+
+    columns = ["Accession_number", "cm_attC", "cm_debut", "cm_fin", "pos_beg", "pos_end", "sens", "evalue"]
+
+    def random_attc(self, rnd, attc_nb, replicon_size):
+        pos_beg = sorted(rnd.randrange(replicon_size) for _ in range(attc_nb))
+        attc_df = pd.DataFrame({"Accession_number": "foo",
+                                "cm_attC": "attc_4",
+                                "cm_debut": 1,
+                                "cm_fin": 47,
+                                "pos_beg": pos_beg,
+                                "pos_end": [beg + rnd.randint(40, 200) for beg in pos_beg],
+                                "sens": [rnd.choice("+-") for _ in pos_beg],
+                                "evalue": [rnd.choice((1e-9, 1e-5, 1e-3)) for _ in pos_beg]},
+                               columns=self.columns)
+        return attc_df
+
+    def test_cluster_attc(self):
+        rnd = random.Random(7)
+        replicon_size = 20000
+        for _ in range(50):
+            attc_df = self.random_attc(rnd, rnd.randint(0, 40), replicon_size)
+            dist_threshold = rnd.choice((500, 2000, 4000))
+            keep_palindromes = rnd.choice((True, False))
+            legacy = legacy_search_attc(attc_df, keep_palindromes, dist_threshold, replicon_size)
+            attc_arrays = attc.cluster_attc(attc_df, keep_palindromes, dist_threshold, replicon_size)
+            self.assertEqual(len(attc_arrays), len(legacy))
+            for exp, array in zip(legacy, attc_arrays):
+                pdt.assert_frame_equal(exp.reset_index(drop=True), array)
+            if legacy:
+                self.assertListEqual(attc_arrays.left.tolist(), [a.pos_beg.values[0] for a in legacy])
+                self.assertListEqual(attc_arrays.right.tolist(), [a.pos_end.values[-1] for a in legacy])
+            for array_idx, exp in enumerate(legacy):
+                self.assertListEqual(list(attc_arrays.attc_sites(array_idx)),
+                                     [(a[4], a[5], 1 if a[6] == "+" else -1, a[7]) for a in exp.values])
+            self.assertEqual(len(attc.search_attc(attc_df, keep_palindromes, dist_threshold, replicon_size)),
+                             len(legacy))
+
+    def test_cluster_attc_empty(self):
+        # the empty table of a replicon without attC site has no object column
+        attc_df = pd.DataFrame(columns=self.columns).astype({"pos_beg": int, "pos_end": int,
+                                                             "sens": float, "evalue": float})
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")
+            for keep_palindromes in (True, False):
+                attc_arrays = attc.cluster_attc(attc_df, keep_palindromes, 4000, 20000)
+                self.assertEqual(len(attc_arrays), 0)
+                self.assertListEqual(list(attc_arrays), [])
+                self.assertListEqual(attc.search_attc(attc_df, keep_palindromes, 4000, 20000), [])
+
+    def test_attc_arrays_getitem(self):
+        attc_df = pd.DataFrame({"Accession_number": "foo", "cm_attC": "attc_4", "cm_debut": 1, "cm_fin": 47,
+                                "pos_beg": [100, 300, 10000], "pos_end": [200, 400, 10100],
+                                "sens": "+", "evalue": 1e-5},
+                               columns=self.columns)
+        attc_arrays = attc.cluster_attc(attc_df, True, 4000, 20000)
+        self.assertEqual(len(attc_arrays), 2)
+        self.assertListEqual(attc_arrays[-1].pos_beg.tolist(), [10000])
+        with self.assertRaises(IndexError):
+            attc_arrays[2]
+        self.assertListEqual(attc_arrays.array_rows(0).tolist(), [0, 1])
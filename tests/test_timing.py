@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+
+####################################################################################
+# Integron_Finder - Integron Finder aims at detecting integrons in DNA sequences   #
+# by finding particular features of the integron:                                  #
+#   - the attC sites                                                               #
+#   - the integrase                                                                #
+#   - and when possible attI site and promoters.                                   #
+#                                                                                  #
+# Authors: Jean Cury, Bertrand Neron, Eduardo PC Rocha                             #
+# Copyright (c) 2015 - 2018  Institut Pasteur, Paris and CNRS                      #
+# See the COPYRIGHT file for details                                               #
+#                                                                                  #
+# integron_finder is free software: you can redistribute it and/or modify          #
+# it under the terms of the GNU General Public License as published by             #
+# the Free Software Foundation, either version 3 of the License, or                #
+# (at your option) any later version.                                              #
+#                                                                                  #
+# integron_finder is distributed in the hope that it will be useful,               #
+# but WITHOUT ANY WARRANTY; without even the implied warranty of                   #
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the                    #
+# GNU General Public License for more details.                                     #
+#                                                                                  #
+# You should have received a copy of the GNU General Public License                #
+# along with this program (COPYING file).                                          #
+# If not, see <http://www.gnu.org/licenses/>.                                      #
+####################################################################################
+
+import os
+import json
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from tests import IntegronTest
+except ImportError as err:
+    msg = "Cannot import integron_finder: {0!s}".format(err)
+    raise ImportError(msg)
+
+from integron_finder import timing
+from integron_finder.cache import cached_run
+
+
+class TestTiming(IntegronTest):
+
+    def setUp(self):
+        self.tmp_dir = os.path.join(tempfile.gettempdir(), 'tmp_test_integron_finder')
+        if os.path.exists(self.tmp_dir) and os.path.isdir(self.tmp_dir):
+            shutil.rmtree(self.tmp_dir)
+        os.makedirs(self.tmp_dir)
+        self.timings_path = os.path.join(self.tmp_dir, 'timings.tsv')
+
+    def tearDown(self):
+        timing.start(None)
+        try:
+            shutil.rmtree(self.tmp_dir)
+        except:
+            pass
+
+    def test_disabled(self):
+        timing.start(None)
+        self.assertFalse(timing.enabled())
+        with timing.replicon('foo'):
+            with timing.stage('bar'):
+                pass
+        self.assertFalse(os.path.exists(self.timings_path))
+
+    def test_stages(self):
+        timing.start(self.timings_path)
+        self.assertTrue(timing.enabled())
+        out = os.path.join(self.tmp_dir, 'out')
+
+        def run():
+            with open(out, 'w') as out_file:
+                out_file.write('a' * 100)
+
+        with timing.stage('batch'):
+            pass
+        with timing.replicon('foo'):
+            with timing.stage('local_max'):
+                # the stages of the threads are nested in the stage of the main thread
+                with ThreadPoolExecutor(max_workers=2) as executor:
+                    list(executor.map(lambda _: cached_run(None, ['/bin/cmsearch'], [], [out], run), range(2)))
+            with timing.stage('write_results'):
+                pass
+        # the stages are appended
+        timing.start(self.timings_path, new=False)
+        with timing.replicon('bar'):
+            pass
+
+        timings = timing.read_timings(self.timings_path)
+        self.assertListEqual(list(timings.columns), timing.COLUMNS)
+        self.assertListEqual(list(zip(timings.replicon, timings.stage)),
+                             [(timing.NO_REPLICON, 'batch'),
+                              ('foo', 'local_max/cmsearch'),
+                              ('foo', 'local_max/cmsearch'),
+                              ('foo', 'local_max'),
+                              ('foo', 'write_results'),
+                              ('foo', 'total'),
+                              ('bar', 'total')])
+        cmsearch = timings[timings.stage == 'local_max/cmsearch']
+        self.assertTrue((cmsearch.bytes_written >= 100).all())
+        self.assertTrue((timings.wall_time >= 0).all())
+        self.assertTrue((timings.process_peak_rss > 0).all())
+
+        by_stage, by_replicon = timing.summary(timings)
+        self.assertEqual(by_stage.loc['local_max/cmsearch', 'calls'], 2)
+        self.assertEqual(by_stage.loc['total', 'calls'], 2)
+        self.assertEqual(by_stage.loc['local_max/cmsearch', 'bytes_written'], cmsearch.bytes_written.sum())
+        self.assertListEqual(sorted(by_replicon.index), ['bar', 'foo'])
+
+        summary_path = os.path.join(self.tmp_dir, 'timings.json')
+        with self.catch_log():
+            timing.write_summary(summary_path, self.timings_path)
+        with open(summary_path) as summary_file:
+            summary = json.load(summary_file)
+        self.assertEqual(summary['stages']['local_max/cmsearch']['calls'], 2)
+        self.assertEqual(summary['replicons']['foo']['process_peak_rss'], by_replicon.loc['foo', 'process_peak_rss'])
+
+    def test_stage_error(self):
+        timing.start(self.timings_path)
+        with self.assertRaises(RuntimeError):
+            with timing.replicon('foo'):
+                with timing.stage('attc'):
+                    raise RuntimeError('cmsearch failed')
+        # the stage is recorded and closed
+        with timing.stage('merge'):
+            pass
+        timings = timing.read_timings(self.timings_path)
+        self.assertListEqual(list(zip(timings.replicon, timings.stage)),
+                             [('foo', 'attc'), ('foo', 'total'), (timing.NO_REPLICON, 'merge')])